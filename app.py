@@ -1,108 +1,118 @@
 ﻿import os
-import io
-import csv
-import math
-import base64
-import hashlib
+import sys
+import time
+
+STARTUP_PHASES = [("start", time.perf_counter())]   # (phase, perf_counter when it ended)
+
+def mark_startup(phase):
+    STARTUP_PHASES.append((phase, time.perf_counter()))
+
+import queue
 import sqlite3
+import threading
 import subprocess
-import qrcode, io
-from reportlab.lib.utils import ImageReader
+from datetime import datetime, timedelta
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from PIL import Image, ImageTk
+mark_startup("import stdlib, tkinter, PIL")
+
 from categories import CATEGORY_ITEMS
 from database_setup import init_db
+from catalog_grid import CatalogGrid, VirtualCatalogGrid
+from cart import from_cents, to_cents
+from checkout import CheckoutError
+from pos_service import PosError, PosService
+from queries import LOW_STOCK_THRESHOLD
+from thumbnails import ThumbnailCache
+from exporters import export_line_items
+from inventory_import import validate_inventory_csv
+from receipts import (REPORTLAB_AVAILABLE, ReceiptRenderQueue, draw_page_background, export_receipts_batch,
+                      open_file, receipt_numbers_in_range)
 from utils import *
 from style_config import style_app
 from colors import *
 from login_window import LoginWindow
 from pastry_form import PastryForm
-from datetime import datetime, timedelta
-from PIL import Image, ImageTk, ImageDraw, ImageFont
-
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib import utils as rl_utils
-    from reportlab.lib.units import mm
-    from reportlab.pdfgen import canvas as rl_canvas
-    from reportlab.lib.styles import getSampleStyleSheet
-    from reportlab.platypus import Table, TableStyle, Paragraph, Image as RLImage, Spacer
-    from reportlab.lib import colors as rl_colors
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    REPORTLAB_AVAILABLE = True
-except Exception:
-    REPORTLAB_AVAILABLE = False
-
-try:
-    pdfmetrics.registerFont(TTFont("DejaVuSans", "DejaVuSans.ttf"))
-    FONT_NORMAL = "DejaVuSans"
-except:
-    FONT_NORMAL = "Helvetica"  # fallback if font file not found
-
-try:
-    QRCODE_AVAILABLE = True
-except Exception:
-    QRCODE_AVAILABLE = False
-
-import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+mark_startup("import app modules")
 
 # -------------------- Paths & Constants --------------------
+# Output folders are created by whatever first writes to them
 BASE_DIR = r"E:\Downloads\3rdyr1stsem\Elective 3\MambaMunchies Integrated Pastry Point of Sale (POS) and Sales Monitoring System"
-os.makedirs(BASE_DIR, exist_ok=True)
 DB_PATH = os.path.join(BASE_DIR, "pastry_inventory.db") 
 DB_FILE = "pastry_pos.db"
 IMAGES_DIR = os.path.join(BASE_DIR, "Images")
-os.makedirs(IMAGES_DIR, exist_ok=True)
 RECEIPTS_DIR = os.path.join(BASE_DIR, "Receipts")
-os.makedirs(RECEIPTS_DIR, exist_ok=True)
 EXPORTS_DIR = os.path.join(BASE_DIR, "Exports")
-os.makedirs(EXPORTS_DIR, exist_ok=True)
 
-LOW_STOCK_THRESHOLD = 5
 POS_GRID_COLS = 5
+POS_VIRTUAL_GRID_MIN = 150  # catalogs this large switch to the virtualized grid
+SEARCH_DEBOUNCE_MS = 150    # quiet time after the last keystroke before filtering
 CARD_IMG_SIZE = (120, 90)
-LOGO_SIZE = (36, 36)
+LOGO_SIZE = (40, 40)
 
-MAX_QTY_PER_PRODUCT = 10
+RECEIPT_POLL_MS = 150
+REPORT_PAGE_SIZE = 200     # receipts fetched per keyset page in the Reports tab
+REPORT_LOGO_MM = 120
 
 # -------------------- Product image helpers --------------------
-FONT_CACHE = None
+FONT_CACHE = {}
+THUMBS = ThumbnailCache(os.path.join(BASE_DIR, ".thumbcache"))
+_IMAGE_PATHS = {}
 
 def get_font(size=16):
-    global FONT_CACHE
-    try:
-        if FONT_CACHE is None:
-            FONT_CACHE = ImageFont.truetype("arial.ttf", size)
-        return ImageFont.truetype("arial.ttf", size)
-    except Exception:
-        return ImageFont.load_default()
-
-def load_product_image(name: str) -> ImageTk.PhotoImage:
+    font = FONT_CACHE.get(size)
+    if font is None:
+        from PIL import ImageFont
+        try:
+            font = ImageFont.truetype("arial.ttf", size)
+        except Exception:
+            font = ImageFont.load_default()
+        FONT_CACHE[size] = font
+    return font
+
+def _product_image_path(name: str):
+    fp = _IMAGE_PATHS.get(name)
+    if fp and os.path.exists(fp):
+        return fp
     for ext in (".png", ".jpg", ".jpeg"):
         fp = os.path.join(IMAGES_DIR, name + ext)
         if os.path.exists(fp):
-            try:
-                img = Image.open(fp).convert("RGBA")
-                img = img.resize(CARD_IMG_SIZE, Image.LANCZOS)
-                return ImageTk.PhotoImage(img)
-            except Exception:
-                pass
+            _IMAGE_PATHS[name] = fp
+            return fp
+    _IMAGE_PATHS.pop(name, None)
+    return None
+
+def _placeholder_image(name: str):
+    from PIL import ImageDraw
     bg = COL_ACCENT_LIGHT
     img = Image.new("RGBA", CARD_IMG_SIZE, bg)
     d = ImageDraw.Draw(img)
     initials = "".join([w[0] for w in name.split()[:2]]).upper() or "P"
     f = get_font(28)
-    tw, th = d.textsize(initials, font=f)
+    left, top, right, bottom = d.textbbox((0, 0), initials, font=f)
+    tw, th = right - left, bottom - top
     d.text(((CARD_IMG_SIZE[0]-tw)//2, (CARD_IMG_SIZE[1]-th)//2), initials, fill=COL_TEXT, font=f)
     d.ellipse([4,4,22,22], fill=COL_ACCENT)
-    return ImageTk.PhotoImage(img)
+    return img
+
+def load_product_image(name: str) -> ImageTk.PhotoImage:
+    fp = _product_image_path(name)
+    if fp:
+        try:
+            return THUMBS.photo(fp, CARD_IMG_SIZE)
+        except Exception:
+            pass
+    return THUMBS.generated(name, CARD_IMG_SIZE, lambda: _placeholder_image(name))
 
 # -------------------- App --------------------
 class App(tk.Tk):
     def __init__(self, username, role):
         super().__init__()
+        mark_startup("App: Tk root")
         self.username = username
         self.role = role
+        self.pos = PosService(username, role)
 
         self.title("🍰 MambaMunchies")
         self.geometry("1200x780")
@@ -113,15 +123,15 @@ class App(tk.Tk):
         self.columnconfigure(0, weight=1)
 
         style_app(self)
+        mark_startup("App: styles")
 
         # Top bar
         top = ttk.Frame(self, padding=10)
         top.pack(side="top", fill="x")
-        # load logo if present
+        # logo if present, pre-scaled once and then read from the thumbnail cache
         logo_fp = os.path.join(BASE_DIR, "logo.jpg")
         try:
-            logo_img = Image.open(logo_fp).resize((40, 40))
-            self.logo_photo = ImageTk.PhotoImage(logo_img)
+            self.logo_photo = THUMBS.photo(logo_fp, LOGO_SIZE)
             ttk.Label(top, image=self.logo_photo, text="  MambaMunchies Bakery POS", compound="left", font=("Segoe UI", 16, "bold")).pack(side="left")
         except Exception:
             ttk.Label(top, text="  MambaMunchies Bakery POS", font=("Segoe UI", 16, "bold")).pack(side="left")
@@ -143,64 +153,36 @@ class App(tk.Tk):
             self.users_tab = ttk.Frame(self.nb)
             self.nb.add(self.users_tab, text="  Users  ")
 
+        # Only the POS tab is built now; the others on first selection
         self.build_pos_tab()
-        self.build_inventory_tab()
-        self.build_reports_tab()
+        mark_startup("App: POS tab")
+        self._pending_tabs = {
+            str(self.inventory_tab): (self.build_inventory_tab, self.load_inventory),
+            str(self.reports_tab): (self.build_reports_tab, self.refresh_reports),
+        }
         if self.role == "Admin":
-            self.build_users_tab()
+            self._pending_tabs[str(self.users_tab)] = (self.build_users_tab,)
+        self.nb.bind("<<NotebookTabChanged>>", self.on_tab_changed)
 
         # Load
-        self.load_inventory()
         self.refresh_catalog()
-        self.refresh_reports()
+        self.show_stock_alerts(self.pos.low_stock())
+        self.scan_entry.focus_set()
+        mark_startup("App: catalog and stock alerts")
+
+        # Receipts render off the UI thread
+        self.receipt_queue = ReceiptRenderQueue(RECEIPTS_DIR, BASE_DIR)
+        self.after(RECEIPT_POLL_MS, self.poll_receipts)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # Shortcuts
         self.bind("<Control-n>", lambda e: self.clear_cart())
         self.bind("<Control-p>", lambda e: self.charge())
-        self.bind("<F5>", lambda e: self.refresh_catalog())
-
-    def show_low_stock_notification(self):
-        """Display a popup window showing products below the low stock threshold."""
-        con = db_connect()
-        cur = con.cursor()
-        cur.execute("SELECT name, quantity FROM pastries WHERE quantity < ?", (LOW_STOCK_THRESHOLD,))
-        low_stock_items = cur.fetchall()
-        con.close()
-
-        if not low_stock_items:
-            return  # nothing to show
-
-        # Create popup window
-        notif = tk.Toplevel(self)
-        notif.title("⚠️ Low Stock Alert")
-        notif.geometry("380x300")
-        notif.resizable(False, False)
-        notif.configure(bg="#fff4f4")
-
-        ttk.Label(notif, text="⚠️ Low Stock Warning", font=("Segoe UI", 13, "bold"), foreground="#8a1c1c").pack(pady=10)
-
-        frame = ttk.Frame(notif)
-        frame.pack(fill="both", expand=True, padx=15, pady=10)
+        self.bind("<F5>", lambda e: self.reload_catalog())
 
-        tree = ttk.Treeview(frame, columns=("Item", "Qty"), show="headings", height=8)
-        tree.heading("Item", text="Item")
-        tree.heading("Qty", text="Qty")
-        tree.column("Item", width=200)
-        tree.column("Qty", width=80, anchor="center")
-        tree.pack(fill="both", expand=True)
-
-        # Insert rows
-        for name, qty in low_stock_items:
-            tree.insert("", "end", values=(name, qty))
-
-        ttk.Button(
-            notif, text="OK", style="Accent.TButton", command=notif.destroy
-        ).pack(pady=10)
-
-        # Make popup appear on top of main window
-        notif.transient(self)
-        notif.grab_set()
-        self.wait_window(notif)
+    def on_tab_changed(self, event=None):
+        for step in self._pending_tabs.pop(self.nb.select(), ()):
+            step()
 
     def add_pastry(self):
         PastryForm(self, None)
@@ -224,18 +206,20 @@ class App(tk.Tk):
 
         from tkinter import messagebox
         if messagebox.askyesno("Confirm Delete", f"Delete pastry '{pastry_name}'?"):
-            from utils import db_connect
-            con = db_connect()
-            cur = con.cursor()
-            cur.execute("DELETE FROM pastries WHERE id=?", (pastry_id,))
-            con.commit()
-            con.close()
+            self.pos.delete_pastry(pastry_id)
             self.load_inventory()
+            self.refresh_catalog()
             messagebox.showinfo("Deleted", f"'{pastry_name}' was deleted successfully.")
 
     def logout(self):
+        self.receipt_queue.shutdown()
+        self.destroy()
+        LoginWindow(THUMBS)
+
+    def on_close(self):
+        # let queued receipts finish before the process exits
+        self.receipt_queue.shutdown()
         self.destroy()
-        LoginWindow()
 
     # ---------------- POS Tab ----------------
     def build_pos_tab(self):
@@ -253,13 +237,19 @@ class App(tk.Tk):
         self.pos_cat_var = tk.StringVar(value="All")
         cats = ["All"] + list(CATEGORY_ITEMS.keys())
         ttk.Label(filt, text="Category:").grid(row=0, column=0, padx=6, pady=6, sticky="w")
-        ttk.Combobox(filt, textvariable=self.pos_cat_var, values=cats, state="readonly", width=16).grid(row=0, column=1, padx=6, pady=6)
+        cat_cb = ttk.Combobox(filt, textvariable=self.pos_cat_var, values=cats, state="readonly", width=16)
+        cat_cb.grid(row=0, column=1, padx=6, pady=6)
+        cat_cb.bind("<<ComboboxSelected>>", lambda e: self.apply_search())
 
+        # As-you-type search: keystrokes within SEARCH_DEBOUNCE_MS coalesce
         self.pos_search_var = tk.StringVar()
+        self._search_after = None
         ttk.Label(filt, text="Search:").grid(row=0, column=2, padx=6)
-        ttk.Entry(filt, textvariable=self.pos_search_var, width=26).grid(row=0, column=3, padx=6)
-        ttk.Button(filt, text="Find", style="Soft.TButton", command=self.refresh_catalog).grid(row=0, column=4, padx=6)
-        ttk.Button(filt, text="Show All", style="Soft.TButton", command=lambda: [self.pos_cat_var.set("All"), self.pos_search_var.set(""), self.refresh_catalog()]).grid(row=0, column=5, padx=6)
+        search_entry = ttk.Entry(filt, textvariable=self.pos_search_var, width=26)
+        search_entry.grid(row=0, column=3, padx=6)
+        search_entry.bind("<Return>", lambda e: self.apply_search())
+        self.pos_search_var.trace_add("write", lambda *a: self.schedule_search())
+        ttk.Button(filt, text="Show All", style="Soft.TButton", command=lambda: [self.pos_cat_var.set("All"), self.pos_search_var.set(""), self.apply_search()]).grid(row=0, column=4, padx=6)
 
         # Catalog grid canvas (scrollable)
         self.catalog_canvas = tk.Canvas(left, bg=COL_BG, highlightthickness=0)
@@ -269,12 +259,24 @@ class App(tk.Tk):
         self.catalog_scroll.pack(side="right", fill="y")
         self.catalog_canvas.pack(side="left", fill="both", expand=True)
         self.catalog_canvas.create_window((0,0), window=self.catalog_frame, anchor="nw")
-        self.catalog_frame.bind("<Configure>", lambda e: self.catalog_canvas.configure(scrollregion=self.catalog_canvas.bbox("all")))
+        self.catalog_frame.bind("<Configure>", self.on_catalog_frame_configure)
+        self.catalog_grid = CatalogGrid(self.catalog_frame, POS_GRID_COLS, self.add_to_cart, load_product_image, LOW_STOCK_THRESHOLD)
 
         # Right: Cart
         cart_box = ttk.Labelframe(right, text="🧾 Cart")
         cart_box.pack(fill="y", padx=2, pady=2)
 
+        # Scanner quick entry: a scanner types the code and presses Enter
+        scan_row = ttk.Frame(cart_box)
+        scan_row.pack(fill="x", padx=6, pady=(6, 0))
+        ttk.Label(scan_row, text="Scan:").pack(side="left")
+        self.scan_var = tk.StringVar()
+        self.scan_entry = ttk.Entry(scan_row, textvariable=self.scan_var, width=24)
+        self.scan_entry.pack(side="left", padx=4)
+        self.scan_entry.bind("<Return>", self.on_scan)
+        self.scan_status_var = tk.StringVar()
+        ttk.Label(scan_row, textvariable=self.scan_status_var, font=("Segoe UI", 9)).pack(side="left", padx=4)
+
         cols = ("Item", "Price", "Qty", "Total")
         self.cart_tree = ttk.Treeview(cart_box, columns=cols, show="headings", height=8)
         for c in cols:
@@ -341,450 +343,246 @@ class App(tk.Tk):
         act.pack(fill="x", padx=6, pady=6)
         ttk.Button(act, text="Charge (Ctrl+P)", style="Accent.TButton", command=self.charge).pack(side="left", padx=4)
         ttk.Button(act, text="Print Last Receipt", style="Soft.TButton", command=self.print_last_receipt).pack(side="left", padx=4)
+        self.receipt_status_var = tk.StringVar()
+        ttk.Label(cart_box, textvariable=self.receipt_status_var, font=("Segoe UI", 9)).pack(anchor="w", padx=8, pady=(0, 6))
+
+        # Low stock: fed by checkout results, shown without blocking the till
+        self.stock_alerts = {}      # pastry_id -> name
+        self.alert_box = ttk.Labelframe(right, text="⚠️ Low Stock")
+        self.alert_tree = ttk.Treeview(self.alert_box, columns=("Item", "Qty"), show="headings", height=4)
+        self.alert_tree.heading("Item", text="Item")
+        self.alert_tree.heading("Qty", text="Qty")
+        self.alert_tree.column("Item", width=300)
+        self.alert_tree.column("Qty", width=60, anchor="center")
+        self.alert_tree.pack(fill="x", padx=6, pady=(6, 0))
+        ttk.Button(self.alert_box, text="Dismiss", style="Soft.TButton",
+                   command=self.dismiss_stock_alerts).pack(anchor="e", padx=6, pady=6)
 
         self.update_totals()
 
     def refresh_catalog(self):
-        # Clear current grid
-        for w in self.catalog_frame.winfo_children():
-            w.destroy()
-
-        # Query pastries
-        con = db_connect(); cur = con.cursor()
-        cur.execute("SELECT id, name, category, price, quantity FROM pastries ORDER BY name ASC")
-        rows = cur.fetchall()
-        con.close()
-
         # Apply filters
-        cat = self.pos_cat_var.get()
-        q = self.pos_search_var.get().strip().lower()
-        items = []
-        for pid, name, category, price, qty in rows:
-            if cat != "All" and category != cat:
-                continue
-            if q and q not in name.lower():
-                continue
-            items.append((pid, name, category, price, qty))
-
-        # Build cards
-        r = c = 0
-        self._card_images_keep = []
-        for pid, name, category, price, qty in items:
-            card = ttk.Frame(self.catalog_frame, padding=6)
-            card.grid(row=r, column=c, sticky="nsew", padx=6, pady=6)
-            # image
-            img = load_product_image(name)
-            self._card_images_keep.append(img)
-            img_lbl = ttk.Label(card, image=img)
-            img_lbl.pack()
-            # name + price
-            name_lbl = ttk.Label(card, text=name, font=("Segoe UI", 10, "bold"))
-            name_lbl.pack()
-            price_lbl = ttk.Label(card, text=money(price))
-            price_lbl.pack()
-            # stock badge (improved visibility)
-            if qty < LOW_STOCK_THRESHOLD:
-                ttk.Label(card, text=f"⚠️ Low stock: {qty}", foreground="#8a1c1c", font=("Segoe UI", 9, "bold")).pack()
+        rows = self.pos.catalog.rows()
+        items = self.pos.products(self.pos_cat_var.get(), self.pos_search_var.get())
+
+        # Large catalogs only materialize the cards in the viewport
+        virtual = len(rows) >= POS_VIRTUAL_GRID_MIN
+        if virtual != isinstance(self.catalog_grid, VirtualCatalogGrid):
+            self.catalog_grid.clear()
+            if virtual:
+                self.catalog_grid = VirtualCatalogGrid(self.catalog_canvas, self.catalog_scroll, POS_GRID_COLS,
+                                                       self.add_to_cart, load_product_image, LOW_STOCK_THRESHOLD)
             else:
-                ttk.Label(card, text=f"In stock: {qty}", foreground="#2c7a2c", font=("Segoe UI", 9)).pack()
-            # add buttons
-            bt_frame = ttk.Frame(card)
-            bt_frame.pack(pady=4)
-            ttk.Button(bt_frame, text="Add 1", style="Soft.TButton", command=lambda _id=pid: self.add_to_cart(_id, 1)).pack(side="left", padx=2)
-            ttk.Button(bt_frame, text="Add 5", style="Soft.TButton", command=lambda _id=pid: self.add_to_cart(_id, 5)).pack(side="left", padx=2)
-
-            c += 1
-            if c >= POS_GRID_COLS:
-                c = 0
-                r += 1
+                self.catalog_grid = CatalogGrid(self.catalog_frame, POS_GRID_COLS, self.add_to_cart,
+                                                load_product_image, LOW_STOCK_THRESHOLD)
+            self.catalog_canvas.yview_moveto(0)
+
+        # Update cards in place; only unseen pastries get new widgets
+        self.catalog_grid.show(items, known_ids={p.id for p in rows})
+
+    def schedule_search(self):
+        if self._search_after is not None:
+            self.after_cancel(self._search_after)
+        self._search_after = self.after(SEARCH_DEBOUNCE_MS, self.apply_search)
+
+    def apply_search(self):
+        """Filter the catalog through the search index; cards are only shown
+        or hidden (refresh_catalog handles data changes)."""
+        if self._search_after is not None:
+            self.after_cancel(self._search_after)
+            self._search_after = None
+        items = self.pos.products(self.pos_cat_var.get(), self.pos_search_var.get())
+        self.catalog_grid.filter(items)
+        self.catalog_canvas.yview_moveto(0)
+
+    def reload_catalog(self):
+        """Re-read stock from the database (other tills may have sold items)."""
+        self.pos.reload_catalog()
+        self.refresh_catalog()
+        self.load_inventory()
+
+    def on_catalog_frame_configure(self, event=None):
+        # the virtualized grid owns the scroll region itself
+        if not isinstance(self.catalog_grid, VirtualCatalogGrid):
+            self.catalog_canvas.configure(scrollregion=self.catalog_canvas.bbox("all"))
 
     def add_to_cart(self, pastry_id: int, qty: int):
-        # Fetch product
-        con = db_connect(); cur = con.cursor()
-        cur.execute("SELECT name, price, quantity FROM pastries WHERE id=?", (pastry_id,))
-        row = cur.fetchone()
-        con.close()
-        if not row:
+        try:
+            line = self.pos.add_to_cart(pastry_id, qty)
+        except PosError as e:
+            messagebox.showwarning(e.title, str(e))
             return
-        name, price, stock = row
-
-        # check if already in cart
-        found = None
-        for iid in self.cart_tree.get_children():
-            vals = self.cart_tree.item(iid, "values")
-            if vals and vals[0] == name:
-                found = iid; break
-        if found:
-            cur_qty = int(self.cart_tree.item(found, "values")[2])
-            new_qty = cur_qty + qty
-            if new_qty > MAX_QTY_PER_PRODUCT:
-                messagebox.showwarning("Quantity limit", f"Cannot add more than {MAX_QTY_PER_PRODUCT} units per product.")
-                return
-            if new_qty > stock:
-                messagebox.showwarning("Stock", f"Not enough stock for {name}. Available: {stock}.")
-                return
-            self.cart_tree.item(found, values=(name, f"{price:.2f}", new_qty, f"{price*new_qty:.2f}"))
-        else:
-            if qty > MAX_QTY_PER_PRODUCT:
-                messagebox.showwarning("Quantity limit", f"Cannot add more than {MAX_QTY_PER_PRODUCT} units per product.")
-                return
-            if qty > stock:
-                messagebox.showwarning("Stock", f"Not enough stock for {name}. Available: {stock}.")
-                return
-            self.cart_tree.insert("", "end", values=(name, f"{price:.2f}", qty, f"{price*qty:.2f}"), tags=(str(pastry_id),))
+        if line is None:
+            return
+        self.render_cart_line(line.pastry_id)
         self.update_totals()
 
-    def cart_inc(self):
+    def on_scan(self, event=None):
+        """Barcode entry: one dict lookup, then only the affected cart row and
+        the totals are redrawn, so back-to-back scans never wait on the UI."""
+        code = self.scan_var.get()
+        self.scan_var.set("")
+        try:
+            line = self.pos.scan(code)
+        except PosError as e:
+            # no modal dialog: the scanner keeps typing into this field
+            self.scan_status_var.set(str(e))
+            self.bell()
+            return "break"
+        self.render_cart_line(line.pastry_id)
+        self.cart_tree.see(str(line.pastry_id))
+        self.update_totals()
+        self.scan_status_var.set(f"{line.name} × {line.qty}")
+        return "break"
+
+    def selected_cart_id(self):
         sel = self.cart_tree.selection()
-        if not sel: return
-        iid = sel[0]
-        name, price_s, qty_s, total_s = self.cart_tree.item(iid, "values")
-        price = float(price_s)
-        qty = int(qty_s) + 1
-        if qty > MAX_QTY_PER_PRODUCT:
-            messagebox.showwarning("Quantity limit", f"Cannot have more than {MAX_QTY_PER_PRODUCT} units per product.")
+        return int(sel[0]) if sel else None
+
+    def render_cart_line(self, pastry_id):
+        """Sync one Treeview row (iid = pastry id) with the cart model."""
+        iid = str(pastry_id)
+        line = self.pos.cart.get(pastry_id)
+        if line is None:
+            if self.cart_tree.exists(iid):
+                self.cart_tree.delete(iid)
             return
-        # stock check
-        con = db_connect(); cur = con.cursor()
-        cur.execute("SELECT quantity FROM pastries WHERE name=?", (name,))
-        stock = cur.fetchone()[0]
-        con.close()
-        if qty > stock:
-            messagebox.showwarning("Stock", f"Not enough stock for {name}. Available: {stock}.")
+        values = (line.name, f"{from_cents(line.unit_cents):.2f}", line.qty, f"{from_cents(line.line_cents):.2f}")
+        if self.cart_tree.exists(iid):
+            self.cart_tree.item(iid, values=values)
+        else:
+            self.cart_tree.insert("", "end", iid=iid, values=values)
+
+    def cart_inc(self):
+        pid = self.selected_cart_id()
+        if pid is None: return
+        try:
+            self.pos.set_cart_qty(pid, self.pos.cart.qty_of(pid) + 1)
+        except PosError as e:
+            messagebox.showwarning(e.title, str(e))
             return
-        self.cart_tree.item(iid, values=(name, f"{price:.2f}", qty, f"{price*qty:.2f}"))
+        self.render_cart_line(pid)
         self.update_totals()
 
     def cart_dec(self):
-        sel = self.cart_tree.selection()
-        if not sel: return
-        iid = sel[0]
-        name, price_s, qty_s, total_s = self.cart_tree.item(iid, "values")
-        price = float(price_s)
-        qty = int(qty_s) - 1
-        if qty <= 0:
-            self.cart_tree.delete(iid)
-        else:
-            self.cart_tree.item(iid, values=(name, f"{price:.2f}", qty, f"{price*qty:.2f}"))
+        pid = self.selected_cart_id()
+        if pid is None: return
+        self.pos.set_cart_qty(pid, self.pos.cart.qty_of(pid) - 1)
+        self.render_cart_line(pid)
         self.update_totals()
 
     def cart_remove(self):
-        sel = self.cart_tree.selection()
-        if not sel: return
-        self.cart_tree.delete(sel[0])
+        pid = self.selected_cart_id()
+        if pid is None: return
+        self.pos.remove_from_cart(pid)
+        self.render_cart_line(pid)
         self.update_totals()
 
     def clear_cart(self):
+        self.pos.clear_cart()
         self.cart_tree.delete(*self.cart_tree.get_children())
         self.discount_type_var.set("None")
         self.tax_var.set(3.0)
         self.tender_var.set(0.0)
         self.change_var.set(0.0)
         self.customer_var.set("")
+        self.scan_status_var.set("")
         self.update_totals()
+        self.scan_entry.focus_set()
 
-    def update_totals(self):
-        subtotal = 0.0
-        for iid in self.cart_tree.get_children():
-            vals = self.cart_tree.item(iid, "values")
-            subtotal += float(vals[1]) * int(vals[2])
-
-        # Discount rules
-        discount_type = self.discount_type_var.get()
-        if discount_type in ("Senior", "PWD"):
-            discount = subtotal * 0.20   # 20% discount
-        else:
-            discount = 0.0
-
-        self.discount_var.set(discount)
-
-        # Always 3% tax
-        tax_pct = 3.0
+    def tendered_cents(self):
+        try:
+            return to_cents(self.tender_var.get() or 0)
+        except Exception:
+            return 0
 
-        taxed = max(0.0, (subtotal - discount)) * (tax_pct/100.0)
-        total = max(0.0, subtotal - discount + taxed)
-        tender = float(self.tender_var.get() or 0.0)
-        change = max(0.0, tender - total)
-        self.subtotal_var.set(subtotal)
-        self.total_var.set(total)
-        self.change_var.set(change)
-        self.discount_var.set(discount)
+    def update_totals(self):
+        # Discount rules live in the cart model (Senior/PWD 20%, always 3% tax)
+        self.pos.set_discount(self.discount_type_var.get())
+        t = self.pos.totals(self.tendered_cents())
+        self.subtotal_var.set(t.subtotal)
+        self.total_var.set(t.total)
+        self.change_var.set(t.change)
+        self.discount_var.set(t.discount)
         # Update labels by widget name
-        self.totals_frame.nametowidget("subtotal_lbl").configure(text=money(subtotal))
-        self.totals_frame.nametowidget("total_lbl").configure(text=money(total))
-        self.totals_frame.nametowidget("change_lbl").configure(text=money(change))
-
-    def next_receipt_no(self, cur):
-        cur.execute("SELECT COALESCE(MAX(receipt_no), 1000) FROM receipts")
-        return (cur.fetchone()[0] or 1000) + 1
+        self.totals_frame.nametowidget("subtotal_lbl").configure(text=money(t.subtotal))
+        self.totals_frame.nametowidget("total_lbl").configure(text=money(t.total))
+        self.totals_frame.nametowidget("change_lbl").configure(text=money(t.change))
 
     def charge(self):
-        # Gather cart lines
-        lines = []
-        for iid in self.cart_tree.get_children():
-            name, price_s, qty_s, total_s = self.cart_tree.item(iid, "values")
-            qty = int(qty_s)
-            price = float(price_s)
-            lines.append((name, price, qty))
-        if not lines:
-            messagebox.showwarning("Cart", "Cart is empty.")
-            return
-        subtotal = self.subtotal_var.get()
-        discount = float(self.discount_var.get() or 0.0)
-        tax = float(self.tax_var.get() or 0.0)
-        total = self.total_var.get()
-        tender = float(self.tender_var.get() or 0.0)
-        if tender + 1e-6 < total:
-            messagebox.showwarning("Payment", "Tendered amount is less than total.")
-            return
-        change = tender - total
-
-        con = db_connect(); cur = con.cursor()
+        self.update_totals()
+        tender_cents = self.tendered_cents()
+        change = self.pos.totals(tender_cents).change
         try:
-            # Map item names to pastry IDs and stock checks
-            items = []
-            for name, price, qty in lines:
-                cur.execute("SELECT id, quantity FROM pastries WHERE name=?", (name,))
-                row = cur.fetchone()
-                if not row:
-                    raise Exception(f"Item not found: {name}")
-                pid, stock = row
-                if qty > stock:
-                    raise Exception(f"Not enough stock for {name}. Available: {stock}.")
-                items.append((pid, name, price, qty))
-
-            # Create receipt
-            receipt_no = self.next_receipt_no(cur)
-            cur.execute(
-                """
-                INSERT INTO receipts (receipt_no, created_at, staff_username, customer_name,
-                                      subtotal, discount, tax, total, tendered, change)
-                VALUES (?,?,?,?,?,?,?,?,?,?)
-                """,
-                (
-                    receipt_no,
-                    now_iso(),
-                    self.username,
-                    self.customer_var.get().strip() or None,
-                    subtotal,
-                    discount,
-                    tax,
-                    total,
-                    tender,
-                    change,
-                ),
-            )
-            rid = cur.lastrowid
-
-            # Create items + update stock + legacy sales rows
-            for pid, name, price, qty in items:
-                line_total = price * qty
-                cur.execute(
-                    "INSERT INTO receipt_items (receipt_id, pastry_id, name, unit_price, qty, line_total) VALUES (?,?,?,?,?,?)",
-                    (rid, pid, name, price, qty, line_total),
-                )
-                cur.execute(
-                    "UPDATE pastries SET quantity = quantity - ?, last_updated=? WHERE id=?",
-                    (qty, now_iso(), pid),
-                )
-                # legacy
-                cur.execute(
-                    "INSERT INTO sales (pastry_id, qty, unit_price, total, sale_time, staff_username) VALUES (?,?,?,?,?,?)",
-                    (pid, qty, price, line_total, now_iso(), self.username),
-                )
-
-            con.commit()
-        except Exception as e:
-            con.rollback()
-            con.close()
+            res = self.pos.checkout(from_cents(tender_cents), self.customer_var.get())
+        except PosError as e:
+            messagebox.showwarning(e.title, str(e))
+            return
+        except (CheckoutError, sqlite3.Error) as e:
+            # another till may have sold stock this catalog has not seen yet
+            self.reload_catalog()
             messagebox.showerror("Charge failed", str(e))
             return
-        con.close()
+        receipt_no = res.receipt_no
 
-        self.last_receipt_no = receipt_no
         self.load_inventory()
         self.refresh_catalog()
         self.refresh_reports()
-                # Check low stock on login
-        if self.role in ("Admin", "Staff"):
-            self.after(1000, self.show_low_stock_notification)
+        self.show_stock_alerts(res.low_stock)
+        self.save_receipt_to_pdf(receipt_no)
         self.clear_cart()
         messagebox.showinfo("Payment complete", f"Receipt #{receipt_no}\nChange: {money(change)}")
 
-        self.save_receipt_to_pdf(receipt_no)
+    def show_stock_alerts(self, items):
+        """Add (pastry_id, name, quantity) rows to the low-stock panel."""
+        for pid, name, qty in items:
+            self.stock_alerts[pid] = name
+        self.render_stock_alerts()
+
+    def render_stock_alerts(self):
+        # quantities come from the catalog, so restocked items drop out
+        catalog = self.pos.catalog
+        for pid in list(self.stock_alerts):
+            p = catalog.get(pid)
+            if p is None or p.quantity >= LOW_STOCK_THRESHOLD:
+                del self.stock_alerts[pid]
+        self.alert_tree.delete(*self.alert_tree.get_children())
+        for pid, name in self.stock_alerts.items():
+            self.alert_tree.insert("", "end", values=(name, catalog.get(pid).quantity))
+        if self.stock_alerts:
+            self.alert_box.pack(fill="x", padx=2, pady=2)
+        else:
+            self.alert_box.pack_forget()
+
+    def dismiss_stock_alerts(self):
+        self.stock_alerts.clear()
+        self.render_stock_alerts()
 
     def print_last_receipt(self):
-        if not hasattr(self, "last_receipt_no"):
+        if self.pos.last_receipt_no is None:
             messagebox.showinfo("Receipt", "No receipt yet.")
             return
-        self.save_receipt_to_pdf(self.last_receipt_no)
+        self.save_receipt_to_pdf(self.pos.last_receipt_no)
 
     def save_receipt_to_pdf(self, receipt_no: int):
-        if not REPORTLAB_AVAILABLE:
-            self.save_receipt_to_txt(receipt_no)
-            messagebox.showwarning("Dependency missing", "reportlab is required to create PDF receipts. Saved as TXT instead.")
-            return
-
-        con = db_connect(); cur = con.cursor()
-        cur.execute("SELECT id, created_at, staff_username, customer_name, subtotal, discount, tax, total, tendered, change FROM receipts WHERE receipt_no=?", (receipt_no,))
-        r = cur.fetchone()
-        if not r:
-            con.close(); return
-        rid, created_at, staff, cust, subtotal, disc, tax, total, tender, change = r
-        cur.execute("SELECT name, unit_price, qty, line_total FROM receipt_items WHERE receipt_id=?", (rid,))
-        items = cur.fetchall()
-        con.close()
-
-        # --- PDF setup ---
-        from reportlab.lib.pagesizes import A5
-        filename = os.path.join(RECEIPTS_DIR, f"Receipt_{receipt_no}.pdf")
-        c = rl_canvas.Canvas(filename, pagesize=A5)
-        w, h = A5
-
-        # --- Background image ---
-        bg_fp = os.path.join(BASE_DIR, "background.jpg")
-        if os.path.exists(bg_fp):
-            try:
-                bg_img = rl_utils.ImageReader(bg_fp)
-                iw, ih = bg_img.getSize()
-                aspect = ih / iw
-                # Fill the entire A5 page
-                c.drawImage(bg_img, 0, 0, width=w, height=h, preserveAspectRatio=False, mask='auto')
-            except Exception as e:
-                print("Background image error:", e)
-        else:
-            # fallback color if background missing
-            c.setFillColorRGB(1, 0.9, 0.95)
-            c.rect(0, 0, w, h, fill=True, stroke=False)
-
-
-        # Watermark logo in center
-        logo_fp = os.path.join(BASE_DIR, "logo.jpg")
-        if os.path.exists(logo_fp):
-            try:
-                img = rl_utils.ImageReader(logo_fp)
-                iw, ih = img.getSize()
-                aspect = ih / iw
-                size = 90 * mm
-                c.drawImage(img, (w - size)/2, (h - size)/2, width=size, height=size*aspect, mask='auto', preserveAspectRatio=True, anchor='c')
-                c.setFillAlpha(0.15)
-            except Exception as e:
-                print("Watermark error:", e)
-        c.setFillAlpha(1)
-
-        # Header
-        y = h - 30
-        c.setFont("Helvetica-Bold", 14)
-        c.setFillColorRGB(0.4, 0.1, 0.2)
-        c.drawCentredString(w/2, y, "MambaMunchies Bakery")
-        y -= 18
-        c.setFont("Helvetica", 9)
-        c.setFillColor(rl_colors.black)
-        c.drawCentredString(w/2, y, "Official Sales Receipt")
-        y -= 30
-
-        # Table
-        data = [["Item", "Unit", "Qty", "Total"]] + [[n, money(p), str(q), money(t)] for n, p, q, t in items]
-        tbl = Table(data, colWidths=[75*mm, 20*mm, 15*mm, 25*mm])
-        tbl.setStyle(TableStyle([
-            ("BACKGROUND", (0,0), (-1,0), rl_colors.lightpink),
-            ("TEXTCOLOR", (0,0), (-1,0), rl_colors.black),
-            ("GRID", (0,0), (-1,-1), 0.25, rl_colors.grey),
-            ("FONT", (0,0), (-1,0), "Helvetica-Bold"),
-            ("FONT", (0,1), (-1,-1), "Helvetica"),
-            ("ALIGN", (1,1), (-1,-1), "RIGHT"),
-        ]))
-        table_h = len(data) * 12
-        tbl.wrapOn(c, w, h)
-        tbl.drawOn(c, 20, y - table_h)
-        y -= table_h + 20
-
-        # Details
-        c.setFont("Helvetica", 9)
-        c.drawString(25, y, f"Receipt #: {receipt_no}")
-        c.drawString(25, y - 12, f"Date: {created_at}")
-        c.drawString(25, y - 24, f"Cashier: {staff}")
-        if cust:
-            c.drawString(25, y - 36, f"Customer: {cust}")
-        y -= 55
-
-        # Totals section
-        c.setFont("Helvetica-Bold", 10)
-        lines = [
-            ("Subtotal", subtotal),
-            ("Discount", disc),
-            ("Tax", tax),
-            ("Total", total),
-            ("Tendered", tender),
-            ("Change", change)
-        ]
-        for label, val in lines:
-            c.drawRightString(w - 30, y, f"{label}: {money(val)}")
-            y -= 12
-
-        # --- Build detailed text for QR ---
-        qr_text = [
-            "MambaMunchies Bakery",
-            f"Receipt #{receipt_no}",
-            f"Date: {created_at}",
-            f"Cashier: {staff}",
-        ]
-        if cust:
-            qr_text.append(f"Customer: {cust}")
-        qr_text.append("\nItems:")
-        for n, p, q, t in items:
-            qr_text.append(f"- {n} ({q} × {money(p)}) = {money(t)}")
-        qr_text.append("")
-        qr_text.append(f"Subtotal: {money(subtotal)}")
-        qr_text.append(f"Discount: {money(disc)}")
-        qr_text.append(f"Tax: {money(tax)}")
-        qr_text.append(f"Total: {money(total)}")
-        qr_text.append(f"Tendered: {money(tender)}")
-        qr_text.append(f"Change: {money(change)}")
-        qr_text.append("")
-        qr_text.append("Thank you for shopping at MambaMunchies 💕")
-
-        qr_data = "\n".join(qr_text)
-
-        # Generate QR code
-        try:
-            qr = qrcode.QRCode(
-                version=None,
-                box_size=2,  # bigger modules for higher density
-                border=2
-            )
-            qr.add_data(qr_data)
-            qr.make(fit=True)
-            qr_img = qr.make_image(fill_color="black", back_color="white").convert("RGB")
-
-            buf = io.BytesIO()
-            qr_img.save(buf, format="PNG")
-            buf.seek(0)
-
-            qr_size = 150  # increased size in points (was 40)
-            c.drawImage(ImageReader(buf), w - qr_size - 25, 25, width=qr_size, height=qr_size)
-            c.setFont("Helvetica", 8)
-            c.drawString(w - qr_size - 10, 20, "📷 Scan to view receipt")
-        except Exception as e:
-            print("QR code error:", e)
-
-
-        # Footer
-        c.setFont("Helvetica-Oblique", 8)
-        c.setFillColorRGB(0.3, 0.1, 0.1)
-        c.drawCentredString(w/2, 15, "Thank you for shopping at MambaMunchies! 💕")
-        c.showPage()
-        c.save()
-
-        # Auto-open file
-        try:
-            if os.name == 'nt':
-                os.startfile(filename)
-            else:
-                subprocess.Popen(['xdg-open', filename])
-        except Exception:
-            pass
-        messagebox.showinfo("Receipt Saved", f"Receipt saved to {filename}")
+        """Queue a receipt for background rendering; see poll_receipts."""
+        self.receipt_queue.submit(receipt_no)
+        self.receipt_status_var.set(f"Rendering receipt #{receipt_no}… ({self.receipt_queue.backlog} queued)")
+
+    def poll_receipts(self):
+        for res in self.receipt_queue.poll():
+            if res.error:
+                self.receipt_status_var.set(f"Receipt #{res.receipt_no} failed")
+                messagebox.showerror("Receipt", f"Could not save receipt #{res.receipt_no}:\n{res.error}")
+                continue
+            backlog = self.receipt_queue.backlog
+            self.receipt_status_var.set(f"Receipt #{res.receipt_no} saved ({res.seconds:.1f}s)"
+                                        + (f", {backlog} queued" if backlog else ""))
+            if not res.filename.endswith(".pdf"):
+                messagebox.showwarning("Dependency missing", "reportlab is required to create PDF receipts. Saved as TXT instead.")
+            if res.open_after:
+                open_file(res.filename)
+        self.after(RECEIPT_POLL_MS, self.poll_receipts)
 
     # ---------------- Inventory ----------------
     def build_inventory_tab(self):
@@ -794,8 +592,11 @@ class App(tk.Tk):
         ttk.Button(top, text="Add Pastry", style="Accent.TButton", command=self.add_pastry).pack(side="left", padx=3)
         ttk.Button(top, text="Edit", style="Soft.TButton", command=self.edit_pastry).pack(side="left", padx=3)
         ttk.Button(top, text="Delete", style="Soft.TButton", command=self.delete_pastry).pack(side="left", padx=3)
+        ttk.Button(top, text="Import CSV", style="Soft.TButton", command=self.import_inventory_csv).pack(side="left", padx=3)
+        ttk.Button(top, text="Restock CSV", style="Soft.TButton",
+                   command=lambda: self.import_inventory_csv(restock=True)).pack(side="left", padx=3)
 
-        cols = ("ID","Name","Category","Price","Quantity","Last Updated")
+        cols = ("ID","Name","Category","Price","Quantity","Last Updated","SKU")
         self.inv_tree = ttk.Treeview(frm, columns=cols, show="headings")
         for c in cols:
             self.inv_tree.heading(c, text=c)
@@ -805,13 +606,47 @@ class App(tk.Tk):
         self.inv_tree.pack(fill="both", expand=True, padx=6, pady=6)
 
     def load_inventory(self):
-        for i in getattr(self,"inv_tree",[]).get_children():
-            self.inv_tree.delete(i)
-        con = db_connect(); cur = con.cursor()
-        cur.execute("SELECT id,name,category,price,quantity,last_updated FROM pastries ORDER BY name")
-        for row in cur.fetchall():
-            self.inv_tree.insert("", "end", values=row)
-        con.close()
+        if hasattr(self, "inv_tree"):
+            self.inv_tree.delete(*self.inv_tree.get_children())
+            for row in self.pos.inventory_rows():
+                self.inv_tree.insert("", "end", values=row)
+        self.render_stock_alerts()
+
+    def import_inventory_csv(self, restock=False):
+        """Validate a name/category/price/quantity CSV, then upsert it in one go."""
+        title = "Restock CSV" if restock else "Import CSV"
+        path = filedialog.askopenfilename(parent=self, title=title,
+                                          filetypes=[("CSV", "*.csv"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as fh:
+                result = validate_inventory_csv(fh)
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            messagebox.showerror(title, str(e))
+            return
+        if not result.rows:
+            messagebox.showwarning(title, "No valid rows to import.\n\n" + _import_errors_text(result))
+            return
+        action = "Add these quantities to stock" if restock else "Import (replace quantities)"
+        prompt = f"{len(result.rows)} valid row(s), {len(result.errors)} rejected.\n\n{action}?"
+        if result.errors:
+            prompt += "\n\n" + _import_errors_text(result)
+        if not messagebox.askyesno(title, prompt):
+            return
+        checked = len(result.errors)
+        try:
+            self.pos.apply_inventory(result, restock)
+        except sqlite3.Error as e:
+            messagebox.showerror(title, f"Nothing was saved:\n{e}")
+            return
+        self.load_inventory()
+        self.refresh_catalog()
+        summary = result.summary()
+        if len(result.errors) > checked:
+            # barcodes taken by other pastries only show up against the database
+            summary += "\n\n" + _import_errors_text(result)
+        messagebox.showinfo(title, summary)
 
     # ---------------- Reports Tab ----------------
     def build_reports_tab(self):
@@ -833,12 +668,28 @@ class App(tk.Tk):
         self.rep_to_entry.pack(side="left", padx=3)
         ttk.Button(top, text="Filter", style="Accent.TButton", command=self.refresh_reports).pack(side="left", padx=6)
         ttk.Button(top, text="Export to PDF", command=self.export_reports_pdf).pack(side="left", padx=6)
-        self.rep_tree = ttk.Treeview(frm, columns=("Date","Receipt#","Staff","Customer","Total"), show="headings")
+        ttk.Button(top, text="Batch Receipts", command=self.export_receipts_batch).pack(side="left", padx=6)
+        ttk.Button(top, text="Export Lines (CSV/JSONL)", command=self.export_line_items).pack(side="left", padx=6)
+        self.reports_status_var = tk.StringVar()
+        ttk.Label(top, textvariable=self.reports_status_var).pack(side="left", padx=6)
+        self._bg_jobs = {}
+        self.rep_totals_var = tk.StringVar()
+        ttk.Label(frm, textvariable=self.rep_totals_var, font=("Segoe UI", 10, "bold")).pack(anchor="w", padx=8)
+        body = ttk.Frame(frm)
+        body.pack(fill="both", expand=True, padx=6, pady=6)
+        self.rep_tree = ttk.Treeview(body, columns=("Date","Receipt#","Staff","Customer","Total"), show="headings")
         for c in ("Date","Receipt#","Staff","Customer","Total"):
             self.rep_tree.heading(c,text=c)
         self.rep_tree.column("Date", width=160)
         self.rep_tree.column("Total", anchor="e")
-        self.rep_tree.pack(fill="both", expand=True, padx=6, pady=6)
+        self.rep_scroll = ttk.Scrollbar(body, orient="vertical", command=self.rep_tree.yview)
+        self.rep_tree.configure(yscrollcommand=self.on_reports_scroll)
+        self.rep_scroll.pack(side="right", fill="y")
+        self.rep_tree.pack(side="left", fill="both", expand=True)
+        self._rep_range = None
+        self._rep_cursor = None
+        self._rep_more = False
+        self._rep_page_pending = False
         # Initialize date range based on default report type
         self.set_report_date_range()
 
@@ -861,58 +712,52 @@ class App(tk.Tk):
 
     def refresh_reports(self):
         if not hasattr(self,"rep_tree"): return
-        for i in self.rep_tree.get_children():
-            self.rep_tree.delete(i)
-        con = db_connect(); cur = con.cursor()
-        cur.execute("SELECT created_at,receipt_no,staff_username,COALESCE(customer_name,''),total FROM receipts WHERE date(created_at) BETWEEN ? AND ? ORDER BY created_at DESC",(self.rep_from.get(),self.rep_to.get()))
-        for row in cur.fetchall():
+        self.rep_tree.delete(*self.rep_tree.get_children())
+        self._rep_cursor = None
+        self._rep_range = (self.rep_from.get(), self.rep_to.get())
+        try:
+            # totals come from the daily rollup, not from the rows on screen
+            count, total = self.pos.receipt_totals(*self._rep_range)
+        except ValueError:
+            self._rep_range = None
+            self.rep_totals_var.set("")
+            messagebox.showwarning("Reports", "Dates must be in YYYY-MM-DD format.")
+            return
+        self.rep_totals_var.set(f"{count:,} receipts • {money(total)}")
+        self._rep_more = True
+        self.load_reports_page()
+
+    def load_reports_page(self):
+        """Append the next keyset page of receipts to rep_tree."""
+        self._rep_page_pending = False
+        if not self._rep_range or not self._rep_more:
+            return
+        rows = self.pos.receipts_page(*self._rep_range, after=self._rep_cursor, limit=REPORT_PAGE_SIZE)
+        for row in rows:
             self.rep_tree.insert("","end",values=row)
-        con.close()
-
-    def generate_report_data(self):
-        """Fetch detailed sales data joined with pastry info for the report."""
-        con = db_connect()
-        cur = con.cursor()
-        cur.execute("""
-            SELECT 
-                p.name AS item_name,
-                s.unit_price,
-                s.qty,
-                s.total,
-                s.sale_time,
-                s.staff_username
-            FROM sales s
-            JOIN pastries p ON s.pastry_id = p.id
-            ORDER BY s.sale_time DESC
-        """)
-        data = cur.fetchall()
-        con.close()
-        return data
-
-    def generate_summary(self, report_data):
-        """Compute totals and most popular product from fetched data."""
-        if not report_data:
-            return {
-                "total_sales": 0.0,
-                "total_items": 0,
-                "most_popular": "N/A"
-            }
-
-        total_sales = sum(row[3] for row in report_data)
-        total_items = sum(row[2] for row in report_data)
-
-        # Most popular product by total quantity sold
-        from collections import Counter
-        counter = Counter()
-        for item_name, unit_price, qty, total, sale_time, staff in report_data:
-            counter[item_name] += qty
-        most_popular = counter.most_common(1)[0][0] if counter else "N/A"
-
-        return {
-            "total_sales": total_sales,
-            "total_items": total_items,
-            "most_popular": most_popular
-        }
+        if rows:
+            self._rep_cursor = (rows[-1][0], rows[-1][1])
+        self._rep_more = len(rows) == REPORT_PAGE_SIZE
+
+    def on_reports_scroll(self, first, last):
+        self.rep_scroll.set(first, last)
+        # fetch more once the view nears the bottom of what is loaded
+        if self._rep_more and not self._rep_page_pending and float(last) > 0.9:
+            self._rep_page_pending = True
+            self.after_idle(self.load_reports_page)
+
+    def generate_report_data(self, date_from=None, date_to=None):
+        """Yield detailed sales rows (newest first) for the report, optionally
+        limited to a YYYY-MM-DD range."""
+        return self.pos.sales_rows(date_from, date_to)
+
+    def generate_summary(self, report_data=None, date_from=None, date_to=None):
+        """Compute totals and most popular product.
+
+        Without ``report_data`` the figures come straight from the daily
+        rollup in SQL; given rows (any iterable) they are reduced in one pass.
+        """
+        return self.pos.sales_summary(report_data, date_from, date_to)
 
     def export_reports_pdf(self):
         if not REPORTLAB_AVAILABLE:
@@ -922,62 +767,31 @@ class App(tk.Tk):
         # Get date filters
         date_from = self.rep_from.get()
         date_to = self.rep_to.get()
-
-        con = db_connect()
-        cur = con.cursor()
-
-        # Fetch filtered data (only items sold within date range)
-        cur.execute("""
-            SELECT ri.name, SUM(ri.qty) AS total_sold, SUM(ri.line_total) AS total_revenue
-            FROM receipt_items ri
-            JOIN receipts r ON ri.receipt_id = r.id
-            WHERE DATE(r.created_at) BETWEEN ? AND ?
-            GROUP BY ri.name
-            ORDER BY total_revenue DESC
-        """, (date_from, date_to))
-        rows = cur.fetchall()
+        try:
+            # only items sold within the date range
+            rows, total_receipts = self.pos.item_sales(date_from, date_to)
+        except ValueError:
+            messagebox.showwarning("Reports", "Dates must be in YYYY-MM-DD format.")
+            return
 
         # --- Analytics ---
         total_sales = sum(r[2] for r in rows) if rows else 0
         total_items = sum(r[1] for r in rows) if rows else 0
         top_product = rows[0][0] if rows else "N/A"
 
-        cur.execute("SELECT COUNT(*) FROM receipts WHERE DATE(created_at) BETWEEN ? AND ?", (date_from, date_to))
-        total_receipts = cur.fetchone()[0]
-
-        con.close()
-
         # --- PDF setup ---
         from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import mm
+        from reportlab.pdfgen import canvas as rl_canvas
+        from reportlab.platypus import Table, TableStyle
+        from reportlab.lib import colors as rl_colors
+        os.makedirs(EXPORTS_DIR, exist_ok=True)
         filename = os.path.join(EXPORTS_DIR, f"Sales_Report_{date_from}_to_{date_to}.pdf")
         c = rl_canvas.Canvas(filename, pagesize=A4)
         w, h = A4
 
-        # --- Background image ---
-        bg_fp = os.path.join(BASE_DIR, "background.jpg")
-        if os.path.exists(bg_fp):
-            try:
-                bg_img = rl_utils.ImageReader(bg_fp)
-                c.drawImage(bg_img, 0, 0, width=w, height=h, preserveAspectRatio=False, mask='auto')
-            except Exception as e:
-                print("Background image error:", e)
-        else:
-            c.setFillColorRGB(1, 0.9, 0.95)
-            c.rect(0, 0, w, h, fill=True, stroke=False)
-
-        # --- Watermark logo ---
-        logo_fp = os.path.join(BASE_DIR, "logo.jpg")
-        if os.path.exists(logo_fp):
-            try:
-                img = rl_utils.ImageReader(logo_fp)
-                iw, ih = img.getSize()
-                aspect = ih / iw
-                size = 120 * mm
-                c.drawImage(img, (w - size)/2, (h - size)/2, width=size, height=size*aspect, mask='auto')
-                c.setFillAlpha(0.15)
-            except Exception as e:
-                print("Watermark error:", e)
-        c.setFillAlpha(1)
+        # --- Background + watermark logo (cached composite) ---
+        draw_page_background(c, A4, REPORT_LOGO_MM, BASE_DIR)
 
         # --- Header ---
         y = h - 40
@@ -1050,6 +864,113 @@ class App(tk.Tk):
         except Exception:
             subprocess.Popen(["open", filename])
 
+    def run_in_background(self, title, work, on_progress, on_done):
+        """Run ``work(progress)`` on a thread; progress/results come back
+        through after() so the callbacks may touch widgets."""
+        job = self._bg_jobs.get(title)
+        if job and job.is_alive():
+            messagebox.showinfo(title, f"{title} is already running.")
+            return
+        events = queue.Queue()
+
+        def run():
+            try:
+                events.put(("done", work(lambda *p: events.put(("progress", p)))))
+            except Exception as e:
+                events.put(("error", e))
+
+        def poll():
+            while True:
+                try:
+                    kind, payload = events.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == "progress":
+                    on_progress(*payload)
+                    continue
+                if kind == "error":
+                    self.reports_status_var.set("")
+                    messagebox.showerror(title, str(payload))
+                else:
+                    on_done(payload)
+                return
+            self.after(200, poll)
+
+        job = self._bg_jobs[title] = threading.Thread(target=run, daemon=True)
+        job.start()
+        self.after(200, poll)
+
+    def export_receipts_batch(self):
+        """Render every receipt in the report range on worker processes."""
+        date_from, date_to = self.rep_from.get(), self.rep_to.get()
+        try:
+            nos = receipt_numbers_in_range(date_from, date_to)
+        except ValueError:
+            messagebox.showwarning("Reports", "Dates must be in YYYY-MM-DD format.")
+            return
+        if not nos:
+            messagebox.showinfo("Batch Receipts", "No receipts in this period.")
+            return
+        merged = messagebox.askyesnocancel(
+            "Batch Receipts",
+            f"Export {len(nos)} receipts.\n\nYes: one merged PDF\nNo: one PDF per receipt",
+        )
+        if merged is None:
+            return
+        out = (os.path.join(EXPORTS_DIR, f"Receipts_{date_from}_to_{date_to}.pdf") if merged
+               else os.path.join(RECEIPTS_DIR, f"{date_from}_to_{date_to}"))
+
+        def progress(done, total, pps):
+            self.reports_status_var.set(f"Receipts {done}/{total} ({pps:.1f} pages/s)")
+
+        def done(res):
+            if not res.pages:
+                # every receipt vanished or failed; there is nothing to open
+                self.reports_status_var.set("")
+                messagebox.showinfo("Batch Receipts", "No receipts in range.")
+                return
+            self.reports_status_var.set(f"{res.pages} pages in {res.seconds:.1f}s "
+                                        f"({res.pages_per_second:.1f} pages/s)")
+            open_file(out)
+
+        self.run_in_background(
+            "Batch Receipts",
+            lambda p: export_receipts_batch(nos, out, BASE_DIR, merged=merged, progress=p),
+            progress, done,
+        )
+
+    def export_line_items(self):
+        """Stream raw receipt lines for the report range to CSV/JSONL."""
+        date_from, date_to = self.rep_from.get(), self.rep_to.get()
+        try:
+            day_range(date_from, date_to)
+        except ValueError:
+            messagebox.showwarning("Reports", "Dates must be in YYYY-MM-DD format.")
+            return
+        path = filedialog.asksaveasfilename(
+            parent=self, title="Export line items",
+            initialdir=EXPORTS_DIR, initialfile=f"Sales_Lines_{date_from}_to_{date_to}.csv",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")],
+        )
+        if not path:
+            return
+
+        def progress(rows, rate):
+            self.reports_status_var.set(f"Exported {rows:,} rows ({rate:,.0f} rows/s)")
+
+        def done(res):
+            rows, seconds = res
+            rate = rows / seconds if seconds else 0.0
+            self.reports_status_var.set(f"{rows:,} rows in {seconds:.1f}s ({rate:,.0f} rows/s)")
+            messagebox.showinfo("Export Complete", f"Exported {rows:,} rows to:\n{path}")
+
+        self.run_in_background(
+            "Export Lines",
+            lambda p: export_line_items(path, date_from, date_to, progress=p),
+            progress, done,
+        )
+
     # ---------------- Users Tab ----------------
     def build_users_tab(self):
         frm = self.users_tab
@@ -1084,6 +1005,12 @@ class App(tk.Tk):
             cur.execute("DELETE FROM users WHERE id=?",(uid,))  
             con.commit(); con.close(); self.load_users()
 
+def _import_errors_text(result, limit=10):
+    lines = [f"Line {line}: {name or '(no name)'}: {msg}" for line, name, msg in result.errors[:limit]]
+    if len(result.errors) > limit:
+        lines.append(f"... and {len(result.errors) - limit} more")
+    return "\n".join(lines)
+
 # ---------------- User Form ----------------
 class UserForm(tk.Toplevel):
     def __init__(self, master:App):
@@ -1101,5 +1028,34 @@ class UserForm(tk.Toplevel):
         cur.execute("INSERT INTO users (username,password_hash,role) VALUES (?,?,?)",(self.username.get(),hash_pw(self.password.get()),self.role.get()))
         con.commit();con.close(); self.destroy(); self.master.load_users()
 
+# ---------------- Startup profile ----------------
+def profile_startup():
+    """Build the login window, then an Admin App and each lazy tab, without
+    waiting for input, and print the time every startup phase took."""
+    init_db()
+    mark_startup("init_db")
+    login = LoginWindow(THUMBS)
+    login.update()
+    mark_startup("LoginWindow")
+    login.destroy()
+    app = App("admin", "Admin")
+    app.update()
+    mark_startup("App: first paint")
+    for tab in app.nb.tabs()[1:]:
+        app.nb.select(tab)
+        app.update()
+        mark_startup(f"tab: {app.nb.tab(tab, 'text').strip()}")
+    app.receipt_queue.shutdown()
+    app.destroy()
+    prev = STARTUP_PHASES[0][1]
+    for phase, t in STARTUP_PHASES[1:]:
+        print(f"{phase:<32}{(t - prev) * 1000:>9.1f} ms")
+        prev = t
+    print(f"{'total':<32}{(prev - STARTUP_PHASES[0][1]) * 1000:>9.1f} ms")
+
 if __name__=="__main__":
-    init_db(); LoginWindow().mainloop()
\ No newline at end of file
+    if "--profile-startup" in sys.argv[1:]:
+        profile_startup()
+    else:
+        init_db(); LoginWindow(THUMBS).mainloop()
+    DB_POOL.close_all()
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""Checkout latency: the old per-line write path vs checkout.checkout.
+
+    python benchmarks/bench_checkout.py [--runs 200] [--history 10000]
+
+Both paths run against the same scratch database (pooled WAL connection)
+for 1-line and 30-line carts; prints median and p95 in milliseconds.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import DB_POOL, db_connect, now_iso
+from database_setup import init_db, sync_receipt_counter
+from checkout import checkout
+
+PASTRIES = 60
+
+
+def legacy_checkout(con, username, customer, lines, subtotal, discount, tax, total, tendered, change):
+    """The write path App.charge used before the single-transaction rewrite."""
+    cur = con.cursor()
+    try:
+        items = []
+        for pid, name, price, qty, line_total in lines:
+            cur.execute("SELECT id, quantity FROM pastries WHERE name=?", (name,))
+            row = cur.fetchone()
+            if not row:
+                raise Exception(f"Item not found: {name}")
+            if qty > row[1]:
+                raise Exception(f"Not enough stock for {name}. Available: {row[1]}.")
+            items.append((row[0], name, price, qty))
+        cur.execute("SELECT COALESCE(MAX(receipt_no), 1000) FROM receipts")
+        receipt_no = (cur.fetchone()[0] or 1000) + 1
+        cur.execute(
+            "INSERT INTO receipts (receipt_no, created_at, staff_username, customer_name, subtotal, discount, tax, total, tendered, change) VALUES (?,?,?,?,?,?,?,?,?,?)",
+            (receipt_no, now_iso(), username, customer, subtotal, discount, tax, total, tendered, change),
+        )
+        rid = cur.lastrowid
+        for pid, name, price, qty in items:
+            line_total = price * qty
+            cur.execute(
+                "INSERT INTO receipt_items (receipt_id, pastry_id, name, unit_price, qty, line_total) VALUES (?,?,?,?,?,?)",
+                (rid, pid, name, price, qty, line_total),
+            )
+            cur.execute("UPDATE pastries SET quantity = quantity - ?, last_updated=? WHERE id=?", (qty, now_iso(), pid))
+            cur.execute(
+                "INSERT INTO legacy_sales (pastry_id, qty, unit_price, total, sale_time, staff_username) VALUES (?,?,?,?,?,?)",
+                (pid, qty, price, line_total, now_iso(), username),
+            )
+        con.commit()
+    except Exception:
+        con.rollback()
+        raise
+    return receipt_no
+
+
+def seed(path, history):
+    init_db(path)
+    con = db_connect(path)
+    # the old path also double-wrote every line into the (now retired) sales table
+    con.execute("""
+        CREATE TABLE legacy_sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, pastry_id INTEGER NOT NULL, qty INTEGER NOT NULL,
+            unit_price REAL NOT NULL, total REAL NOT NULL, sale_time TEXT, staff_username TEXT NOT NULL
+        )
+    """)
+    con.executemany(
+        "INSERT INTO pastries (name, category, price, quantity) VALUES (?,?,?,?)",
+        [(f"Pastry {i:03d}", "Other", 25.0, 10 ** 9) for i in range(PASTRIES)],
+    )
+    con.commit()
+    cart = [(1, "Pastry 000", 25.0, 1, 25.0)]
+    for _ in range(history):
+        checkout(con, "bench", None, cart, 25.0, 0.0, 3.0, 25.75, 30.0, 4.25)
+    con.close()
+
+
+def cart_lines(n):
+    return [(i + 1, f"Pastry {i:03d}", 25.0, 2, 50.0) for i in range(n)]
+
+
+def time_path(fn, con, lines, runs):
+    subtotal = sum(l[4] for l in lines)
+    samples = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        fn(con, "bench", None, lines, subtotal, 0.0, 3.0, subtotal * 1.03, subtotal * 2, subtotal * 0.97)
+        samples.append((time.perf_counter() - t) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=200)
+    ap.add_argument("--history", type=int, default=10000, help="receipts to pre-load")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_checkout.db")
+        seed(path, args.history)
+        con = db_connect(path)
+        print(f"{'path':<10}{'lines':>6}{'median ms':>12}{'p95 ms':>10}")
+        for n in (1, 30):
+            for label, fn in (("before", legacy_checkout), ("after", checkout)):
+                sync_receipt_counter(con.cursor())
+                con.commit()
+                med, p95 = time_path(fn, con, cart_lines(n), args.runs)
+                print(f"{label:<10}{n:>6}{med:>12.3f}{p95:>10.3f}")
+        DB_POOL.release(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Replay a trading day through N concurrent tills sharing one database.
+
+    python benchmarks/replay_day.py [--tills 4] [--customers 1200] [--speed 0]
+                                    [--trace day.jsonl | --record day.jsonl]
+                                    [--scale small] [--no-render] [--out replay.json]
+
+A trace is JSON lines of timestamped till events, seconds after opening:
+
+    {"t": 3605.2, "till": 1, "op": "add", "pastry_id": 17, "qty": 2}
+    {"t": 3611.8, "till": 1, "op": "checkout", "tendered": null, "customer": null}
+
+``tendered: null`` pays the cart total rounded up to the next ₱100.
+Without --trace a day is generated: morning, lunch and after-work peaks
+between 07:00 and 21:00. Use --record to keep it for later runs.
+
+Each till is a separate process driving PosService, the same path
+App.charge takes: add_to_cart, then checkout. Every receipt is then
+queued on that till's ReceiptRenderQueue. --speed 60 plays an hour of
+trading per minute; the default of 0 replays as fast as the tills can go.
+
+The run reports throughput, p50/p95/p99 checkout latency, time spent
+waiting for the write lock (and checkouts that still failed on it), the receipt-render backlog, and with --speed
+how far the tills fell behind the trace.
+"""
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import multiprocessing as mp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+from utils import DB_POOL, db_connect
+from pos_service import PosError, PosService
+from checkout import CheckoutError
+from receipts import ReceiptRenderQueue
+import synthetic
+from run_suite import scratch_copy
+
+OPEN_HOUR, CLOSE_HOUR = 7, 21
+# relative customer arrivals per hour of the day
+HOURLY_TRAFFIC = {7: 6, 8: 10, 9: 6, 10: 4, 11: 7, 12: 10, 13: 7, 14: 4,
+                  15: 4, 16: 6, 17: 9, 18: 8, 19: 5, 20: 3}
+
+
+# -------------------- Traces --------------------
+def generate_trace(pastry_ids, customers=1200, tills=4, seed=11):
+    """A day of events for ``tills`` tills, sorted by time."""
+    rnd = random.Random(seed)
+    hours = list(HOURLY_TRAFFIC)
+    weights = [HOURLY_TRAFFIC[h] for h in hours]
+    popular = pastry_ids[: max(1, len(pastry_ids) // 5)]
+    till_free = [0.0] * tills           # when each till finishes its current customer
+    events = []
+    arrivals = sorted(
+        (rnd.choices(hours, weights)[0] - OPEN_HOUR) * 3600 + rnd.random() * 3600
+        for _ in range(customers)
+    )
+    for arrive in arrivals:
+        till = min(range(tills), key=till_free.__getitem__)
+        t = max(arrive, till_free[till])
+        for pid in rnd.sample(popular if rnd.random() < 0.6 else pastry_ids,
+                              min(len(pastry_ids), rnd.randint(1, 6))):
+            t += rnd.uniform(1.5, 5.0)
+            events.append({"t": round(t, 2), "till": till + 1, "op": "add",
+                           "pastry_id": pid, "qty": rnd.choice((1, 1, 1, 2, 2, 3, 6))})
+        t += rnd.uniform(8.0, 25.0)      # payment
+        events.append({"t": round(t, 2), "till": till + 1, "op": "checkout",
+                       "tendered": None, "customer": None})
+        till_free[till] = t + rnd.uniform(2.0, 6.0)
+    events.sort(key=lambda e: e["t"])
+    return events
+
+def read_trace(path):
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+def write_trace(events, path):
+    with open(path, "w", encoding="utf-8") as fh:
+        for e in events:
+            fh.write(json.dumps(e) + "\n")
+
+
+# -------------------- Till process --------------------
+def cash_tendered(total):
+    """What a customer hands over: the total rounded up to the next ₱100."""
+    return float(-(-int(total * 100) // 10000) * 100) if total else 0.0
+
+def run_till(job):
+    path, till, events, speed, start_at, render, out_dir = job
+    pos = PosService(f"till{till}", db_path=path)
+    rq = ReceiptRenderQueue(out_dir, ROOT, db_path=path) if render else None
+    latencies, lock_waits, backlog = [], [], []
+    rejected_adds = failed = lock_failures = 0
+    max_lag = 0.0
+    while time.time() < start_at:
+        time.sleep(0.001)
+    t0 = time.perf_counter()
+    for e in events:
+        if speed:
+            due = t0 + e["t"] / speed
+            lag = time.perf_counter() - due
+            if lag < 0:
+                time.sleep(-lag)
+            else:
+                max_lag = max(max_lag, lag)
+        if e["op"] == "add":
+            try:
+                pos.add_to_cart(e["pastry_id"], e.get("qty", 1))
+            except PosError:
+                rejected_adds += 1
+            continue
+        if not pos.cart:
+            continue
+        tendered = e.get("tendered") or cash_tendered(pos.totals().total)
+        waited = DB_POOL.lock_wait
+        t = time.perf_counter()
+        try:
+            res = pos.checkout(tendered, e.get("customer"))
+        except (CheckoutError, PosError):
+            failed += 1
+            pos.clear_cart()
+            continue
+        except sqlite3.Error:
+            # e.g. "database is locked" outlasting retry_on_lock; the till carries on
+            lock_failures += 1
+            pos.clear_cart()
+            continue
+        latencies.append(time.perf_counter() - t)
+        lock_waits.append(DB_POOL.lock_wait - waited)
+        if rq:
+            rq.submit(res.receipt_no, open_after=False)
+            backlog.append(rq.backlog)
+    elapsed = time.perf_counter() - t0
+    drain = render_errors = 0
+    if rq:
+        d = time.perf_counter()
+        rq.shutdown()
+        drain = time.perf_counter() - d
+        render_errors = sum(1 for r in rq.poll() if r.error)
+    stats = DB_POOL.stats()
+    DB_POOL.close_all()
+    return {
+        "till": till, "latencies": latencies, "lock_waits": lock_waits, "backlog": backlog,
+        "rejected_adds": rejected_adds, "failed": failed, "lock_failures": lock_failures, "elapsed": elapsed, "max_lag": max_lag,
+        "render_drain": drain, "render_errors": render_errors, "lock_retries": stats["lock_retries"],
+    }
+
+
+# -------------------- Report --------------------
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+def summarize(results, wall):
+    lat = sorted(x for r in results for x in r["latencies"])
+    waits = sorted(x for r in results for x in r["lock_waits"])
+    backlog = [x for r in results for x in r["backlog"]]
+    ms = lambda v: round(v * 1000, 3)
+    return {
+        "tills": len(results),
+        "checkouts": len(lat),
+        "failed_checkouts": sum(r["failed"] for r in results),
+        "lock_failures": sum(r["lock_failures"] for r in results),
+        "rejected_adds": sum(r["rejected_adds"] for r in results),
+        "seconds": round(wall, 3),
+        "checkouts_per_s": round(len(lat) / wall, 1) if wall else 0.0,
+        "latency_ms": {"p50": ms(percentile(lat, 0.50)), "p95": ms(percentile(lat, 0.95)),
+                       "p99": ms(percentile(lat, 0.99)), "max": ms(lat[-1] if lat else 0.0)},
+        "lock_wait_ms": {"total": ms(sum(waits)), "p95": ms(percentile(waits, 0.95)),
+                         "max": ms(waits[-1] if waits else 0.0)},
+        "lock_retries": sum(r["lock_retries"] for r in results),
+        "render_backlog": {"max": max(backlog, default=0),
+                           "mean": round(sum(backlog) / len(backlog), 2) if backlog else 0.0},
+        "render_drain_s": round(max((r["render_drain"] for r in results), default=0.0), 3),
+        "render_errors": sum(r["render_errors"] for r in results),
+        "max_lag_s": round(max((r["max_lag"] for r in results), default=0.0), 3),
+    }
+
+def print_summary(s):
+    lat, lw, bl = s["latency_ms"], s["lock_wait_ms"], s["render_backlog"]
+    print(f"{s['tills']} tills: {s['checkouts']:,} checkouts in {s['seconds']:.1f}s "
+          f"({s['checkouts_per_s']:,.1f}/s), {s['failed_checkouts']} failed, "
+          f"{s['rejected_adds']} adds refused")
+    print(f"checkout latency ms: p50 {lat['p50']:.2f}  p95 {lat['p95']:.2f}  "
+          f"p99 {lat['p99']:.2f}  max {lat['max']:.2f}")
+    print(f"lock wait ms: total {lw['total']:.1f}  p95 {lw['p95']:.2f}  max {lw['max']:.2f}  "
+          f"({s['lock_retries']} retries, {s['lock_failures']} checkouts failed on a lock)")
+    print(f"render backlog: max {bl['max']}  mean {bl['mean']}  "
+          f"drain {s['render_drain_s']:.1f}s  errors {s['render_errors']}")
+    if s["max_lag_s"]:
+        print(f"max lag behind trace: {s['max_lag_s']:.2f}s")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--tills", type=int, default=4, help="tills in a generated day (a trace names its own)")
+    ap.add_argument("--customers", type=int, default=1200, help="customers in a generated day")
+    ap.add_argument("--seed", type=int, default=11)
+    ap.add_argument("--trace", help="replay this JSONL trace instead of generating one")
+    ap.add_argument("--record", help="write the generated trace here")
+    ap.add_argument("--speed", type=float, default=0.0, help="trace seconds per wall second (0 = flat out)")
+    ap.add_argument("--scale", choices=sorted(synthetic.SCALES), default="small", help="synthetic database")
+    ap.add_argument("--db", help="replay against a copy of this database instead")
+    ap.add_argument("--no-render", action="store_true", help="skip receipt rendering")
+    ap.add_argument("--out", help="write the summary JSON here")
+    args = ap.parse_args(argv)
+
+    src = args.db or synthetic.cached(os.path.join(HERE, ".data"), *synthetic.SCALES[args.scale])
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "replay.db")
+        scratch_copy(src, path)
+        con = db_connect(path)
+        # the day starts fully stocked, as a Christmas-rush morning would
+        con.execute("UPDATE pastries SET quantity = MAX(quantity, 100000)")
+        con.commit()
+        ids = [r[0] for r in con.execute("SELECT id FROM pastries ORDER BY id")]
+        DB_POOL.release(path)
+
+        events = read_trace(args.trace) if args.trace else generate_trace(ids, args.customers, args.tills, args.seed)
+        if args.record:
+            write_trace(events, args.record)
+        tills = sorted({e["till"] for e in events})
+        print(f"{len(events):,} events, {sum(e['op'] == 'checkout' for e in events):,} checkouts, "
+              f"{len(tills)} tills")
+
+        start_at = time.time() + 0.5
+        jobs = [(path, till, [e for e in events if e["till"] == till], args.speed, start_at,
+                 not args.no_render, os.path.join(tmp, f"receipts{till}")) for till in tills]
+        with mp.Pool(len(jobs)) as pool:
+            results = pool.map(run_till, jobs)
+        wall = max(r["elapsed"] for r in results)
+
+    summary = summarize(results, wall)
+    print_summary(summary)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(summary, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
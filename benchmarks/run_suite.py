@@ -0,0 +1,301 @@
+"""Headless microbenchmarks for the POS hot paths, with baseline comparison.
+
+    python benchmarks/run_suite.py [--scale small|medium|large] [--out results.json]
+                                   [--baseline benchmarks/baseline.json] [--threshold 0.25]
+                                   [--save-baseline] [--only checkout,receipt_pdf]
+
+Runs against a synthetic database (see synthetic.py; generated once per
+scale and kept in benchmarks/.data). Writes go to a scratch copy of it.
+Every case drives PosService or the receipt renderer directly, so no
+display is needed. The run fails if tkinter gets imported.
+
+Each case reports median/p95 milliseconds. With --baseline, any case
+whose median is more than --threshold (a fraction, 0.25 = 25%) slower
+than the baseline's counts as a regression, and the exit status is 1.
+
+Timings only compare on one machine: benchmarks/baseline.json is the
+reference for the machine it was saved on, and records only the data
+scale and optional dependencies. On another machine, run once with
+--save-baseline before changing code and compare against that.
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+import statistics
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+from utils import DB_POOL, db_connect, now_iso
+from pos_service import PosService
+from receipts import QRCODE_AVAILABLE, REPORTLAB_AVAILABLE, fetch_receipt, receipt_qr_png, render_receipt
+import synthetic
+
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+DATA_DIR = os.path.join(HERE, ".data")
+REPORT_PAGE_SIZE = 200      # as in the Reports tab
+WARMUP_RUNS = 3
+MIN_RUNS = 5
+
+BENCHMARKS = {}
+
+
+def bench(name):
+    """Register ``setup(ctx)``; it returns the zero-argument callable to time."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+class Context:
+    """The scratch database plus ranges and ids shared by the cases."""
+
+    def __init__(self, path, tmp):
+        self.path = path
+        self.tmp = tmp
+        self.pos = PosService("bench", "Admin", db_path=path)
+        con = db_connect(path)
+        last_day = con.execute("SELECT substr(MAX(created_at), 1, 10) FROM receipts").fetchone()[0]
+        self.receipt_nos = [r[0] for r in con.execute(
+            "SELECT receipt_no FROM receipts ORDER BY receipt_no DESC LIMIT 100")]
+        con.close()
+        last = time.strptime(last_day, "%Y-%m-%d")
+        self.date_to = last_day
+        self.month_from = time.strftime("%Y-%m-01", last)
+        self.week_from = time.strftime("%Y-%m-%d", time.localtime(time.mktime(last) - 6 * 86400))
+        self.pastry_ids = [p.id for p in self.pos.catalog.rows()]
+
+
+# -------------------- Cases --------------------
+@bench("catalog_reload")
+def _catalog_reload(ctx):
+    return ctx.pos.catalog.reload
+
+@bench("catalog_filter")
+def _catalog_filter(ctx):
+    filters = [("All", ""), ("Bread", ""), ("All", "choc"), ("Cake", "red")]
+    state = {"i": 0}
+
+    def run():
+        cat, q = filters[state["i"] % len(filters)]
+        state["i"] += 1
+        ctx.pos.products(cat, q)
+    return run
+
+@bench("cart_add")
+def _cart_add(ctx):
+    ids = ctx.pastry_ids
+    state = {"i": 0}
+
+    def run():
+        pid = ids[state["i"] % len(ids)]
+        state["i"] += 1
+        ctx.pos.add_to_cart(pid, 1)
+        ctx.pos.remove_from_cart(pid)
+    return run
+
+@bench("cart_scan")
+def _cart_scan(ctx):
+    skus = [p.sku for p in ctx.pos.catalog.rows() if p.sku]
+    state = {"i": 0}
+
+    def run():
+        line = ctx.pos.scan(skus[state["i"] % len(skus)])
+        state["i"] += 1
+        ctx.pos.remove_from_cart(line.pastry_id)
+    return run
+
+@bench("checkout")
+def _checkout(ctx):
+    ids = ctx.pastry_ids
+    state = {"i": 0}
+
+    def run():
+        for k in range(3):
+            ctx.pos.add_to_cart(ids[(state["i"] + k) % len(ids)], 1)
+        state["i"] += 3
+        ctx.pos.checkout(10_000)
+    return run
+
+@bench("reports_refresh")
+def _reports_refresh(ctx):
+    def run():
+        ctx.pos.receipt_totals(ctx.month_from, ctx.date_to)
+        ctx.pos.receipts_page(ctx.month_from, ctx.date_to, limit=REPORT_PAGE_SIZE)
+    return run
+
+@bench("reports_next_page")
+def _reports_next_page(ctx):
+    first = ctx.pos.receipts_page(ctx.month_from, ctx.date_to, limit=REPORT_PAGE_SIZE)
+    after = (first[-1][0], first[-1][1]) if first else None
+    return lambda: ctx.pos.receipts_page(ctx.month_from, ctx.date_to, after=after, limit=REPORT_PAGE_SIZE)
+
+@bench("report_item_sales")
+def _report_item_sales(ctx):
+    return lambda: ctx.pos.item_sales(ctx.month_from, ctx.date_to)
+
+@bench("report_summary")
+def _report_summary(ctx):
+    return lambda: ctx.pos.sales_summary(date_from=ctx.month_from, date_to=ctx.date_to)
+
+@bench("report_detail_stream")
+def _report_detail_stream(ctx):
+    def run():
+        for _ in ctx.pos.sales_rows(ctx.week_from, ctx.date_to):
+            pass
+    return run
+
+@bench("receipt_qr")
+def _receipt_qr(ctx):
+    if not QRCODE_AVAILABLE:
+        return None
+    no = ctx.receipt_nos[0]
+    con = db_connect(ctx.path)
+    header, items = fetch_receipt(con.cursor(), no)
+    con.close()
+    return lambda: receipt_qr_png(no, header, items)
+
+@bench("receipt_pdf")
+def _receipt_pdf(ctx):
+    if not REPORTLAB_AVAILABLE:
+        return None
+    out_dir = os.path.join(ctx.tmp, "receipts")
+    state = {"i": 0}
+
+    def run():
+        no = ctx.receipt_nos[state["i"] % len(ctx.receipt_nos)]
+        state["i"] += 1
+        render_receipt(no, out_dir, ROOT, db_path=ctx.path)
+    return run
+
+
+# -------------------- Runner --------------------
+def time_case(fn, runs, max_seconds):
+    for _ in range(WARMUP_RUNS):
+        fn()
+    samples = []
+    deadline = time.perf_counter() + max_seconds
+    while len(samples) < runs and (len(samples) < MIN_RUNS or time.perf_counter() < deadline):
+        t = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t) * 1000)
+    samples.sort()
+    median = statistics.median(samples)
+    return {
+        "runs": len(samples),
+        "median_ms": round(median, 4),
+        "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)], 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "ops_per_s": round(1000 / median, 1) if median else None,
+    }
+
+def scratch_copy(src, dst):
+    """Copy the generated database so write benchmarks never touch it."""
+    a, b = sqlite3.connect(src), sqlite3.connect(dst)
+    try:
+        a.backup(b)
+    finally:
+        b.close()
+        a.close()
+
+def run_suite(pastries, receipts, runs=200, max_seconds=2.0, only=None, data_dir=DATA_DIR, log=print):
+    t = time.perf_counter()
+    src = synthetic.cached(data_dir, pastries, receipts)
+    log(f"dataset: {pastries:,} pastries, {receipts:,} receipts ({time.perf_counter() - t:.1f}s)")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        scratch_copy(src, path)
+        ctx = Context(path, tmp)
+        for name, setup in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            fn = setup(ctx)
+            if fn is None:
+                log(f"{name:<22} skipped (optional dependency missing)")
+                continue
+            results[name] = res = time_case(fn, runs, max_seconds)
+            log(f"{name:<22}{res['median_ms']:>10.3f} ms{res['p95_ms']:>10.3f} ms p95{res['runs']:>7} runs")
+        DB_POOL.release(path)
+    return {
+        "meta": {
+            "created": now_iso(),
+            "pastries": pastries,
+            "receipts": receipts,
+            "reportlab": REPORTLAB_AVAILABLE,
+            "qrcode": QRCODE_AVAILABLE,
+        },
+        "results": results,
+    }
+
+def compare(current, baseline, threshold):
+    """Print a comparison table; returns the names that regressed."""
+    cm, bm = current["meta"], baseline["meta"]
+    if (cm["pastries"], cm["receipts"]) != (bm["pastries"], bm["receipts"]):
+        print(f"warning: baseline scale {bm['pastries']:,}/{bm['receipts']:,} differs from this run")
+    regressed = []
+    print(f"\n{'case':<22}{'baseline':>12}{'now':>12}{'change':>9}")
+    for name, res in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<22}{'-':>12}{res['median_ms']:>12.3f}{'new':>9}")
+            continue
+        ratio = res["median_ms"] / base["median_ms"] if base["median_ms"] else 1.0
+        flag = ratio > 1 + threshold
+        if flag:
+            regressed.append(name)
+        print(f"{name:<22}{base['median_ms']:>12.3f}{res['median_ms']:>12.3f}{ratio - 1:>+9.0%}"
+              + ("  REGRESSION" if flag else ""))
+    return regressed
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scale", choices=sorted(synthetic.SCALES), default="small")
+    ap.add_argument("--pastries", type=int, help="override the scale's pastry count")
+    ap.add_argument("--receipts", type=int, help="override the scale's receipt count")
+    ap.add_argument("--runs", type=int, default=200, help="timed runs per case (upper bound)")
+    ap.add_argument("--max-seconds", type=float, default=2.0, help="time budget per case")
+    ap.add_argument("--only", help="comma-separated case names")
+    ap.add_argument("--out", help="write results JSON here")
+    ap.add_argument("--baseline", default=DEFAULT_BASELINE)
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown as a fraction")
+    ap.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    ap.add_argument("--data-dir", default=DATA_DIR)
+    args = ap.parse_args(argv)
+
+    pastries, receipts = synthetic.SCALES[args.scale]
+    only = set(args.only.split(",")) if args.only else None
+    unknown = (only or set()) - set(BENCHMARKS)
+    if unknown:
+        ap.error(f"unknown case(s): {', '.join(sorted(unknown))}")
+    current = run_suite(args.pastries or pastries, args.receipts or receipts,
+                        args.runs, args.max_seconds, only, args.data_dir)
+
+    if "tkinter" in sys.modules:
+        sys.exit("error: tkinter was imported; the benchmarked code must stay headless")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(current, fh, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(current, fh, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressed = compare(current, baseline, args.threshold)
+        if regressed:
+            sys.exit(f"\n{len(regressed)} regression(s) over {args.threshold:.0%}: {', '.join(regressed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Multi-process checkout stress test: N simulated tills, one database file.
+
+    python benchmarks/stress_terminals.py [--tills 8] [--sales 300] [--stock 600]
+
+Every till runs random carts through checkout.checkout against a shared
+scratch database with deliberately scarce stock, then the database is
+checked for duplicate or missing receipt numbers, negative stock, stock
+that does not add up and daily rollups that disagree with the receipts. Exits non-zero if any invariant is broken.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import multiprocessing as mp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import DB_POOL, db_connect
+from database_setup import init_db
+from checkout import CheckoutError, checkout
+
+PASTRIES = 12
+
+
+def till(args):
+    path, till_no, sales, seed = args
+    rnd = random.Random(seed)
+    con = db_connect(path)
+    names = dict(con.execute("SELECT id, name FROM pastries").fetchall())
+    ok = rejected = 0
+    for _ in range(sales):
+        picks = rnd.sample(sorted(names), rnd.randint(1, 4))
+        lines = [(pid, names[pid], 10.0, rnd.randint(1, 3), 0.0) for pid in picks]
+        lines = [(pid, n, p, q, p * q) for pid, n, p, q, _ in lines]
+        subtotal = sum(l[4] for l in lines)
+        try:
+            checkout(con, f"till{till_no}", None, lines, subtotal, 0.0, 3.0, subtotal, subtotal, 0.0)
+            ok += 1
+        except CheckoutError:
+            rejected += 1
+    DB_POOL.close_all()
+    return ok, rejected
+
+
+def verify(path, stock):
+    con = db_connect(path)
+    problems = []
+    n, distinct, lo, hi = con.execute(
+        "SELECT COUNT(*), COUNT(DISTINCT receipt_no), MIN(receipt_no), MAX(receipt_no) FROM receipts").fetchone()
+    if n != distinct:
+        problems.append(f"{n - distinct} duplicate receipt numbers")
+    if n and hi - lo + 1 != n:
+        problems.append(f"receipt numbers {lo}..{hi} have gaps for {n} receipts")
+    for pid, qty in con.execute("SELECT id, quantity FROM pastries WHERE quantity < 0"):
+        problems.append(f"pastry {pid} has negative stock {qty}")
+    rows = con.execute("""
+        SELECT p.id, p.quantity, COALESCE(SUM(ri.qty), 0)
+        FROM pastries p LEFT JOIN receipt_items ri ON ri.pastry_id = p.id
+        GROUP BY p.id
+    """).fetchall()
+    for pid, left, sold in rows:
+        if left + sold != stock:
+            problems.append(f"pastry {pid}: {sold} sold + {left} left != {stock}")
+    raw = con.execute("SELECT COALESCE(SUM(qty), 0) FROM receipt_items").fetchone()[0]
+    rolled = con.execute("SELECT COALESCE(SUM(qty), 0) FROM daily_item_sales").fetchone()[0]
+    if raw != rolled:
+        problems.append(f"daily_item_sales has {rolled} units, receipt_items {raw}")
+    rolled = con.execute("SELECT COALESCE(SUM(receipt_count), 0) FROM daily_sales").fetchone()[0]
+    if rolled != n:
+        problems.append(f"daily_sales counts {rolled} receipts, receipts has {n}")
+    DB_POOL.release(path)
+    return n, problems
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--tills", type=int, default=8)
+    ap.add_argument("--sales", type=int, default=300, help="checkout attempts per till")
+    ap.add_argument("--stock", type=int, default=600, help="starting stock per pastry")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stress.db")
+        init_db(path)
+        con = db_connect(path)
+        con.executemany(
+            "INSERT INTO pastries (name, category, price, quantity) VALUES (?,?,?,?)",
+            [(f"Pastry {i}", "Other", 10.0, args.stock) for i in range(PASTRIES)],
+        )
+        con.commit()
+        DB_POOL.release(path)
+
+        start = time.perf_counter()
+        with mp.Pool(args.tills) as pool:
+            results = pool.map(till, [(path, i, args.sales, i) for i in range(args.tills)])
+        elapsed = time.perf_counter() - start
+
+        receipts, problems = verify(path, args.stock)
+
+    ok = sum(r[0] for r in results)
+    rejected = sum(r[1] for r in results)
+    print(f"{args.tills} tills: {ok} sales, {rejected} rejected for stock, "
+          f"{receipts} receipts in {elapsed:.2f}s ({ok / elapsed:.0f} sales/s)")
+    for p in problems:
+        print("FAIL:", p)
+    if ok != receipts:
+        print(f"FAIL: {ok} successful checkouts but {receipts} receipts")
+        problems.append("receipt count")
+    print("OK" if not problems else f"{len(problems)} problem(s)")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Synthetic databases for benchmarks.
+
+    python benchmarks/synthetic.py out.db [--pastries 500] [--receipts 100000] [--days 365]
+
+Pastries are named after the CATEGORY_ITEMS products (numbered once the
+list runs out) and get 13-digit barcodes. Receipts of 1-5 lines are
+spread over the last ``days`` days. Rollups are rebuilt and ANALYZE is
+run, so the file looks like a shop that has been trading for a while. A given seed always produces the
+same rows; only the dates move, since they count back from today.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import DB_POOL, db_connect, now_iso
+from categories import CATEGORY_ITEMS
+from database_setup import init_db, backfill_rollups, sync_receipt_counter
+
+SCALES = {
+    # name: (pastries, receipts)
+    "small": (50, 10_000),
+    "medium": (500, 100_000),
+    "large": (5_000, 1_000_000),
+}
+INSERT_BATCH = 10_000
+DATA_VERSION = 2        # bump when generated content changes, to rebuild cached files
+STAFF = ("admin", "till1", "till2", "till3")
+
+
+def pastry_rows(n, rnd):
+    products = [(cat, name) for cat, names in CATEGORY_ITEMS.items() for name in names]
+    stamp = now_iso()
+    rows = []
+    for i in range(n):
+        cat, name = products[i % len(products)]
+        if i >= len(products):
+            name = f"{name} {i // len(products) + 1}"
+        price = rnd.randrange(500, 50_001) / 100
+        rows.append((name, cat, price, 10 ** 6, stamp, stamp, f"480{i + 1:010d}"))
+    return rows
+
+def receipt_batches(pastries, receipts, days, rnd, batch=INSERT_BATCH):
+    """Yield (receipt rows, item rows) in chunks; receipt ids are assigned
+    here (1..receipts) so items can reference them without a lookup."""
+    start = datetime.now().replace(microsecond=0) - timedelta(days=days)
+    span = days * 86400
+    # sorted offsets keep ids and created_at in step, as real trading would
+    offsets = sorted(rnd.randrange(span) for _ in range(receipts))
+    r_rows, i_rows = [], []
+    for rid, off in enumerate(offsets, 1):
+        created = (start + timedelta(seconds=off)).strftime("%Y-%m-%d %H:%M:%S")
+        subtotal = 0.0
+        for pid, name, price in rnd.sample(pastries, min(len(pastries), rnd.randint(1, 5))):
+            qty = rnd.randint(1, 4)
+            line_total = round(price * qty, 2)
+            subtotal += line_total
+            i_rows.append((rid, pid, name, price, qty, line_total))
+        subtotal = round(subtotal, 2)
+        total = round(subtotal * 1.03, 2)
+        r_rows.append((rid, 1000 + rid, created, rnd.choice(STAFF), None,
+                       subtotal, 0.0, 3.0, total, total, 0.0))
+        if len(r_rows) >= batch:
+            yield r_rows, i_rows
+            r_rows, i_rows = [], []
+    if r_rows:
+        yield r_rows, i_rows
+
+def generate(path, pastries=500, receipts=100_000, days=365, seed=7, progress=None):
+    """Create a fresh database at ``path``; returns seconds taken."""
+    t0 = time.perf_counter()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    init_db(path)
+    rnd = random.Random(seed)
+    con = db_connect(path)
+    cur = con.cursor()
+    cur.executemany(
+        "INSERT INTO pastries (name, category, price, quantity, date_added, last_updated, sku) VALUES (?,?,?,?,?,?,?)",
+        pastry_rows(pastries, rnd),
+    )
+    catalog = cur.execute("SELECT id, name, price FROM pastries").fetchall()
+    done = 0
+    for r_rows, i_rows in receipt_batches(catalog, receipts, days, rnd):
+        cur.executemany(
+            "INSERT INTO receipts (id, receipt_no, created_at, staff_username, customer_name, subtotal, discount, tax, total, tendered, change) "
+            "VALUES (?,?,?,?,?,?,?,?,?,?,?)", r_rows)
+        cur.executemany(
+            "INSERT INTO receipt_items (receipt_id, pastry_id, name, unit_price, qty, line_total) VALUES (?,?,?,?,?,?)",
+            i_rows)
+        con.commit()
+        done += len(r_rows)
+        if progress:
+            progress(done, receipts)
+    sync_receipt_counter(cur)
+    con.commit()
+    backfill_rollups(con)
+    cur.execute("ANALYZE")
+    con.close()
+    DB_POOL.release(path)
+    return time.perf_counter() - t0
+
+def cached(data_dir, pastries, receipts, days=365, seed=7, progress=None):
+    """Path of a generated database in ``data_dir``, built on first use."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"synthetic_v{DATA_VERSION}_p{pastries}_r{receipts}_d{days}_s{seed}.db")
+    if not os.path.exists(path):
+        tmp = path + ".building"
+        generate(tmp, pastries, receipts, days, seed, progress)
+        os.replace(tmp, path)
+    return path
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("path")
+    ap.add_argument("--scale", choices=sorted(SCALES), help="preset pastries/receipts")
+    ap.add_argument("--pastries", type=int, default=500)
+    ap.add_argument("--receipts", type=int, default=100_000)
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args(argv)
+    if args.scale:
+        args.pastries, args.receipts = SCALES[args.scale]
+
+    def progress(done, total):
+        print(f"\r{done:,}/{total:,} receipts", end="", file=sys.stderr, flush=True)
+
+    seconds = generate(args.path, args.pastries, args.receipts, args.days, args.seed, progress)
+    print(f"\n{args.pastries:,} pastries, {args.receipts:,} receipts in {seconds:.1f}s -> {args.path}")
+
+
+if __name__ == "__main__":
+    main()
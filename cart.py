@@ -0,0 +1,101 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+# -------------------- Cart model --------------------
+# Amounts are integer centavos; rates are basis points (1/100 of a percent).
+DISCOUNT_RATES_BP = {"Senior": 2000, "PWD": 2000}   # 20% discount
+TAX_RATE_BP = 300                                    # always 3% tax
+
+
+def to_cents(amount) -> int:
+    """Peso amount (float, str or Decimal) to integer centavos, half-up."""
+    return int((Decimal(str(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def from_cents(cents: int) -> float:
+    return cents / 100
+
+def apply_rate(cents: int, rate_bp: int) -> int:
+    """``cents * rate``, rounded half-up to a whole centavo."""
+    return (cents * rate_bp * 2 + 10000) // 20000
+
+
+class CartLine:
+    __slots__ = ("pastry_id", "name", "unit_cents", "qty")
+
+    def __init__(self, pastry_id, name, unit_cents, qty):
+        self.pastry_id = pastry_id
+        self.name = name
+        self.unit_cents = unit_cents
+        self.qty = qty
+
+    @property
+    def line_cents(self) -> int:
+        return self.unit_cents * self.qty
+
+
+class Cart:
+    """Cart lines keyed by pastry_id with an incrementally kept subtotal.
+
+    Adds, quantity changes and removals are O(1); discount, tax and total
+    derive from the running subtotal, so nothing is re-summed or re-parsed.
+    Limit checks (per-product maximum, stock) are the caller's job.
+    """
+
+    def __init__(self):
+        self.lines = {}             # pastry_id -> CartLine, in insertion order
+        self.subtotal_cents = 0
+        self.discount_type = "None"
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines.values())
+
+    def __contains__(self, pastry_id):
+        return pastry_id in self.lines
+
+    def get(self, pastry_id):
+        return self.lines.get(pastry_id)
+
+    def qty_of(self, pastry_id) -> int:
+        line = self.lines.get(pastry_id)
+        return line.qty if line else 0
+
+    def add(self, pastry_id, name, price, qty) -> CartLine:
+        line = self.lines.get(pastry_id)
+        if line is None:
+            line = self.lines[pastry_id] = CartLine(pastry_id, name, to_cents(price), 0)
+        return self.set_qty(pastry_id, line.qty + qty)
+
+    def set_qty(self, pastry_id, qty):
+        """Set a line's quantity; 0 or less removes it. Returns the line or None."""
+        line = self.lines[pastry_id]
+        if qty <= 0:
+            self.remove(pastry_id)
+            return None
+        self.subtotal_cents += line.unit_cents * (qty - line.qty)
+        line.qty = qty
+        return line
+
+    def remove(self, pastry_id):
+        line = self.lines.pop(pastry_id, None)
+        if line is not None:
+            self.subtotal_cents -= line.line_cents
+
+    def clear(self):
+        self.lines.clear()
+        self.subtotal_cents = 0
+        self.discount_type = "None"
+
+    # ---- totals ----
+    @property
+    def discount_cents(self) -> int:
+        return apply_rate(self.subtotal_cents, DISCOUNT_RATES_BP.get(self.discount_type, 0))
+
+    @property
+    def tax_cents(self) -> int:
+        return apply_rate(max(0, self.subtotal_cents - self.discount_cents), TAX_RATE_BP)
+
+    @property
+    def total_cents(self) -> int:
+        return max(0, self.subtotal_cents - self.discount_cents + self.tax_cents)
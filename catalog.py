@@ -0,0 +1,249 @@
+from utils import db_connect, now_iso
+
+# -------------------- Search index --------------------
+SEARCH_MIN_NGRAM = 3    # shorter query terms match word prefixes instead
+
+
+_EMPTY = frozenset()
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """In-memory trigram + word-prefix index over "name category" text.
+
+    A query is split into terms that must all match. Terms of three or more
+    characters are substring matches, answered by their trigram posting
+    sets; shorter terms match the start of any word. The posting sets of
+    all terms are intersected smallest first and only the survivors are
+    confirmed against the text, so lookups never touch every pastry.
+    Entries are added or dropped as the catalog changes.
+    """
+
+    def __init__(self):
+        self._text = {}         # id -> casefolded "name category"
+        self._grams = {}        # trigram -> {ids}
+        self._prefixes = {}     # 1-2 char word prefix -> {ids}
+
+    @classmethod
+    def build(cls, entries):
+        """Index of (id, name, category) entries, filled in one pass."""
+        index = cls()
+        texts, grams, prefixes = index._text, index._grams, index._prefixes
+        for pastry_id, name, category in entries:
+            text = texts[pastry_id] = f"{name} {category}".casefold()
+            keys, starts = index._keys(text)
+            for g in keys:
+                ids = grams.get(g)
+                if ids is None:
+                    grams[g] = {pastry_id}
+                else:
+                    ids.add(pastry_id)
+            for p in starts:
+                ids = prefixes.get(p)
+                if ids is None:
+                    prefixes[p] = {pastry_id}
+                else:
+                    ids.add(pastry_id)
+        return index
+
+    def _keys(self, text):
+        prefixes = {w[:n] for w in text.split() for n in (1, 2) if len(w) >= n}
+        return _trigrams(text), prefixes
+
+    def add(self, pastry_id, name, category):
+        self.discard(pastry_id)
+        text = self._text[pastry_id] = f"{name} {category}".casefold()
+        grams, prefixes = self._keys(text)
+        for g in grams:
+            self._grams.setdefault(g, set()).add(pastry_id)
+        for p in prefixes:
+            self._prefixes.setdefault(p, set()).add(pastry_id)
+
+    def discard(self, pastry_id):
+        text = self._text.pop(pastry_id, None)
+        if text is None:
+            return
+        grams, prefixes = self._keys(text)
+        for index, keys in ((self._grams, grams), (self._prefixes, prefixes)):
+            for k in keys:
+                ids = index.get(k)
+                if ids is not None:
+                    ids.discard(pastry_id)
+                    if not ids:
+                        del index[k]
+
+    def search(self, query):
+        """Ids matching every term of ``query``; None means "no filter".
+        The set returned may be the index's own: do not modify it."""
+        terms = set(query.casefold().split())
+        if not terms:
+            return None
+        postings = []
+        for term in terms:
+            if len(term) < SEARCH_MIN_NGRAM:
+                postings.append(self._prefixes.get(term, _EMPTY))
+            else:
+                postings.extend(self._grams.get(g, _EMPTY) for g in _trigrams(term))
+        postings.sort(key=len)
+        ids = postings[0].intersection(*postings[1:]) if len(postings) > 1 else postings[0]
+        # trigrams can all occur without a longer term occurring as a whole
+        text = self._text
+        for term in terms:
+            if len(term) > SEARCH_MIN_NGRAM and ids:
+                ids = {i for i in ids if term in text[i]}
+        return ids
+
+
+# -------------------- Pastry catalog cache --------------------
+class Pastry:
+    """One row of the pastries table."""
+
+    __slots__ = ("id", "name", "category", "price", "quantity", "last_updated", "sku")
+
+    def __init__(self, id, name, category, price, quantity, last_updated=None, sku=None):
+        self.id = id
+        self.name = name
+        self.category = category
+        self.price = price
+        self.quantity = quantity
+        self.last_updated = last_updated
+        self.sku = sku
+
+    def as_row(self):
+        return (self.id, self.name, self.category, self.price, self.quantity, self.last_updated, self.sku or "")
+
+
+class PastryCatalog:
+    """Process-wide copy of the pastries table, indexed by id, by
+    case-insensitive name and by barcode (sku).
+
+    Reads come from memory; every write path (PosService save, delete, checkout)
+    patches or invalidates the cache so stock checks stay correct.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self._by_id = {}
+        self._by_name = {}
+        self._by_sku = {}
+        self._sorted = None
+        self._rank = {}         # id -> position in _sorted
+        self._by_category = {}
+        self._index = None      # SearchIndex, built on the first search()
+        self._loaded = False
+
+    # ---- loading ----
+    def reload(self):
+        con = db_connect(self.db_path)
+        rows = con.execute(
+            "SELECT id, name, category, price, quantity, last_updated, sku FROM pastries"
+        ).fetchall()
+        con.close()
+        self._by_id = {}
+        self._by_name = {}
+        self._by_sku = {}
+        self._by_category = {}
+        self._index = None
+        for row in rows:
+            self._add(Pastry(*row))
+        self._sorted = None
+        self._loaded = True
+
+    def invalidate(self):
+        self._loaded = False
+
+    def _ensure(self):
+        if not self._loaded:
+            self.reload()
+
+    def _add(self, p):
+        self._by_id[p.id] = p
+        self._by_name[p.name.casefold()] = p
+        if p.sku:
+            self._by_sku[p.sku] = p
+        self._by_category.setdefault(p.category, set()).add(p.id)
+        if self._index is not None:
+            self._index.add(p.id, p.name, p.category)
+
+    def _drop(self, p):
+        self._by_name.pop(p.name.casefold(), None)
+        if p.sku:
+            self._by_sku.pop(p.sku, None)
+        self._by_category.get(p.category, set()).discard(p.id)
+        if self._index is not None:
+            self._index.discard(p.id)
+
+    # ---- lookups ----
+    def get(self, pastry_id):
+        self._ensure()
+        return self._by_id.get(int(pastry_id))
+
+    def find(self, name):
+        self._ensure()
+        return self._by_name.get(name.strip().casefold())
+
+    def find_sku(self, sku):
+        """The pastry with this barcode, or None (a dict lookup)."""
+        self._ensure()
+        return self._by_sku.get(sku.strip())
+
+    def rows(self):
+        """All pastries ordered by name."""
+        self._ensure()
+        if self._sorted is None:
+            self._sorted = sorted(self._by_id.values(), key=lambda p: p.name)
+            self._rank = {p.id: i for i, p in enumerate(self._sorted)}
+        return self._sorted
+
+    def search(self, query="", category="All"):
+        """Pastries whose name/category match every term of ``query`` (see
+        SearchIndex) in ``category``, ordered by name."""
+        self._ensure()
+        if self._index is None:
+            # built on demand so reload() stays a plain table read
+            self._index = SearchIndex.build((p.id, p.name, p.category) for p in self._by_id.values())
+        ids = self._index.search(query)
+        if category != "All":
+            in_cat = self._by_category.get(category, set())
+            ids = in_cat if ids is None else ids & in_cat
+        rows = self.rows()
+        if ids is None:
+            return rows
+        # sorting ranks wins until the matches are about a third of the catalog
+        if len(ids) * 3 > len(rows):
+            return [p for p in rows if p.id in ids]
+        return [rows[r] for r in sorted(map(self._rank.__getitem__, ids))]
+
+    def __len__(self):
+        self._ensure()
+        return len(self._by_id)
+
+    # ---- write-through patches ----
+    def upsert(self, pastry_id, name, category, price, quantity, last_updated=None, sku=None):
+        self._ensure()
+        old = self._by_id.get(pastry_id)
+        if old is not None:
+            self._drop(old)
+        self._add(Pastry(pastry_id, name, category, price, quantity, last_updated or now_iso(), sku))
+        self._sorted = None
+
+    def remove(self, pastry_id):
+        self._ensure()
+        p = self._by_id.pop(int(pastry_id), None)
+        if p is not None:
+            self._drop(p)
+            self._sorted = None
+
+    def apply_sale(self, pastry_id, qty, when=None, left=None):
+        """Decrement cached stock after a committed sale; ``left`` is the
+        quantity the database reported, which also covers other tills."""
+        p = self._by_id.get(pastry_id)
+        if p is not None:
+            p.quantity = p.quantity - qty if left is None else left
+            p.last_updated = when or now_iso()
+
+
+CATALOG = PastryCatalog()
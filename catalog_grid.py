@@ -0,0 +1,221 @@
+from tkinter import ttk
+
+from utils import money
+
+# -------------------- Catalog cards --------------------
+class ProductCard(ttk.Frame):
+    """A reusable catalog card.
+
+    ``show()`` rebinds the card to a pastry and only reconfigures the widgets
+    whose value actually changed, so cards can be kept between refreshes.
+    """
+
+    def __init__(self, master, on_add, load_image, low_stock):
+        super().__init__(master, padding=6)
+        self.pastry_id = None
+        self.grid_pos = None
+        self._load_image = load_image
+        self._low_stock = low_stock
+        self._name = self._price = self._qty = None
+        self._img = None
+
+        self.img_lbl = ttk.Label(self)
+        self.img_lbl.pack()
+        self.name_lbl = ttk.Label(self, font=("Segoe UI", 10, "bold"))
+        self.name_lbl.pack()
+        self.price_lbl = ttk.Label(self)
+        self.price_lbl.pack()
+        self.stock_lbl = ttk.Label(self)
+        self.stock_lbl.pack()
+
+        bt_frame = ttk.Frame(self)
+        bt_frame.pack(pady=4)
+        ttk.Button(bt_frame, text="Add 1", style="Soft.TButton", command=lambda: on_add(self.pastry_id, 1)).pack(side="left", padx=2)
+        ttk.Button(bt_frame, text="Add 5", style="Soft.TButton", command=lambda: on_add(self.pastry_id, 5)).pack(side="left", padx=2)
+
+    def show(self, pastry_id, name, price, qty):
+        self.pastry_id = pastry_id
+        if name != self._name:
+            self._name = name
+            self._img = self._load_image(name)
+            self.img_lbl.configure(image=self._img)
+            self.name_lbl.configure(text=name)
+        if price != self._price:
+            self._price = price
+            self.price_lbl.configure(text=money(price))
+        if qty != self._qty:
+            self._qty = qty
+            # stock badge (improved visibility)
+            if qty < self._low_stock:
+                self.stock_lbl.configure(text=f"⚠️ Low stock: {qty}", foreground="#8a1c1c", font=("Segoe UI", 9, "bold"))
+            else:
+                self.stock_lbl.configure(text=f"In stock: {qty}", foreground="#2c7a2c", font=("Segoe UI", 9))
+
+    def place_at(self, row, col):
+        if self.grid_pos != (row, col):
+            self.grid(row=row, column=col, sticky="nsew", padx=6, pady=6)
+            self.grid_pos = (row, col)
+
+    def hide(self):
+        if self.grid_pos is not None:
+            self.grid_remove()
+            self.grid_pos = None
+
+
+class CatalogGrid:
+    """Keyed set of ProductCards inside ``frame``, one per pastry id.
+
+    Refreshing updates cards in place, shows/hides them for the current
+    filter and only creates cards for pastries it has not seen yet.
+    """
+
+    def __init__(self, frame, cols, on_add, load_image, low_stock):
+        self.frame = frame
+        self.cols = cols
+        self._on_add = on_add
+        self._load_image = load_image
+        self._low_stock = low_stock
+        self.cards = {}
+
+    def _card(self, pastry_id):
+        card = self.cards.get(pastry_id)
+        if card is None:
+            card = ProductCard(self.frame, self._on_add, self._load_image, self._low_stock)
+            self.cards[pastry_id] = card
+        return card
+
+    def show(self, items, known_ids=None):
+        """Lay out ``items`` (objects with id/name/price/quantity) in order.
+
+        Cards for ids missing from ``known_ids`` (deleted pastries) are
+        destroyed; all other cards not in ``items`` are just hidden.
+        """
+        visible = set()
+        for idx, p in enumerate(items):
+            card = self._card(p.id)
+            card.show(p.id, p.name, p.price, p.quantity)
+            card.place_at(*divmod(idx, self.cols))
+            visible.add(p.id)
+
+        for pid in list(self.cards):
+            if pid in visible:
+                continue
+            if known_ids is not None and pid not in known_ids:
+                self.cards.pop(pid).destroy()
+            else:
+                self.cards[pid].hide()
+
+    def filter(self, items):
+        """Show only ``items``, in order, by toggling card visibility. Each
+        shown card is refreshed too (a no-op unless its pastry changed while
+        it was hidden), and only pastries never shown before get a card."""
+        visible = set()
+        for idx, p in enumerate(items):
+            card = self._card(p.id)
+            card.show(p.id, p.name, p.price, p.quantity)
+            card.place_at(*divmod(idx, self.cols))
+            visible.add(p.id)
+        for pid, card in self.cards.items():
+            if pid not in visible:
+                card.hide()
+
+    def clear(self):
+        for card in self.cards.values():
+            card.destroy()
+        self.cards = {}
+
+
+class VirtualCatalogGrid:
+    """Virtualized catalog laid out directly on ``canvas``.
+
+    Only the rows in (or just around) the viewport have widgets: a small pool
+    of ProductCards is rebound to whichever pastries scroll into view, and the
+    scroll region is computed from the item count, so build and scroll cost do
+    not depend on the catalog size.
+    """
+
+    OVERSCAN_ROWS = 1
+
+    def __init__(self, canvas, scrollbar, cols, on_add, load_image, low_stock):
+        self.canvas = canvas
+        self.scrollbar = scrollbar
+        self.cols = cols
+        self._on_add = on_add
+        self._load_image = load_image
+        self._low_stock = low_stock
+        self.items = []
+        self.pool = []          # [(card, canvas window id)]
+        self.cell = None        # (width, height) of one grid cell
+        self._render_pending = False
+        canvas.configure(yscrollcommand=self._on_scroll)
+        self._bind_id = canvas.bind("<Configure>", lambda e: self._schedule_render(), add="+")
+
+    def _new_card(self):
+        card = ProductCard(self.canvas, self._on_add, self._load_image, self._low_stock)
+        wid = self.canvas.create_window(-10000, -10000, window=card, anchor="nw")
+        self.pool.append((card, wid))
+        return card
+
+    def _measure(self):
+        card = self.pool[0][0] if self.pool else self._new_card()
+        if self.items:
+            p = self.items[0]
+            card.show(p.id, p.name, p.price, p.quantity)
+        card.update_idletasks()
+        self.cell = (card.winfo_reqwidth() + 12, card.winfo_reqheight() + 12)
+
+    def show(self, items, known_ids=None):
+        self.items = items
+        if self.cell is None:
+            self._measure()
+        cw, ch = self.cell
+        rows = -(-len(items) // self.cols)
+        self.canvas.configure(scrollregion=(0, 0, self.cols * cw, max(rows * ch, 1)))
+        self._render()
+
+    def filter(self, items):
+        # only the viewport has cards, so a filter is just a new item list
+        self.show(items)
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._schedule_render()
+
+    def _schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.canvas.after_idle(self._render)
+
+    def _render(self):
+        self._render_pending = False
+        if self.cell is None:
+            return
+        cw, ch = self.cell
+        top = self.canvas.canvasy(0)
+        bottom = top + max(self.canvas.winfo_height(), ch)
+        first_row = max(0, int(top // ch) - self.OVERSCAN_ROWS)
+        last_row = int(bottom // ch) + self.OVERSCAN_ROWS
+        start = first_row * self.cols
+        needed = self.items[start:(last_row + 1) * self.cols]
+
+        while len(self.pool) < len(needed):
+            self._new_card()
+        for i, (card, wid) in enumerate(self.pool):
+            if i < len(needed):
+                p = needed[i]
+                r, c = divmod(start + i, self.cols)
+                card.show(p.id, p.name, p.price, p.quantity)
+                self.canvas.coords(wid, c * cw + 6, r * ch + 6)
+            else:
+                # park unused pool cards outside the scroll region
+                self.canvas.coords(wid, -10000, -10000)
+
+    def clear(self):
+        for card, wid in self.pool:
+            self.canvas.delete(wid)
+            card.destroy()
+        self.pool = []
+        self.items = []
+        self.cell = None
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.unbind("<Configure>", self._bind_id)
@@ -0,0 +1,125 @@
+from utils import begin_immediate, now_iso, retry_on_lock
+from queries import LOW_STOCK_THRESHOLD
+
+# -------------------- Checkout transaction --------------------
+class CheckoutError(Exception):
+    """A sale that cannot be completed (unknown item, not enough stock)."""
+
+
+class CheckoutResult:
+    __slots__ = ("receipt_no", "receipt_id", "created_at", "stock", "low_stock")
+
+    def __init__(self, receipt_no, receipt_id, created_at, stock, low_stock):
+        self.receipt_no = receipt_no
+        self.receipt_id = receipt_id
+        self.created_at = created_at
+        self.stock = stock              # {pastry_id: quantity left}
+        self.low_stock = low_stock      # (pastry_id, name, quantity) that fell below LOW_STOCK_THRESHOLD
+
+
+def _stock_shortfall(cur, lines, taken):
+    """Explain which line could not be decremented (only runs on failure).
+
+    ``taken`` holds the qty already decremented by earlier lines of this
+    sale, added back so the cashier sees the stock before the sale.
+    """
+    ids = [pid for pid, name, price, qty, line_total in lines]
+    cur.execute(f"SELECT id, quantity FROM pastries WHERE id IN ({','.join('?' * len(ids))})", ids)
+    stock = {pid: quantity + taken.get(pid, 0) for pid, quantity in cur.fetchall()}
+    for pid, name, price, qty, line_total in lines:
+        if pid not in stock:
+            return CheckoutError(f"Item not found: {name}")
+        if qty > stock[pid]:
+            return CheckoutError(f"Not enough stock for {name}. Available: {stock[pid]}.")
+    return CheckoutError("Stock changed during checkout, please try again.")
+
+def next_receipt_no(cur):
+    """Allocate the next receipt number from the counters row.
+
+    Must run inside a write transaction so the increment and read are atomic.
+    """
+    cur.execute("UPDATE counters SET value = value + 1 WHERE name = 'receipt_no'")
+    cur.execute("SELECT value FROM counters WHERE name = 'receipt_no'")
+    return cur.fetchone()[0]
+
+def checkout(con, username, customer, lines, subtotal, discount, tax, total, tendered, change):
+    """Record a sale in one BEGIN IMMEDIATE transaction.
+
+    ``lines`` is a list of (pastry_id, name, unit_price, qty, line_total).
+    Stock is decremented line by line with a conditional UPDATE
+    (quantity >= qty) ... RETURNING quantity, so no separate
+    read-check-write is needed; if any line is short the whole sale is
+    rolled back and CheckoutError names the first line the stock on hand
+    cannot cover. The returned stock also lets the result list the items
+    this sale took below LOW_STOCK_THRESHOLD without another query.
+
+    Safe with several tills writing the same file: the write lock is taken
+    up front, receipt numbers come from the counters row inside it, and a
+    lock that outlasts busy_timeout is retried with backoff.
+    """
+    return retry_on_lock(_checkout_once, con, username, customer, lines,
+                         subtotal, discount, tax, total, tendered, change)
+
+def _checkout_once(con, username, customer, lines, subtotal, discount, tax, total, tendered, change):
+    stamp = now_iso()
+    cur = con.cursor()
+    begin_immediate(cur)
+    try:
+        stock, taken, low_stock = {}, {}, []
+        for pid, name, price, qty, line_total in lines:
+            cur.execute(
+                "UPDATE pastries SET quantity = quantity - ?, last_updated = ? "
+                "WHERE id = ? AND quantity >= ? RETURNING quantity",
+                (qty, stamp, pid, qty),
+            )
+            row = cur.fetchone()
+            if row is None:
+                raise _stock_shortfall(cur, lines, taken)
+            taken[pid] = taken.get(pid, 0) + qty
+            left = stock[pid] = row[0]
+            # only the sale that crosses the threshold reports it
+            if left < LOW_STOCK_THRESHOLD <= left + qty:
+                low_stock.append((pid, name, left))
+
+        receipt_no = next_receipt_no(cur)
+        cur.execute(
+            """
+            INSERT INTO receipts (receipt_no, created_at, staff_username, customer_name,
+                                  subtotal, discount, tax, total, tendered, change)
+            VALUES (?,?,?,?,?,?,?,?,?,?)
+            """,
+            (receipt_no, stamp, username, customer, subtotal, discount, tax, total, tendered, change),
+        )
+        rid = cur.lastrowid
+
+        cur.executemany(
+            "INSERT INTO receipt_items (receipt_id, pastry_id, name, unit_price, qty, line_total) VALUES (?,?,?,?,?,?)",
+            [(rid, pid, name, price, qty, line_total) for pid, name, price, qty, line_total in lines],
+        )
+        # daily rollups for reports, kept in the same transaction
+        day = stamp[:10]
+        cur.executemany(
+            """
+            INSERT INTO daily_item_sales (day, pastry_id, name, qty, revenue, receipt_count)
+            VALUES (?,?,?,?,?,1)
+            ON CONFLICT (day, pastry_id, name) DO UPDATE SET
+                qty = qty + excluded.qty,
+                revenue = revenue + excluded.revenue,
+                receipt_count = receipt_count + 1
+            """,
+            [(day, pid, name, qty, line_total) for pid, name, price, qty, line_total in lines],
+        )
+        cur.execute(
+            """
+            INSERT INTO daily_sales (day, receipt_count, total) VALUES (?,1,?)
+            ON CONFLICT (day) DO UPDATE SET
+                receipt_count = receipt_count + 1,
+                total = total + excluded.total
+            """,
+            (day, total),
+        )
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+    return CheckoutResult(receipt_no, rid, stamp, stock, low_stock)
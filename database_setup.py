@@ -1,7 +1,23 @@
-from utils import db_connect, hash_pw
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
 
-def init_db():
-    con = db_connect()
+from utils import DB_POOL, db_connect, hash_pw, day_range
+from queries import LOW_STOCK_INDEX, REPORT_QUERIES, STOCK_QUERIES
+
+def sync_receipt_counter(cur):
+    """Make sure the receipt_no counter is at least the highest stored receipt."""
+    cur.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('receipt_no', 1000)")
+    cur.execute("""
+        UPDATE counters
+        SET value = MAX(value, (SELECT COALESCE(MAX(receipt_no), 1000) FROM receipts))
+        WHERE name = 'receipt_no'
+    """)
+
+def init_db(path=None):
+    con = db_connect(path)
     cur = con.cursor()
 
     # Users
@@ -28,20 +44,6 @@ def init_db():
         )
     """)
 
-    # Legacy Sales
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS sales (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            pastry_id INTEGER NOT NULL,
-            qty INTEGER NOT NULL,
-            unit_price REAL NOT NULL,
-            total REAL NOT NULL,
-            sale_time TEXT DEFAULT CURRENT_TIMESTAMP,
-            staff_username TEXT NOT NULL,
-            FOREIGN KEY (pastry_id) REFERENCES pastries(id)
-        )
-    """)
-
     # Receipts
     cur.execute("""
         CREATE TABLE IF NOT EXISTS receipts (
@@ -74,6 +76,43 @@ def init_db():
         )
     """)
 
+    # Named counters (receipt numbers are allocated from here)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    """)
+    sync_receipt_counter(cur)
+
+    # Daily rollups maintained by checkout, read by weekly/monthly reports
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS daily_item_sales (
+            day TEXT NOT NULL,
+            pastry_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            qty INTEGER NOT NULL,
+            revenue REAL NOT NULL,
+            receipt_count INTEGER NOT NULL,
+            PRIMARY KEY (day, pastry_id, name)
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS daily_sales (
+            day TEXT PRIMARY KEY,
+            receipt_count INTEGER NOT NULL,
+            total REAL NOT NULL
+        )
+    """)
+
+    # Indexes for report range filters, receipt joins and name lookups
+    cur.execute("DROP INDEX IF EXISTS idx_receipts_created_at")  # superseded by the keyset index
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_receipts_created_receipt ON receipts(created_at, receipt_no)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_receipt_items_receipt_id ON receipt_items(receipt_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_receipt_items_pastry_id ON receipt_items(pastry_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_pastries_name ON pastries(name COLLATE NOCASE)")
+    ensure_low_stock_index(cur)
+
     # Seed admin account if none exists
     cur.execute("SELECT COUNT(*) FROM users")
     if cur.fetchone()[0] == 0:
@@ -83,4 +122,221 @@ def init_db():
         )
 
     con.commit()
+    migrate(con)
     con.close()
+
+
+def ensure_low_stock_index(cur):
+    """(Re)create the partial low-stock index if its threshold differs."""
+    cur.execute("SELECT sql FROM sqlite_master WHERE type='index' AND name='idx_pastries_low_stock'")
+    row = cur.fetchone()
+    if row and row[0].strip() == LOW_STOCK_INDEX.strip():
+        return
+    cur.execute("DROP INDEX IF EXISTS idx_pastries_low_stock")
+    cur.execute(LOW_STOCK_INDEX)
+
+
+# -------------------- Migrations --------------------
+# PRAGMA user_version records which one-off data migrations have run.
+SALES_VIEW = """
+    CREATE VIEW IF NOT EXISTS sales AS
+    SELECT ri.id AS id, ri.pastry_id AS pastry_id, ri.qty AS qty, ri.unit_price AS unit_price,
+           ri.line_total AS total, r.created_at AS sale_time, r.staff_username AS staff_username,
+           ri.name AS name
+    FROM receipt_items ri
+    JOIN receipts r ON r.id = ri.receipt_id
+"""
+
+def migrate(con):
+    version = con.execute("PRAGMA user_version").fetchone()[0]
+    if version < 1:
+        backfill_rollups(con)
+        con.execute("PRAGMA user_version = 1")
+        con.commit()
+    if version < 2:
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            moved = retire_legacy_sales(con)
+            if moved:
+                backfill_rollups(con, commit=False)
+            con.execute("PRAGMA user_version = 2")
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+    if version < 3:
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            add_sku_column(con)
+            con.execute("PRAGMA user_version = 3")
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+
+def add_sku_column(con):
+    """Give pastries an optional ``sku`` (barcode), unique when set."""
+    cols = {row[1] for row in con.execute("PRAGMA table_info(pastries)")}
+    if "sku" not in cols:
+        con.execute("ALTER TABLE pastries ADD COLUMN sku TEXT")
+    # partial: any number of pastries may still have no barcode
+    con.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_pastries_sku ON pastries(sku) WHERE sku IS NOT NULL")
+
+def retire_legacy_sales(con):
+    """Replace the legacy ``sales`` table with a read-only view over
+    receipt_items.
+
+    Sales rows with no matching receipt line (same pastry, qty, price and
+    cashier, written within a few seconds of the receipt) are first copied
+    into receipts/receipt_items, one receipt per (cashier, sale_time).
+    Returns the number of rows copied.
+    """
+    cur = con.cursor()
+    kind = cur.execute("SELECT type FROM sqlite_master WHERE name = 'sales'").fetchone()
+    moved = 0
+    if kind and kind[0] == "table":
+        cur.execute("""
+            SELECT s.staff_username, s.sale_time, s.pastry_id,
+                   COALESCE(p.name, 'Pastry #' || s.pastry_id), s.unit_price, s.qty, s.total
+            FROM sales s
+            LEFT JOIN pastries p ON p.id = s.pastry_id
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM receipt_items ri
+                JOIN receipts r ON r.id = ri.receipt_id
+                WHERE ri.pastry_id = s.pastry_id AND ri.qty = s.qty
+                  AND abs(ri.unit_price - s.unit_price) < 0.005
+                  AND r.staff_username = s.staff_username
+                  AND abs(julianday(r.created_at) - julianday(s.sale_time)) * 86400 <= 5
+            )
+            ORDER BY s.sale_time, s.id
+        """)
+        orphans = {}
+        for staff, sale_time, pid, name, price, qty, total in cur.fetchall():
+            orphans.setdefault((staff, sale_time), []).append((pid, name, price, qty, total))
+        sync_receipt_counter(cur)
+        for (staff, sale_time), lines in orphans.items():
+            cur.execute("UPDATE counters SET value = value + 1 WHERE name = 'receipt_no'")
+            receipt_no = cur.execute("SELECT value FROM counters WHERE name = 'receipt_no'").fetchone()[0]
+            amount = sum(line[4] for line in lines)
+            cur.execute(
+                "INSERT INTO receipts (receipt_no, created_at, staff_username, customer_name, subtotal, discount, tax, total, tendered, change) "
+                "VALUES (?,?,?,NULL,?,0,0,?,?,0)",
+                (receipt_no, sale_time, staff, amount, amount, amount),
+            )
+            rid = cur.lastrowid
+            cur.executemany(
+                "INSERT INTO receipt_items (receipt_id, pastry_id, name, unit_price, qty, line_total) VALUES (?,?,?,?,?,?)",
+                [(rid, pid, name, price, qty, total) for pid, name, price, qty, total in lines],
+            )
+            moved += len(lines)
+        cur.execute("DROP TABLE sales")
+    cur.execute(SALES_VIEW)
+    return moved
+
+def backfill_rollups(con, date_from=None, date_to=None, commit=True):
+    """Rebuild daily_item_sales/daily_sales from receipts, for all days or
+    for the given YYYY-MM-DD range (inclusive). Returns days rebuilt."""
+    start, end = day_range(date_from, date_to) if date_from else ("0000-00-00", "9999-99-99")
+    cur = con.cursor()
+    cur.execute("DELETE FROM daily_item_sales WHERE day >= ? AND day < ?", (start, end))
+    cur.execute("DELETE FROM daily_sales WHERE day >= ? AND day < ?", (start, end))
+    cur.execute("""
+        INSERT INTO daily_item_sales (day, pastry_id, name, qty, revenue, receipt_count)
+        SELECT substr(r.created_at, 1, 10), ri.pastry_id, ri.name,
+               SUM(ri.qty), SUM(ri.line_total), COUNT(DISTINCT r.id)
+        FROM receipts r
+        JOIN receipt_items ri ON ri.receipt_id = r.id
+        WHERE r.created_at >= ? AND r.created_at < ?
+        GROUP BY substr(r.created_at, 1, 10), ri.pastry_id, ri.name
+    """, (start, end))
+    cur.execute("""
+        INSERT INTO daily_sales (day, receipt_count, total)
+        SELECT substr(created_at, 1, 10), COUNT(*), SUM(total)
+        FROM receipts
+        WHERE created_at >= ? AND created_at < ?
+        GROUP BY substr(created_at, 1, 10)
+    """, (start, end))
+    days = cur.rowcount
+    if commit:
+        con.commit()
+    return days
+
+
+# -------------------- Query plan check --------------------
+def report_query_plans(con, date_from, date_to):
+    """Return {query name: [plan detail lines]} for every report and stock query."""
+    params = day_range(date_from, date_to)
+    plans = {}
+    for name, (sql, extra) in REPORT_QUERIES.items():
+        rows = con.execute("EXPLAIN QUERY PLAN " + sql, params + tuple(extra)).fetchall()
+        plans[name] = [row[-1] for row in rows]
+    for name, sql in STOCK_QUERIES.items():
+        plans[name] = [row[-1] for row in con.execute("EXPLAIN QUERY PLAN " + sql)]
+    return plans
+
+def full_scans(plans):
+    """List (query, detail) pairs where a report falls back to a full scan."""
+    return [
+        (name, detail)
+        for name, details in plans.items()
+        for detail in details
+        if detail.startswith("SCAN ") and not detail.startswith("SCAN CONSTANT")
+    ]
+
+def _seed_year_of_receipts(con, receipts_per_day=40):
+    cur = con.cursor()
+    names = [f"Pastry {i}" for i in range(30)]
+    cur.executemany(
+        "INSERT INTO pastries (name, category, price, quantity) VALUES (?,?,?,?)",
+        [(n, "Other", 25.0, 100) for n in names],
+    )
+    rnd = random.Random(7)
+    start = datetime.now() - timedelta(days=365)
+    receipt_no = 1000
+    for day in range(366):
+        for _ in range(receipts_per_day):
+            receipt_no += 1
+            ts = start + timedelta(days=day, seconds=rnd.randrange(8 * 3600, 20 * 3600))
+            cur.execute(
+                "INSERT INTO receipts (receipt_no, created_at, staff_username, subtotal, discount, tax, total, tendered, change) "
+                "VALUES (?,?,?,?,?,?,?,?,?)",
+                (receipt_no, ts.strftime("%Y-%m-%d %H:%M:%S"), "admin", 50.0, 0.0, 3.0, 51.5, 60.0, 8.5),
+            )
+            rid = cur.lastrowid
+            cur.executemany(
+                "INSERT INTO receipt_items (receipt_id, pastry_id, name, unit_price, qty, line_total) VALUES (?,?,?,?,?,?)",
+                [(rid, pid + 1, names[pid], 25.0, 2, 50.0) for pid in rnd.sample(range(len(names)), 3)],
+            )
+    con.commit()
+    backfill_rollups(con)
+    cur.execute("ANALYZE")
+
+def check_report_query_plans():
+    """Build a year of receipts in a scratch database and verify no report
+    query plan contains a full table scan. Returns True when all are indexed."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "plan_check.db")
+        init_db(path)
+        con = db_connect(path)
+        _seed_year_of_receipts(con)
+        today = datetime.now().date()
+        plans = report_query_plans(con, (today - timedelta(days=30)).isoformat(), today.isoformat())
+        DB_POOL.release(path)
+    for name, details in plans.items():
+        print(f"{name}:")
+        for detail in details:
+            print(f"    {detail}")
+    scans = full_scans(plans)
+    for name, detail in scans:
+        print(f"FULL SCAN in {name}: {detail}")
+    return not scans
+
+if __name__ == "__main__":
+    if "--check-plans" in sys.argv[1:]:
+        sys.exit(0 if check_report_query_plans() else 1)
+    init_db()
+    if "--backfill-rollups" in sys.argv[1:]:
+        con = db_connect()
+        print(f"Rebuilt sales rollups for {backfill_rollups(con)} days.")
+        con.close()
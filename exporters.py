@@ -0,0 +1,91 @@
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+
+from utils import db_connect, day_range
+from queries import LINE_ITEM_COLUMNS, LINE_ITEMS_IN_RANGE
+
+# -------------------- Streaming line-item export --------------------
+EXPORT_BATCH_ROWS = 1000
+EXPORT_FORMATS = ("csv", "jsonl")
+
+
+def iter_line_items(date_from, date_to, batch=EXPORT_BATCH_ROWS, db_path=None):
+    """Yield receipt line rows in the date range, ``batch`` rows per fetch."""
+    con = db_connect(db_path)
+    try:
+        cur = con.execute(LINE_ITEMS_IN_RANGE, day_range(date_from, date_to))
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        con.close()
+
+def write_csv(rows, fh):
+    writer = csv.writer(fh)
+    writer.writerow(LINE_ITEM_COLUMNS)
+    n = 0
+    for n, row in enumerate(rows, 1):
+        writer.writerow(row)
+    return n
+
+def write_jsonl(rows, fh):
+    n = 0
+    for n, row in enumerate(rows, 1):
+        fh.write(json.dumps(dict(zip(LINE_ITEM_COLUMNS, row)), ensure_ascii=False))
+        fh.write("\n")
+    return n
+
+def _counted(rows, progress, every):
+    start = time.perf_counter()
+    for n, row in enumerate(rows, 1):
+        yield row
+        if progress and n % every == 0:
+            progress(n, n / (time.perf_counter() - start))
+
+def export_line_items(path, date_from, date_to, fmt=None, progress=None, db_path=None):
+    """Stream every receipt line in the range to ``path`` as CSV or JSONL.
+
+    Memory use is one fetch batch regardless of the row count.
+    ``progress(rows, rows_per_second)`` is called every EXPORT_BATCH_ROWS rows.
+    Returns (rows written, seconds).
+    """
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r} (use csv or jsonl)")
+    start = time.perf_counter()
+    rows = _counted(iter_line_items(date_from, date_to, db_path=db_path), progress, EXPORT_BATCH_ROWS)
+    with open(path, "w", newline="" if fmt == "csv" else None, encoding="utf-8") as fh:
+        n = write_csv(rows, fh) if fmt == "csv" else write_jsonl(rows, fh)
+    return n, time.perf_counter() - start
+
+
+# -------------------- Command line --------------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export receipt line items to CSV or JSONL.")
+    ap.add_argument("out", help="output file (.csv or .jsonl), '-' for stdout")
+    ap.add_argument("--from", dest="date_from", required=True, help="first day, YYYY-MM-DD")
+    ap.add_argument("--to", dest="date_to", help="last day, YYYY-MM-DD (default: --from)")
+    ap.add_argument("--format", choices=EXPORT_FORMATS, help="default: from the file extension")
+    ap.add_argument("--db", default=None, help="database file (default: utils.DB_PATH)")
+    args = ap.parse_args(argv)
+    date_to = args.date_to or args.date_from
+
+    if args.out == "-":
+        start = time.perf_counter()
+        rows = iter_line_items(args.date_from, date_to, db_path=args.db)
+        n = write_jsonl(rows, sys.stdout) if args.format == "jsonl" else write_csv(rows, sys.stdout)
+        seconds = time.perf_counter() - start
+    else:
+        n, seconds = export_line_items(args.out, args.date_from, date_to, args.format, db_path=args.db)
+    rate = n / seconds if seconds else 0.0
+    print(f"{n} rows in {seconds:.2f}s ({rate:,.0f} rows/s)", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+import csv
+import sys
+import time
+import sqlite3
+import argparse
+
+from utils import begin_immediate, db_connect, now_iso, retry_on_lock
+from categories import CATEGORY_ITEMS
+from pos_service import PosError, validate_pastry
+
+# -------------------- Bulk inventory import / restock --------------------
+IMPORT_COLUMNS = ("name", "category", "price", "quantity")    # plus optional "sku"
+COLUMN_ALIASES = {"qty": "quantity", "barcode": "sku"}
+
+# category (casefolded) -> (category, {product (casefolded): product})
+_PRODUCTS = {
+    cat.casefold(): (cat, {name.casefold(): name for name in names})
+    for cat, names in CATEGORY_ITEMS.items()
+}
+
+
+class ImportRow:
+    __slots__ = ("line", "name", "category", "price", "quantity", "sku")
+
+    def __init__(self, line, name, category, price, quantity, sku=None):
+        self.line = line
+        self.name = name
+        self.category = category
+        self.price = price
+        self.quantity = quantity
+        self.sku = sku
+
+
+class ImportResult:
+    __slots__ = ("rows", "errors", "inserted", "updated", "validate_seconds", "apply_seconds")
+
+    def __init__(self, rows, errors, validate_seconds):
+        self.rows = rows                    # valid ImportRows
+        self.errors = errors                # (line, name, message)
+        self.inserted = 0
+        self.updated = 0
+        self.validate_seconds = validate_seconds
+        self.apply_seconds = 0.0
+
+    def summary(self):
+        return (f"{self.inserted} added, {self.updated} updated, {len(self.errors)} rejected "
+                f"(validated in {self.validate_seconds * 1000:.1f} ms, "
+                f"applied in {self.apply_seconds * 1000:.1f} ms)")
+
+
+def _parse_row(raw):
+    """Normalise one CSV record to (name, category, price, quantity); raises PosError."""
+    name = (raw.get("name") or "").strip()
+    category = (raw.get("category") or "").strip()
+    try:
+        price = float(raw.get("price") or "")
+        quantity = int(raw.get("quantity") or "")
+    except ValueError:
+        raise PosError("Invalid Input", "price and quantity must be numbers (quantity a whole number)")
+    known = _PRODUCTS.get(category.casefold())
+    if category and known is None:
+        raise PosError("Invalid Category", f"unknown category {category!r}")
+    if known is not None:
+        category = known[0]
+        if name and name.casefold() not in known[1]:
+            raise PosError("Invalid Name", f"{name!r} is not a {category} product")
+        name = known[1].get(name.casefold(), name)
+    validate_pastry(name, category, price, quantity)
+    return name, category, price, quantity
+
+def validate_inventory_csv(fh):
+    """Check every row of an inventory CSV in one pass.
+
+    Columns: name, category, price, quantity (``qty`` also accepted, any
+    order, header required) and optionally sku/barcode; a blank sku leaves
+    the current barcode alone. Rows must name a CATEGORY_ITEMS product in
+    its category and follow the PastryForm price/quantity rules; a name
+    or sku may appear only once per file. Returns an ImportResult holding the
+    valid rows and a (line, name, message) entry per rejected row.
+    """
+    start = time.perf_counter()
+    reader = csv.DictReader(fh)
+    header = [COLUMN_ALIASES.get(h.strip().lower(), h.strip().lower()) for h in (reader.fieldnames or [])]
+    missing = [c for c in IMPORT_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+    reader.fieldnames = header
+    rows, errors, seen, seen_sku = [], [], {}, {}
+    for raw in reader:
+        line = reader.line_num
+        name = (raw.get("name") or "").strip()
+        try:
+            name, category, price, quantity = _parse_row(raw)
+        except PosError as e:
+            errors.append((line, name, str(e)))
+            continue
+        first = seen.setdefault(name.casefold(), line)
+        if first != line:
+            errors.append((line, name, f"duplicate of line {first}"))
+            continue
+        sku = (raw.get("sku") or "").strip() or None
+        if sku:
+            first = seen_sku.setdefault(sku, line)
+            if first != line:
+                errors.append((line, name, f"barcode {sku} also on line {first}"))
+                continue
+        rows.append(ImportRow(line, name, category, price, quantity, sku))
+    return ImportResult(rows, errors, time.perf_counter() - start)
+
+def apply_inventory(result, restock=False, db_path=None, strict=False):
+    """Upsert the validated rows in one BEGIN IMMEDIATE transaction.
+
+    Rows are matched to existing pastries by case-insensitive name; matches
+    are updated, the rest inserted. With ``restock`` the file's quantity is
+    added to the current stock instead of replacing it. A row whose barcode
+    belongs to a pastry the file does not also re-barcode is rejected
+    (added to ``result.errors``); with ``strict`` that writes nothing.
+    Fills in ``result.inserted/updated/apply_seconds`` and returns ``result``.
+    """
+    start = time.perf_counter()
+    con = db_connect(db_path)
+    try:
+        retry_on_lock(_apply_once, con, result, restock, strict)
+    finally:
+        con.close()
+    result.apply_seconds = time.perf_counter() - start
+    return result
+
+def _sku_conflicts(rows, ids, sku_of):
+    """Lines of rows whose sku another pastry keeps, as {line: message}.
+
+    A barcode may move between pastries named in the file (a swap, say),
+    so holders that are themselves re-barcoded do not count; rejecting a
+    row can pin its pastry's old barcode, hence the loop to a fixed point.
+    """
+    owner = {sku: pid for pid, sku in sku_of.items() if sku}
+    rejected = {}
+    while True:
+        moving = set()
+        for r in rows:
+            pid = ids.get(r.name.casefold())
+            if r.sku and r.line not in rejected and pid is not None and sku_of.get(pid) != r.sku:
+                moving.add(pid)
+        found = False
+        for r in rows:
+            if not r.sku or r.line in rejected:
+                continue
+            holder = owner.get(r.sku)
+            if holder is not None and holder != ids.get(r.name.casefold()) and holder not in moving:
+                rejected[r.line] = f"barcode {r.sku} is already used by another pastry"
+                found = True
+        if not found:
+            return rejected, moving
+
+def _apply_once(con, result, restock, strict):
+    stamp = now_iso()
+    cur = con.cursor()
+    begin_immediate(cur)
+    try:
+        # read names and barcodes inside the write lock so another till's changes are seen
+        ids, sku_of = {}, {}
+        for pid, name, sku in cur.execute("SELECT id, name, sku FROM pastries"):
+            ids[name.casefold()] = pid
+            sku_of[pid] = sku
+        rejected, moving = _sku_conflicts(result.rows, ids, sku_of)
+        if rejected and strict:
+            con.rollback()
+            result.errors.extend((r.line, r.name, rejected[r.line]) for r in result.rows if r.line in rejected)
+            return
+        updates, inserts = [], []
+        for r in result.rows:
+            if r.line in rejected:
+                continue
+            pid = ids.get(r.name.casefold())
+            if pid is None:
+                inserts.append((r.name, r.category, r.price, r.quantity, stamp, stamp, r.sku))
+            else:
+                updates.append((r.name, r.category, r.price, r.quantity, stamp, r.sku, pid))
+        # free moving barcodes first; the unique index is checked row by row
+        cur.executemany("UPDATE pastries SET sku = NULL WHERE id = ?", [(pid,) for pid in moving])
+        quantity = "quantity + ?" if restock else "?"
+        cur.executemany(
+            f"UPDATE pastries SET name=?, category=?, price=?, quantity={quantity}, last_updated=?, "
+            "sku=COALESCE(?, sku) WHERE id=?",
+            updates,
+        )
+        cur.executemany(
+            "INSERT INTO pastries (name, category, price, quantity, date_added, last_updated, sku) VALUES (?,?,?,?,?,?,?)",
+            inserts,
+        )
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+    result.errors.extend((r.line, r.name, rejected[r.line]) for r in result.rows if r.line in rejected)
+    result.inserted, result.updated = len(inserts), len(updates)
+
+def import_inventory(path, restock=False, strict=False, dry_run=False, db_path=None):
+    """Validate ``path`` and apply its valid rows; see validate_inventory_csv.
+
+    With ``strict`` nothing is written if any row was rejected.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        result = validate_inventory_csv(fh)
+    if dry_run or (strict and result.errors) or not result.rows:
+        return result
+    return apply_inventory(result, restock, db_path, strict)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Import or restock MambaMunchies inventory from a CSV file.")
+    ap.add_argument("csv", help="columns: name, category, price, quantity[, sku]")
+    ap.add_argument("--restock", action="store_true", help="add quantities to current stock instead of replacing it")
+    ap.add_argument("--strict", action="store_true", help="write nothing if any row is rejected")
+    ap.add_argument("--dry-run", action="store_true", help="validate only")
+    ap.add_argument("--db", help="database file (default: the app database)")
+    args = ap.parse_args(argv)
+
+    try:
+        result = import_inventory(args.csv, args.restock, args.strict, args.dry_run, args.db)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    for line, name, message in result.errors:
+        print(f"line {line}: {name or '(no name)'}: {message}", file=sys.stderr)
+    if args.dry_run:
+        print(f"{len(result.rows)} valid, {len(result.errors)} rejected (dry run, nothing written)")
+    elif args.strict and result.errors:
+        print(f"{len(result.errors)} row(s) rejected; nothing written (--strict)")
+    else:
+        print(result.summary())
+    return 1 if result.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,13 @@
 ﻿import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
 
+from thumbnails import ThumbnailCache
 from utils import db_connect, hash_pw
 
+LOGIN_LOGO_SIZE = (120, 120)
+
 class LoginWindow(tk.Tk):
-    def __init__(self):
+    def __init__(self, thumbs=None):
         super().__init__()
         self.title("🍰 MambaMunchies — Login")
         self.geometry("500x450")
@@ -20,11 +22,12 @@ class LoginWindow(tk.Tk):
         )
         title.pack(pady=(25, 5))
 
+        # pre-scaled copy from the thumbnail cache; the 250 KB JPEG is decoded once
+        thumbs = thumbs or ThumbnailCache(".thumbcache")
         try:
-            logo_img = Image.open("logo.jpg").resize((120, 120))
-            self.logo_photo = ImageTk.PhotoImage(logo_img)
+            self.logo_photo = thumbs.photo("logo.jpg", LOGIN_LOGO_SIZE)
             ttk.Label(self, image=self.logo_photo).pack(pady=6)
-        except FileNotFoundError:
+        except OSError:
             ttk.Label(self, text="[Logo Missing]").pack(pady=6)
 
         self.user = tk.StringVar()
@@ -1,6 +1,6 @@
 ﻿import tkinter as tk
 from tkinter import ttk, messagebox
-from utils import db_connect, now_iso
+from pos_service import PosError
 from categories import CATEGORY_ITEMS
 from colors import COL_BG
 
@@ -8,9 +8,10 @@ class PastryForm(tk.Toplevel):
     def __init__(self, master, pastry_id=None):
         super().__init__(master)
         self.master = master
+        self.pos = master.pos
         self.pastry_id = pastry_id
         self.title("🍰 Add / Edit Pastry")
-        self.geometry("400x360")
+        self.geometry("400x410")
         self.configure(bg=COL_BG)
         self.resizable(False, False)
 
@@ -19,6 +20,7 @@ class PastryForm(tk.Toplevel):
         self.name = tk.StringVar()
         self.price = tk.DoubleVar(value=5.00)
         self.qty = tk.IntVar(value=1)
+        self.sku = tk.StringVar()
 
         # ---------------- Header ----------------
         ttk.Label(self, text="Pastry Details", font=("Segoe UI", 12, "bold")).pack(pady=(10, 5))
@@ -43,6 +45,10 @@ class PastryForm(tk.Toplevel):
         ttk.Label(self, text="Quantity:").pack(pady=4)
         ttk.Entry(self, textvariable=self.qty).pack(fill="x", padx=40)
 
+        # ---------------- Barcode ----------------
+        ttk.Label(self, text="Barcode / SKU (optional):").pack(pady=4)
+        ttk.Entry(self, textvariable=self.sku).pack(fill="x", padx=40)
+
         # ---------------- Buttons ----------------
         btn_frame = ttk.Frame(self)
         btn_frame.pack(pady=15)
@@ -67,19 +73,15 @@ class PastryForm(tk.Toplevel):
 
     # --------------------------------------------------------
     def load_existing(self):
-        con = db_connect()
-        cur = con.cursor()
-        cur.execute("SELECT name, category, price, quantity FROM pastries WHERE id=?", (self.pastry_id,))
-        row = cur.fetchone()
-        con.close()
-
-        if row:
-            self.name.set(row[0])
-            self.category.set(row[1])
-            self.price.set(row[2])
-            self.qty.set(row[3])
+        p = self.pos.catalog.get(self.pastry_id)
+        if p:
+            self.name.set(p.name)
+            self.category.set(p.category)
+            self.price.set(p.price)
+            self.qty.set(p.quantity)
+            self.sku.set(p.sku or "")
             self.update_products()
-            self.name_cb.set(row[0])
+            self.name_cb.set(p.name)
 
     # --------------------------------------------------------
     def save_pastry(self):
@@ -95,53 +97,14 @@ class PastryForm(tk.Toplevel):
             self.destroy()
             return
 
-        if not category:
-            messagebox.showwarning("Missing Category", "Please select a category.")
-            self.destroy()
-            return
-        if not name:
-            messagebox.showwarning("Missing Name", "Please select a pastry name.")
-            self.destroy()
-            return
-        if price_val < 5 or price_val > 500:
-            messagebox.showerror("Invalid Price", "Price must be between ₱5.00 and ₱500.00.")
-            self.destroy()
-            return
-        if qty_val < 1 or qty_val > 100:
-            messagebox.showerror("Invalid Quantity", "Quantity must be between 1 and 100.")
+        # ---------------- Rules + Database Save ----------------
+        try:
+            self.pos.save_pastry(self.pastry_id, name, category, price_val, qty_val, self.sku.get())
+        except PosError as e:
+            messagebox.showwarning(e.title, str(e))
             self.destroy()
             return
 
-        # ---------------- Database Save ----------------
-        con = db_connect()
-        cur = con.cursor()
-
-        if not self.pastry_id:
-            cur.execute("SELECT id FROM pastries WHERE name=? COLLATE NOCASE", (name,))
-            existing = cur.fetchone()
-            if existing:
-                messagebox.showwarning("Duplicate Item", f"'{name}' already exists in the inventory.")
-                self.destroy()
-                con.close()
-                return
-
-            # Insert new record
-            cur.execute("""
-                INSERT INTO pastries (name, category, price, quantity, date_added, last_updated)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (name, category, price_val, qty_val, now_iso(), now_iso()))
-
-        else:
-            # Update existing record
-            cur.execute("""
-                UPDATE pastries
-                SET name=?, category=?, price=?, quantity=?, last_updated=?
-                WHERE id=?
-            """, (name, category, price_val, qty_val, now_iso(), int(self.pastry_id)))
-
-        con.commit()
-        con.close()
-
         messagebox.showinfo("Success", f"'{name}' saved successfully!")
         self.destroy()
 
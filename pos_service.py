@@ -0,0 +1,302 @@
+import sqlite3
+
+from utils import begin_immediate, db_connect, day_range, now_iso, retry_on_lock
+from catalog import CATALOG, PastryCatalog
+from cart import Cart, TAX_RATE_BP, from_cents, to_cents
+from checkout import CheckoutError, checkout
+from reports import iter_sales, sales_summary, summarize_sales
+from queries import (RECEIPTS_PAGE_FIRST, RECEIPTS_PAGE_AFTER, ITEM_SALES_IN_RANGE,
+                     RECEIPT_COUNT_IN_RANGE, RECEIPT_TOTALS_IN_RANGE, LOW_STOCK_ITEMS)
+
+# -------------------- Business rules --------------------
+MAX_QTY_PER_PRODUCT = 10
+PRICE_MIN, PRICE_MAX = 5, 500
+QTY_MIN, QTY_MAX = 1, 100
+
+
+class PosError(Exception):
+    """An action refused by a business rule; ``title`` names the rule for
+    the UI and str() is the message shown to the cashier."""
+
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+
+
+class CartTotals:
+    __slots__ = ("subtotal", "discount", "tax", "total", "tendered", "change")
+
+    def __init__(self, subtotal, discount, tax, total, tendered, change):
+        self.subtotal = subtotal
+        self.discount = discount
+        self.tax = tax
+        self.total = total
+        self.tendered = tendered
+        self.change = change
+
+
+def validate_pastry(name, category, price, qty):
+    """Check an inventory row against the form rules; raises PosError."""
+    if not category:
+        raise PosError("Missing Category", "Please select a category.")
+    if not name:
+        raise PosError("Missing Name", "Please select a pastry name.")
+    if price < PRICE_MIN or price > PRICE_MAX:
+        raise PosError("Invalid Price", f"Price must be between ₱{PRICE_MIN:.2f} and ₱{PRICE_MAX:.2f}.")
+    if qty < QTY_MIN or qty > QTY_MAX:
+        raise PosError("Invalid Quantity", f"Quantity must be between {QTY_MIN} and {QTY_MAX}.")
+
+
+# -------------------- POS service --------------------
+class PosService:
+    """Catalog, cart, checkout, report and inventory logic for one till.
+
+    No tkinter here: the App and PastryForm windows only translate widget
+    state into these calls and PosError into message boxes, so the same
+    code runs headless from benchmarks and batch scripts. ``db_path``
+    selects the database file; the default shares the process-wide CATALOG.
+    """
+
+    def __init__(self, username, role="Staff", db_path=None, catalog=None):
+        self.username = username
+        self.role = role
+        self.db_path = db_path
+        if catalog is None:
+            catalog = CATALOG if db_path is None else PastryCatalog(db_path)
+        self.catalog = catalog
+        self.cart = Cart()
+        self.last_receipt_no = None
+
+    # ---- catalog ----
+    def products(self, category="All", query=""):
+        """Pastries ordered by name, filtered by category and search terms."""
+        return self.catalog.search(query, category)
+
+    def reload_catalog(self):
+        """Drop cached stock so the next read sees other tills' sales."""
+        self.catalog.invalidate()
+
+    # ---- cart ----
+    def _check_qty(self, p, name, qty):
+        if qty > MAX_QTY_PER_PRODUCT:
+            raise PosError("Quantity limit", f"Cannot have more than {MAX_QTY_PER_PRODUCT} units per product.")
+        stock = p.quantity if p else 0
+        if qty > stock:
+            raise PosError("Stock", f"Not enough stock for {name}. Available: {stock}.")
+
+    def add_to_cart(self, pastry_id, qty=1):
+        """Add ``qty`` of a pastry; returns the cart line (None if unknown)."""
+        p = self.catalog.get(pastry_id)
+        if p is None:
+            return None
+        self._check_qty(p, p.name, self.cart.qty_of(p.id) + qty)
+        return self.cart.add(p.id, p.name, p.price, qty)
+
+    def scan(self, code, qty=1):
+        """Add the pastry with barcode ``code`` to the cart (same limits as
+        add_to_cart); returns the cart line."""
+        code = code.strip()
+        p = self.catalog.find_sku(code) if code else None
+        if p is None:
+            raise PosError("Scan", f"Unknown barcode: {code or '(empty)'}")
+        return self.add_to_cart(p.id, qty)
+
+    def set_cart_qty(self, pastry_id, qty):
+        """Set a line's quantity (0 removes it); increases are limit-checked."""
+        line = self.cart.get(pastry_id)
+        if line is None:
+            return None
+        if qty > line.qty:
+            self._check_qty(self.catalog.get(pastry_id), line.name, qty)
+        return self.cart.set_qty(pastry_id, qty)
+
+    def remove_from_cart(self, pastry_id):
+        self.cart.remove(pastry_id)
+
+    def clear_cart(self):
+        self.cart.clear()
+
+    def set_discount(self, discount_type):
+        self.cart.discount_type = discount_type
+
+    def totals(self, tendered_cents=0):
+        cart = self.cart
+        return CartTotals(
+            from_cents(cart.subtotal_cents), from_cents(cart.discount_cents), from_cents(cart.tax_cents),
+            from_cents(cart.total_cents), from_cents(tendered_cents),
+            from_cents(max(0, tendered_cents - cart.total_cents)),
+        )
+
+    # ---- checkout ----
+    def checkout(self, tendered, customer=None):
+        """Charge the cart; ``tendered`` is in pesos. Returns CheckoutResult,
+        whose ``low_stock`` lists the items this sale took below the threshold.
+
+        Raises PosError for an empty cart or short payment, CheckoutError or
+        sqlite3.Error if the sale could not be recorded (stock is then
+        re-read on next use, since another till may have sold it).
+        """
+        cart = self.cart
+        if not cart:
+            raise PosError("Cart", "Cart is empty.")
+        tender_cents = to_cents(tendered or 0)
+        if tender_cents < cart.total_cents:
+            raise PosError("Payment", "Tendered amount is less than total.")
+        totals = self.totals(tender_cents)
+        lines = [(l.pastry_id, l.name, from_cents(l.unit_cents), l.qty, from_cents(l.line_cents)) for l in cart]
+        con = db_connect(self.db_path)
+        try:
+            # receipts have always stored the tax rate (percent) in this column
+            res = checkout(con, self.username, (customer or "").strip() or None, lines,
+                           totals.subtotal, totals.discount, TAX_RATE_BP / 100, totals.total,
+                           totals.tendered, totals.change)
+        except (CheckoutError, sqlite3.Error):
+            self.reload_catalog()
+            raise
+        finally:
+            con.close()
+        for pid, name, price, qty, line_total in lines:
+            self.catalog.apply_sale(pid, qty, res.created_at, res.stock[pid])
+        self.last_receipt_no = res.receipt_no
+        cart.clear()
+        return res
+
+    # ---- reports ----
+    def receipt_totals(self, date_from, date_to):
+        """(receipt count, total) for the YYYY-MM-DD range, from the rollup."""
+        con = db_connect(self.db_path)
+        try:
+            return con.execute(RECEIPT_TOTALS_IN_RANGE, day_range(date_from, date_to)).fetchone()
+        finally:
+            con.close()
+
+    def receipts_page(self, date_from, date_to, after=None, limit=200):
+        """One keyset page of receipts, newest first. ``after`` is the
+        (created_at, receipt_no) of the previous page's last row."""
+        start, end = day_range(date_from, date_to)
+        con = db_connect(self.db_path)
+        try:
+            if after is None:
+                return con.execute(RECEIPTS_PAGE_FIRST, (start, end, limit)).fetchall()
+            last_at, last_no = after
+            return con.execute(RECEIPTS_PAGE_AFTER, (start, last_at, last_at, last_no, limit)).fetchall()
+        finally:
+            con.close()
+
+    def item_sales(self, date_from, date_to):
+        """((name, qty, revenue) rows by revenue, receipt count) for the range."""
+        bounds = day_range(date_from, date_to)
+        con = db_connect(self.db_path)
+        try:
+            rows = con.execute(ITEM_SALES_IN_RANGE, bounds).fetchall()
+            count = con.execute(RECEIPT_COUNT_IN_RANGE, bounds).fetchone()[0]
+        finally:
+            con.close()
+        return rows, count
+
+    def sales_rows(self, date_from=None, date_to=None):
+        return iter_sales(date_from, date_to, db_path=self.db_path)
+
+    def sales_summary(self, report_data=None, date_from=None, date_to=None):
+        if report_data is None:
+            return sales_summary(date_from, date_to, db_path=self.db_path)
+        return summarize_sales(report_data)
+
+    # ---- inventory ----
+    def low_stock(self):
+        """(id, name, quantity) of every pastry under LOW_STOCK_THRESHOLD,
+        lowest first; reads only the partial low-stock index."""
+        con = db_connect(self.db_path)
+        try:
+            return con.execute(LOW_STOCK_ITEMS).fetchall()
+        finally:
+            con.close()
+
+    def inventory_rows(self):
+        return [p.as_row() for p in self.catalog.rows()]
+
+    def save_pastry(self, pastry_id, name, category, price, qty, sku=None):
+        """Insert (pastry_id None) or update a pastry; returns its id.
+
+        ``sku`` is the barcode: None keeps the current one, "" removes it.
+        Names (case-insensitive) and barcodes must be unique; the catalog
+        answers the common case, and the database decides inside the write
+        transaction, since another till may have saved the same one.
+        """
+        name = name.strip()
+        category = category.strip()
+        validate_pastry(name, category, price, qty)
+        pastry_id = int(pastry_id) if pastry_id else None
+        keep_sku = sku is None
+        sku = (sku or "").strip() or None
+        same = self.catalog.find(name)
+        if same is not None and same.id != pastry_id:
+            raise PosError("Duplicate Item", f"'{name}' already exists in the inventory.")
+        other = self.catalog.find_sku(sku) if sku else None
+        if other is not None and other.id != pastry_id:
+            raise PosError("Duplicate SKU", f"Barcode {sku} is already used by '{other.name}'.")
+        stamp = now_iso()
+        con = db_connect(self.db_path)
+        try:
+            pastry_id, sku = retry_on_lock(self._save_once, con, pastry_id, name, category, price, qty,
+                                           sku, keep_sku, stamp)
+        except PosError:
+            # the catalog missed another till's change
+            self.reload_catalog()
+            raise
+        finally:
+            con.close()
+        self.catalog.upsert(pastry_id, name, category, price, qty, stamp, sku)
+        return pastry_id
+
+    def _save_once(self, con, pastry_id, name, category, price, qty, sku, keep_sku, stamp):
+        cur = con.cursor()
+        begin_immediate(cur)
+        try:
+            exclude = pastry_id or 0
+            cur.execute("SELECT 1 FROM pastries WHERE name = ? COLLATE NOCASE AND id <> ?", (name, exclude))
+            if cur.fetchone():
+                raise PosError("Duplicate Item", f"'{name}' already exists in the inventory.")
+            if keep_sku and pastry_id:
+                cur.execute("SELECT sku FROM pastries WHERE id = ?", (pastry_id,))
+                row = cur.fetchone()
+                sku = row[0] if row else None
+            if sku:
+                cur.execute("SELECT name FROM pastries WHERE sku = ? AND id <> ?", (sku, exclude))
+                row = cur.fetchone()
+                if row:
+                    raise PosError("Duplicate SKU", f"Barcode {sku} is already used by '{row[0]}'.")
+            if not pastry_id:
+                cur.execute("""
+                    INSERT INTO pastries (name, category, price, quantity, date_added, last_updated, sku)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (name, category, price, qty, stamp, stamp, sku))
+                pastry_id = cur.lastrowid
+            else:
+                cur.execute("""
+                    UPDATE pastries
+                    SET name=?, category=?, price=?, quantity=?, last_updated=?, sku=?
+                    WHERE id=?
+                """, (name, category, price, qty, stamp, sku, pastry_id))
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+        return pastry_id, sku
+
+    def apply_inventory(self, result, restock=False):
+        """Write a validated inventory CSV (inventory_import.ImportResult) in
+        one transaction and pick up the new stock."""
+        from inventory_import import apply_inventory  # it imports this module's rules
+        apply_inventory(result, restock, self.db_path)
+        self.reload_catalog()
+        return result
+
+    def delete_pastry(self, pastry_id):
+        con = db_connect(self.db_path)
+        try:
+            con.execute("DELETE FROM pastries WHERE id=?", (pastry_id,))
+            con.commit()
+        finally:
+            con.close()
+        self.catalog.remove(pastry_id)
@@ -0,0 +1,122 @@
+# -------------------- Report SQL --------------------
+# All report paths filter with a half-open [start, end) range (see
+# utils.day_range) on an indexed column; the query-plan check in
+# database_setup runs every statement listed here. Aggregates read the
+# daily rollup tables that checkout maintains, so their cost grows with
+# the number of days in the range rather than the number of sales.
+
+# Receipts list, newest first, paged by keyset on (created_at, receipt_no).
+# The first page takes (start, end, limit); later pages take
+# (start, last created_at, last created_at, last receipt_no, limit) so the
+# index range itself starts at the previous page's last row.
+RECEIPTS_PAGE_FIRST = """
+    SELECT created_at, receipt_no, staff_username, COALESCE(customer_name,''), total
+    FROM receipts
+    WHERE created_at >= ? AND created_at < ?
+    ORDER BY created_at DESC, receipt_no DESC
+    LIMIT ?
+"""
+
+RECEIPTS_PAGE_AFTER = """
+    SELECT created_at, receipt_no, staff_username, COALESCE(customer_name,''), total
+    FROM receipts
+    WHERE created_at >= ? AND created_at <= ? AND (created_at, receipt_no) < (?, ?)
+    ORDER BY created_at DESC, receipt_no DESC
+    LIMIT ?
+"""
+
+ITEM_SALES_IN_RANGE = """
+    SELECT name, SUM(qty) AS total_sold, SUM(revenue) AS total_revenue
+    FROM daily_item_sales
+    WHERE day >= ? AND day < ?
+    GROUP BY name
+    ORDER BY total_revenue DESC
+"""
+
+RECEIPT_COUNT_IN_RANGE = """
+    SELECT COALESCE(SUM(receipt_count), 0) FROM daily_sales WHERE day >= ? AND day < ?
+"""
+
+RECEIPT_TOTALS_IN_RANGE = """
+    SELECT COALESCE(SUM(receipt_count), 0), COALESCE(SUM(total), 0)
+    FROM daily_sales
+    WHERE day >= ? AND day < ?
+"""
+
+# Line-level export: one row per receipt item, oldest first.
+LINE_ITEM_COLUMNS = (
+    "receipt_no", "created_at", "staff_username", "customer_name",
+    "subtotal", "discount", "tax", "total", "tendered", "change",
+    "pastry_id", "item_name", "unit_price", "qty", "line_total",
+)
+
+LINE_ITEMS_IN_RANGE = """
+    SELECT r.receipt_no, r.created_at, r.staff_username, r.customer_name,
+           r.subtotal, r.discount, r.tax, r.total, r.tendered, r.change,
+           ri.pastry_id, ri.name, ri.unit_price, ri.qty, ri.line_total
+    FROM receipts r
+    JOIN receipt_items ri ON ri.receipt_id = r.id
+    WHERE r.created_at >= ? AND r.created_at < ?
+    ORDER BY r.created_at, r.receipt_no, ri.id
+"""
+
+# Sales detail/summary over the ``sales`` compatibility view and the item
+# rollup. Rows are (item_name, unit_price, qty, total, sale_time, staff).
+SALES_IN_RANGE = """
+    SELECT name, unit_price, qty, total, sale_time, staff_username
+    FROM sales
+    WHERE sale_time >= ? AND sale_time < ?
+    ORDER BY sale_time DESC, id DESC
+"""
+
+SALES_TOTALS_IN_RANGE = """
+    SELECT COALESCE(SUM(revenue), 0), COALESCE(SUM(qty), 0)
+    FROM daily_item_sales
+    WHERE day >= ? AND day < ?
+"""
+
+# Ties go to the item sold most recently, as a Counter fed newest-first would.
+TOP_ITEM_IN_RANGE = """
+    SELECT name
+    FROM daily_item_sales
+    WHERE day >= ? AND day < ?
+    GROUP BY name
+    ORDER BY SUM(qty) DESC, MAX(day) DESC
+    LIMIT 1
+"""
+
+# -------------------- Stock SQL --------------------
+# Pastries below this count are flagged on the POS cards and in the low
+# stock panel. The partial index is built with the same literal so the
+# listing reads only the few low rows; init_db rebuilds the index when the
+# threshold changes.
+LOW_STOCK_THRESHOLD = 5
+
+LOW_STOCK_INDEX = f"""
+    CREATE INDEX idx_pastries_low_stock ON pastries(quantity) WHERE quantity < {LOW_STOCK_THRESHOLD}
+"""
+
+LOW_STOCK_ITEMS = f"""
+    SELECT id, name, quantity
+    FROM pastries
+    WHERE quantity < {LOW_STOCK_THRESHOLD}
+    ORDER BY quantity, name
+"""
+
+# Stock queries take no parameters; the plan check runs them too.
+STOCK_QUERIES = {
+    "low_stock_items": LOW_STOCK_ITEMS,
+}
+
+# name -> (sql, sample parameters that follow the [start, end) bounds)
+REPORT_QUERIES = {
+    "receipts_page_first": (RECEIPTS_PAGE_FIRST, (200,)),
+    "receipts_page_after": (RECEIPTS_PAGE_AFTER, ("9999-12-31 00:00:00", 1 << 40, 200)),
+    "item_sales_in_range": (ITEM_SALES_IN_RANGE, ()),
+    "receipt_count_in_range": (RECEIPT_COUNT_IN_RANGE, ()),
+    "receipt_totals_in_range": (RECEIPT_TOTALS_IN_RANGE, ()),
+    "line_items_in_range": (LINE_ITEMS_IN_RANGE, ()),
+    "sales_in_range": (SALES_IN_RANGE, ()),
+    "sales_totals_in_range": (SALES_TOTALS_IN_RANGE, ()),
+    "top_item_in_range": (TOP_ITEM_IN_RANGE, ()),
+}
@@ -0,0 +1,495 @@
+import os
+import io
+import sys
+import time
+import queue
+import argparse
+import importlib.util
+import threading
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+import utils
+from utils import db_connect, money, day_range
+
+# reportlab and qrcode are imported where they are used, so the till
+# starts without them; only their presence is checked up front.
+REPORTLAB_AVAILABLE = importlib.util.find_spec("reportlab") is not None
+QRCODE_AVAILABLE = importlib.util.find_spec("qrcode") is not None
+
+# -------------------- Page templates --------------------
+PAGE_ASSET_DPI = 150        # resolution the composited page background is stored at
+PAGE_ASSET_QUALITY = 85     # JPEG quality of the composited background
+_BACKGROUNDS = {}
+_BACKGROUNDS_LOCK = threading.Lock()
+
+def _mtime(fp):
+    try:
+        return os.stat(fp).st_mtime_ns
+    except OSError:
+        return None
+
+def _build_page_background(pagesize, logo_mm, bg_fp, logo_fp):
+    from reportlab.lib.units import mm
+    w, h = pagesize
+    scale = PAGE_ASSET_DPI / 72.0
+    px = (round(w * scale), round(h * scale))
+    if os.path.exists(bg_fp):
+        # Fill the entire page
+        page = Image.open(bg_fp).convert("RGB").resize(px, Image.LANCZOS)
+    else:
+        # fallback color if background missing
+        page = Image.new("RGB", px, (255, 230, 242))
+    if os.path.exists(logo_fp):
+        logo = Image.open(logo_fp).convert("RGBA")
+        iw, ih = logo.size
+        lw = round(logo_mm * mm * scale)
+        lh = round(lw * ih / iw)
+        logo = logo.resize((lw, lh), Image.LANCZOS)
+        # Watermark logo in center
+        page.paste(logo, ((px[0] - lw) // 2, (px[1] - lh) // 2), logo)
+    buf = io.BytesIO()
+    page.save(buf, format="JPEG", quality=PAGE_ASSET_QUALITY, optimize=True)
+    return buf.getvalue()
+
+def page_background(pagesize, logo_mm, asset_dir):
+    """ImageReader of the page background with the centered logo watermark.
+
+    background.jpg and logo.jpg are decoded, downsampled to PAGE_ASSET_DPI
+    and composited once per (page size, logo size, asset mtimes); each PDF
+    then embeds a single small JPEG instead of both full-size originals.
+    """
+    from reportlab.lib import utils as rl_utils
+    bg_fp = os.path.join(asset_dir, "background.jpg")
+    logo_fp = os.path.join(asset_dir, "logo.jpg")
+    key = (tuple(pagesize), logo_mm, bg_fp, _mtime(bg_fp), logo_fp, _mtime(logo_fp))
+    with _BACKGROUNDS_LOCK:
+        data = _BACKGROUNDS.get(key)
+        if data is None:
+            data = _BACKGROUNDS[key] = _build_page_background(pagesize, logo_mm, bg_fp, logo_fp)
+    return rl_utils.ImageReader(io.BytesIO(data))
+
+def draw_page_background(c, pagesize, logo_mm, asset_dir):
+    w, h = pagesize
+    try:
+        c.drawImage(page_background(pagesize, logo_mm, asset_dir), 0, 0, width=w, height=h)
+    except Exception as e:
+        print("Background image error:", e)
+        c.setFillColorRGB(1, 0.9, 0.95)
+        c.rect(0, 0, w, h, fill=True, stroke=False)
+
+# -------------------- Receipt data --------------------
+def fetch_receipt(cur, receipt_no: int):
+    """Return (header row, item rows) for a receipt, or None if unknown."""
+    cur.execute("SELECT id, created_at, staff_username, customer_name, subtotal, discount, tax, total, tendered, change FROM receipts WHERE receipt_no=?", (receipt_no,))
+    r = cur.fetchone()
+    if not r:
+        return None
+    cur.execute("SELECT name, unit_price, qty, line_total FROM receipt_items WHERE receipt_id=?", (r[0],))
+    return r, cur.fetchall()
+
+def receipt_qr_text(receipt_no, header, items):
+    rid, created_at, staff, cust, subtotal, disc, tax, total, tender, change = header
+    qr_text = [
+        "MambaMunchies Bakery",
+        f"Receipt #{receipt_no}",
+        f"Date: {created_at}",
+        f"Cashier: {staff}",
+    ]
+    if cust:
+        qr_text.append(f"Customer: {cust}")
+    qr_text.append("\nItems:")
+    for n, p, q, t in items:
+        qr_text.append(f"- {n} ({q} × {money(p)}) = {money(t)}")
+    qr_text.append("")
+    qr_text.append(f"Subtotal: {money(subtotal)}")
+    qr_text.append(f"Discount: {money(disc)}")
+    qr_text.append(f"Tax: {money(tax)}")
+    qr_text.append(f"Total: {money(total)}")
+    qr_text.append(f"Tendered: {money(tender)}")
+    qr_text.append(f"Change: {money(change)}")
+    qr_text.append("")
+    qr_text.append("Thank you for shopping at MambaMunchies 💕")
+    return "\n".join(qr_text)
+
+def receipt_qr_png(receipt_no, header, items):
+    """PNG bytes of the receipt's QR code, or None if qrcode is missing."""
+    if not QRCODE_AVAILABLE:
+        return None
+    import qrcode
+    qr = qrcode.QRCode(
+        version=None,
+        box_size=2,  # bigger modules for higher density
+        border=2
+    )
+    qr.add_data(receipt_qr_text(receipt_no, header, items))
+    qr.make(fit=True)
+    qr_img = qr.make_image(fill_color="black", back_color="white").convert("RGB")
+
+    buf = io.BytesIO()
+    qr_img.save(buf, format="PNG")
+    return buf.getvalue()
+
+# -------------------- Rendering --------------------
+RECEIPT_LOGO_MM = 90
+
+def draw_receipt(c, receipt_no, header, items, asset_dir, qr_png=None):
+    """Draw one receipt page onto an A5 ReportLab canvas.
+
+    ``qr_png`` lets a caller pass a QR code generated elsewhere (the batch
+    exporter builds them in worker processes); otherwise one is made here.
+    """
+    from reportlab.lib.pagesizes import A5
+    from reportlab.lib import utils as rl_utils
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Table, TableStyle
+    from reportlab.lib import colors as rl_colors
+    rid, created_at, staff, cust, subtotal, disc, tax, total, tender, change = header
+    w, h = A5
+
+    # Background + watermark logo, pre-composited once per process
+    draw_page_background(c, A5, RECEIPT_LOGO_MM, asset_dir)
+
+    # Header
+    y = h - 30
+    c.setFont("Helvetica-Bold", 14)
+    c.setFillColorRGB(0.4, 0.1, 0.2)
+    c.drawCentredString(w/2, y, "MambaMunchies Bakery")
+    y -= 18
+    c.setFont("Helvetica", 9)
+    c.setFillColor(rl_colors.black)
+    c.drawCentredString(w/2, y, "Official Sales Receipt")
+    y -= 30
+
+    # Table
+    data = [["Item", "Unit", "Qty", "Total"]] + [[n, money(p), str(q), money(t)] for n, p, q, t in items]
+    tbl = Table(data, colWidths=[75*mm, 20*mm, 15*mm, 25*mm])
+    tbl.setStyle(TableStyle([
+        ("BACKGROUND", (0,0), (-1,0), rl_colors.lightpink),
+        ("TEXTCOLOR", (0,0), (-1,0), rl_colors.black),
+        ("GRID", (0,0), (-1,-1), 0.25, rl_colors.grey),
+        ("FONT", (0,0), (-1,0), "Helvetica-Bold"),
+        ("FONT", (0,1), (-1,-1), "Helvetica"),
+        ("ALIGN", (1,1), (-1,-1), "RIGHT"),
+    ]))
+    table_h = len(data) * 12
+    tbl.wrapOn(c, w, h)
+    tbl.drawOn(c, 20, y - table_h)
+    y -= table_h + 20
+
+    # Details
+    c.setFont("Helvetica", 9)
+    c.drawString(25, y, f"Receipt #: {receipt_no}")
+    c.drawString(25, y - 12, f"Date: {created_at}")
+    c.drawString(25, y - 24, f"Cashier: {staff}")
+    if cust:
+        c.drawString(25, y - 36, f"Customer: {cust}")
+    y -= 55
+
+    # Totals section
+    c.setFont("Helvetica-Bold", 10)
+    lines = [
+        ("Subtotal", subtotal),
+        ("Discount", disc),
+        ("Tax", tax),
+        ("Total", total),
+        ("Tendered", tender),
+        ("Change", change)
+    ]
+    for label, val in lines:
+        c.drawRightString(w - 30, y, f"{label}: {money(val)}")
+        y -= 12
+
+    # Generate QR code
+    try:
+        if qr_png is None:
+            qr_png = receipt_qr_png(receipt_no, header, items)
+        if qr_png:
+            qr_size = 150  # increased size in points (was 40)
+            c.drawImage(rl_utils.ImageReader(io.BytesIO(qr_png)), w - qr_size - 25, 25, width=qr_size, height=qr_size)
+            c.setFont("Helvetica", 8)
+            c.drawString(w - qr_size - 10, 20, "📷 Scan to view receipt")
+    except Exception as e:
+        print("QR code error:", e)
+
+    # Footer
+    c.setFont("Helvetica-Oblique", 8)
+    c.setFillColorRGB(0.3, 0.1, 0.1)
+    c.drawCentredString(w/2, 15, "Thank you for shopping at MambaMunchies! 💕")
+    c.showPage()
+
+def render_receipt_txt(receipt_no, header, items, out_dir):
+    filename = os.path.join(out_dir, f"Receipt_{receipt_no}.txt")
+    with open(filename, "w", encoding="utf-8") as fh:
+        fh.write(receipt_qr_text(receipt_no, header, items) + "\n")
+    return filename
+
+def render_receipt(receipt_no: int, out_dir: str, asset_dir: str, db_path=None):
+    """Render a stored receipt to ``out_dir`` and return the file path.
+
+    Produces a PDF, or a plain-text receipt when reportlab is missing.
+    Safe to call from a worker thread: it touches no Tk state.
+    """
+    con = db_connect(db_path)
+    found = fetch_receipt(con.cursor(), receipt_no)
+    con.close()
+    if found is None:
+        raise LookupError(f"Receipt #{receipt_no} not found.")
+    header, items = found
+
+    os.makedirs(out_dir, exist_ok=True)
+    if not REPORTLAB_AVAILABLE:
+        return render_receipt_txt(receipt_no, header, items, out_dir)
+
+    from reportlab.lib.pagesizes import A5
+    from reportlab.pdfgen import canvas as rl_canvas
+    filename = os.path.join(out_dir, f"Receipt_{receipt_no}.pdf")
+    c = rl_canvas.Canvas(filename, pagesize=A5)
+    draw_receipt(c, receipt_no, header, items, asset_dir)
+    c.save()
+    return filename
+
+def open_file(filename):
+    """Open a rendered file with the platform viewer, ignoring failures."""
+    try:
+        if os.name == 'nt':
+            os.startfile(filename)
+        else:
+            subprocess.Popen(['xdg-open', filename])
+    except Exception:
+        pass
+
+# -------------------- Batch export --------------------
+BATCH_CHUNKSIZE = 8
+
+def receipt_numbers_in_range(date_from, date_to, db_path=None):
+    con = db_connect(db_path)
+    rows = con.execute(
+        "SELECT receipt_no FROM receipts WHERE created_at >= ? AND created_at < ? ORDER BY created_at, receipt_no",
+        day_range(date_from, date_to),
+    ).fetchall()
+    con.close()
+    return [r[0] for r in rows]
+
+def _batch_render_file(job):
+    receipt_no, out_dir, asset_dir, db_path = job
+    try:
+        return receipt_no, render_receipt(receipt_no, out_dir, asset_dir, db_path)
+    except LookupError:
+        return receipt_no, None
+
+def _batch_prepare_page(job):
+    receipt_no, db_path = job
+    con = db_connect(db_path)
+    found = fetch_receipt(con.cursor(), receipt_no)
+    con.close()
+    if found is None:
+        return receipt_no, None
+    header, items = found
+    return receipt_no, (header, items, receipt_qr_png(receipt_no, header, items))
+
+
+class BatchResult:
+    __slots__ = ("files", "pages", "skipped", "seconds")
+
+    def __init__(self, files, pages, skipped, seconds):
+        self.files = files
+        self.pages = pages
+        self.skipped = skipped
+        self.seconds = seconds
+
+    @property
+    def pages_per_second(self):
+        return self.pages / self.seconds if self.seconds else 0.0
+
+
+def export_receipts_batch(receipt_nos, out_path, asset_dir, merged=True, workers=None,
+                          progress=None, db_path=None):
+    """Render many receipts using a pool of worker processes.
+
+    merged=True writes one multi-page PDF at ``out_path``: workers fetch the
+    receipts and build their QR codes, and this process lays out the pages in
+    order. merged=False writes one ``Receipt_<no>.pdf`` per receipt into the
+    ``out_path`` directory, each rendered entirely in a worker.
+    ``progress(done, total, pages_per_second)`` is called after every receipt.
+    Blocks until finished; run it off the Tk thread.
+    """
+    if not REPORTLAB_AVAILABLE:
+        raise RuntimeError("reportlab is required to export PDF receipts.")
+    from reportlab.lib.pagesizes import A5
+    from reportlab.pdfgen import canvas as rl_canvas
+    db_path = db_path or utils.DB_PATH
+    receipt_nos = list(receipt_nos)
+    total = len(receipt_nos)
+    start = time.perf_counter()
+    files, pages, skipped = [], 0, []
+
+    def tick(done):
+        if progress:
+            elapsed = time.perf_counter() - start
+            progress(done, total, pages / elapsed if elapsed else 0.0)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if merged:
+            os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+            c = rl_canvas.Canvas(out_path, pagesize=A5)
+            jobs = [(no, db_path) for no in receipt_nos]
+            for done, (no, prepared) in enumerate(pool.map(_batch_prepare_page, jobs, chunksize=BATCH_CHUNKSIZE), 1):
+                if prepared is None:
+                    skipped.append(no)
+                else:
+                    header, items, qr_png = prepared
+                    draw_receipt(c, no, header, items, asset_dir, qr_png)
+                    pages += 1
+                tick(done)
+            if pages:
+                c.save()
+                files.append(out_path)
+        else:
+            os.makedirs(out_path, exist_ok=True)
+            jobs = [(no, out_path, asset_dir, db_path) for no in receipt_nos]
+            for done, (no, filename) in enumerate(pool.map(_batch_render_file, jobs, chunksize=BATCH_CHUNKSIZE), 1):
+                if filename is None:
+                    skipped.append(no)
+                else:
+                    files.append(filename)
+                    pages += 1
+                tick(done)
+
+    return BatchResult(files, pages, skipped, time.perf_counter() - start)
+
+# -------------------- Background render queue --------------------
+class RenderResult:
+    __slots__ = ("receipt_no", "filename", "error", "attempts", "seconds", "open_after")
+
+    def __init__(self, receipt_no, filename, error, attempts, seconds, open_after):
+        self.receipt_no = receipt_no
+        self.filename = filename
+        self.error = error
+        self.attempts = attempts
+        self.seconds = seconds
+        self.open_after = open_after
+
+
+class ReceiptRenderQueue:
+    """Renders receipts on worker threads, fed by a queue of receipt numbers.
+
+    ``submit()`` returns immediately so checkout never waits for ReportLab.
+    Failed renders (e.g. the PDF is still open in a viewer on Windows) are
+    retried with backoff. Results are collected with ``poll()``, which the
+    Tk side calls from ``after()`` so widgets are only touched on the UI
+    thread.
+    """
+
+    def __init__(self, out_dir, asset_dir, workers=1, retries=3, backoff=0.5, db_path=None):
+        self.out_dir = out_dir
+        self.asset_dir = asset_dir
+        self.db_path = db_path
+        self.retries = retries
+        self.backoff = backoff
+        self._jobs = queue.Queue()
+        self._done = queue.Queue()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"receipt-render-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, receipt_no: int, open_after=True):
+        with self._lock:
+            self._pending += 1
+        self._jobs.put((receipt_no, open_after))
+
+    @property
+    def backlog(self) -> int:
+        """Receipts queued or rendering right now."""
+        return self._pending
+
+    def _work(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            receipt_no, open_after = job
+            start = time.perf_counter()
+            filename = error = None
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    filename = render_receipt(receipt_no, self.out_dir, self.asset_dir, self.db_path)
+                    break
+                except LookupError as e:
+                    error = e
+                    break
+                except Exception as e:
+                    error = e
+                    if attempt > self.retries:
+                        break
+                    time.sleep(self.backoff * 2 ** (attempt - 1))
+            if filename:
+                error = None
+            with self._lock:
+                self._pending -= 1
+            self._done.put(RenderResult(receipt_no, filename, error, attempt,
+                                        time.perf_counter() - start, open_after))
+
+    def poll(self):
+        """Yield finished RenderResults without blocking."""
+        while True:
+            try:
+                yield self._done.get_nowait()
+            except queue.Empty:
+                return
+
+    def shutdown(self, wait=True):
+        """Stop the workers after the queued receipts are rendered."""
+        for _ in self._threads:
+            self._jobs.put(None)
+        if wait:
+            for t in self._threads:
+                t.join()
+
+
+# -------------------- Command line --------------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Batch-export MambaMunchies receipts to PDF.")
+    ap.add_argument("receipts", nargs="*", type=int, help="receipt numbers (default: use --from/--to)")
+    ap.add_argument("--from", dest="date_from", help="first day, YYYY-MM-DD")
+    ap.add_argument("--to", dest="date_to", help="last day, YYYY-MM-DD (default: --from)")
+    ap.add_argument("--split", action="store_true", help="one PDF per receipt instead of one merged file")
+    ap.add_argument("--out", default=None, help="merged PDF path, or directory with --split")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--db", default=None, help="database file (default: utils.DB_PATH)")
+    ap.add_argument("--assets", default=os.path.dirname(os.path.abspath(__file__)))
+    args = ap.parse_args(argv)
+
+    if args.receipts:
+        nos = args.receipts
+        label = f"{nos[0]}-{nos[-1]}"
+    elif args.date_from:
+        date_to = args.date_to or args.date_from
+        nos = receipt_numbers_in_range(args.date_from, date_to, args.db)
+        label = f"{args.date_from}_to_{date_to}"
+    else:
+        ap.error("give receipt numbers or --from")
+    out = args.out or ("Receipts" if args.split else os.path.join("Exports", f"Receipts_{label}.pdf"))
+
+    def report(done, total, pps):
+        print(f"\r{done}/{total} receipts, {pps:.1f} pages/s", end="", file=sys.stderr)
+
+    res = export_receipts_batch(nos, out, args.assets, merged=not args.split,
+                                workers=args.workers, progress=report, db_path=args.db)
+    print(file=sys.stderr)
+    print(f"{res.pages} pages in {res.seconds:.2f}s ({res.pages_per_second:.1f} pages/s) -> {out}")
+    if res.skipped:
+        print(f"missing receipts: {', '.join(map(str, res.skipped))}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+from utils import db_connect, day_range
+from queries import SALES_IN_RANGE, SALES_TOTALS_IN_RANGE, TOP_ITEM_IN_RANGE
+
+# -------------------- Sales report data --------------------
+SALES_BATCH_ROWS = 1000
+ALL_TIME = ("0000-01-01", "9999-12-31")
+
+
+def sales_bounds(date_from=None, date_to=None):
+    """``day_range`` for the given days; all of history when both are empty,
+    and just the given day when only one is filled in."""
+    if not date_from and not date_to:
+        return ALL_TIME
+    return day_range(date_from or date_to, date_to or date_from)
+
+def iter_sales(date_from=None, date_to=None, batch=SALES_BATCH_ROWS, db_path=None):
+    """Yield (item_name, unit_price, qty, total, sale_time, staff) rows,
+    newest first, ``batch`` rows per fetch."""
+    con = db_connect(db_path)
+    try:
+        cur = con.execute(SALES_IN_RANGE, sales_bounds(date_from, date_to))
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        con.close()
+
+def summarize_sales(rows):
+    """Streaming reducer over sales rows: total sales, items, most popular."""
+    total_sales = 0.0
+    total_items = 0
+    qty_by_name = {}            # insertion order breaks ties, like Counter
+    for item_name, unit_price, qty, total, sale_time, staff in rows:
+        total_sales += total
+        total_items += qty
+        qty_by_name[item_name] = qty_by_name.get(item_name, 0) + qty
+    most_popular = max(qty_by_name, key=qty_by_name.get) if qty_by_name else "N/A"
+    return {"total_sales": total_sales, "total_items": total_items, "most_popular": most_popular}
+
+def sales_summary(date_from=None, date_to=None, db_path=None):
+    """Same figures as ``summarize_sales`` computed in SQL from the daily rollup."""
+    bounds = sales_bounds(date_from, date_to)
+    con = db_connect(db_path)
+    try:
+        total_sales, total_items = con.execute(SALES_TOTALS_IN_RANGE, bounds).fetchone()
+        top = con.execute(TOP_ITEM_IN_RANGE, bounds).fetchone()
+    finally:
+        con.close()
+    return {
+        "total_sales": float(total_sales),
+        "total_items": int(total_items),
+        "most_popular": top[0] if top else "N/A",
+    }
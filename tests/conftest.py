@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# the application modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import DB_POOL
+from database_setup import init_db
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A fresh, fully migrated database file; pooled connections are
+    closed afterwards so the next test starts clean."""
+    path = str(tmp_path / "pos.db")
+    init_db(path)
+    yield path
+    DB_POOL.release(path)
@@ -0,0 +1,57 @@
+import pytest
+
+from cart import Cart, apply_rate, from_cents, to_cents
+
+
+@pytest.mark.parametrize("amount, cents", [
+    (0, 0), (1, 100), (12.5, 1250), ("0.005", 1), ("0.004", 0), (0.1 + 0.2, 30), ("19.995", 2000),
+])
+def test_to_cents_rounds_half_up(amount, cents):
+    assert to_cents(amount) == cents
+
+def test_from_cents():
+    assert from_cents(1234) == 12.34
+
+@pytest.mark.parametrize("cents, rate_bp, expected", [
+    (1000, 300, 30),       # 3% of 10.00
+    (50, 300, 2),          # 1.5 centavos rounds up
+    (49, 300, 1),          # 1.47 rounds down
+    (12345, 2000, 2469),   # 20% of 123.45 = 24.69
+    (0, 2000, 0),
+])
+def test_apply_rate(cents, rate_bp, expected):
+    assert apply_rate(cents, rate_bp) == expected
+
+def test_totals_without_discount():
+    cart = Cart()
+    cart.add(1, "Croissant", 45.50, 2)
+    cart.add(2, "Danish", 30, 1)
+    assert cart.subtotal_cents == 12100
+    assert cart.discount_cents == 0
+    assert cart.tax_cents == 363
+    assert cart.total_cents == 12463
+
+def test_senior_discount_applies_before_tax():
+    cart = Cart()
+    cart.add(1, "Croissant", 99.99, 1)
+    cart.discount_type = "Senior"
+    assert cart.discount_cents == 2000          # 19.998 -> 20.00
+    assert cart.tax_cents == 240                # 3% of 79.99 = 2.3997
+    assert cart.total_cents == 9999 - 2000 + 240
+
+def test_subtotal_tracks_quantity_changes():
+    cart = Cart()
+    cart.add(1, "Croissant", 10, 1)
+    cart.add(1, "Croissant", 10, 2)
+    assert len(cart) == 1 and cart.qty_of(1) == 3
+    cart.set_qty(1, 1)
+    assert cart.subtotal_cents == 1000
+    assert cart.set_qty(1, 0) is None
+    assert 1 not in cart and cart.subtotal_cents == 0
+
+def test_clear_resets_discount():
+    cart = Cart()
+    cart.add(1, "Croissant", 10, 1)
+    cart.discount_type = "PWD"
+    cart.clear()
+    assert cart.subtotal_cents == 0 and cart.discount_type == "None"
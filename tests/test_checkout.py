@@ -0,0 +1,153 @@
+import random
+import threading
+
+import pytest
+
+from utils import DB_POOL, db_connect
+import checkout as checkout_module
+from checkout import CheckoutError, checkout
+from database_setup import backfill_rollups
+from queries import LOW_STOCK_THRESHOLD
+
+
+def add_pastry(con, name, quantity, price=50.0):
+    cur = con.execute("INSERT INTO pastries (name, category, price, quantity) VALUES (?,?,?,?)",
+                      (name, "Pastry", price, quantity))
+    con.commit()
+    return cur.lastrowid
+
+def sell(con, *lines):
+    """Check out (pastry_id, qty) pairs at 50.00 each, no discount."""
+    items = [(pid, f"item {pid}", 50.0, qty, 50.0 * qty) for pid, qty in lines]
+    total = sum(line[-1] for line in items)
+    return checkout(con, "tester", None, items, total, 0.0, 3.0, total, total, 0.0)
+
+def stock(con, pid):
+    return con.execute("SELECT quantity FROM pastries WHERE id=?", (pid,)).fetchone()[0]
+
+def count(con, table):
+    return con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_checkout_records_sale_and_decrements_stock(db_path):
+    con = db_connect(db_path)
+    a, b = add_pastry(con, "Croissant", 10), add_pastry(con, "Danish", 4)
+    res = sell(con, (a, 3), (b, 4))
+    assert (stock(con, a), stock(con, b)) == (7, 0)
+    assert con.execute("SELECT COUNT(*), SUM(qty) FROM receipt_items WHERE receipt_id=?",
+                       (res.receipt_id,)).fetchone() == (2, 7)
+    assert con.execute("SELECT receipt_count, total FROM daily_sales").fetchone() == (1, 350.0)
+    con.close()
+
+def test_shortfall_rolls_back_the_whole_sale(db_path):
+    con = db_connect(db_path)
+    a, b = add_pastry(con, "Croissant", 10), add_pastry(con, "Danish", 2)
+    with pytest.raises(CheckoutError, match="Not enough stock for item 2. Available: 2."):
+        sell(con, (a, 3), (b, 5))
+    # the first line's decrement was undone too
+    assert (stock(con, a), stock(con, b)) == (10, 2)
+    assert count(con, "receipts") == count(con, "receipt_items") == count(con, "daily_sales") == 0
+    con.close()
+
+def test_shortfall_names_the_short_item_with_stock_before_the_sale(db_path):
+    # the first line's decrement must not make it look short
+    con = db_connect(db_path)
+    a, b = add_pastry(con, "Croissant", 4), add_pastry(con, "Danish", 2)
+    with pytest.raises(CheckoutError) as e:
+        sell(con, (a, 3), (b, 5))
+    assert str(e.value) == f"Not enough stock for item {b}. Available: 2."
+    assert (stock(con, a), stock(con, b)) == (4, 2)
+    con.close()
+
+def test_unknown_item_is_rejected(db_path):
+    con = db_connect(db_path)
+    a = add_pastry(con, "Croissant", 10)
+    with pytest.raises(CheckoutError, match="Item not found"):
+        sell(con, (a, 1), (a + 100, 1))
+    assert stock(con, a) == 10 and count(con, "receipts") == 0
+    con.close()
+
+def test_concurrent_tills_get_unique_gap_free_receipt_numbers(db_path):
+    # the pool keeps one connection per thread, so each thread is its own till
+    tills, sales, start_stock = 4, 25, 60
+    con = db_connect(db_path)
+    pids = [add_pastry(con, f"Pastry {i}", start_stock) for i in range(3)]
+    con.close()
+    gate = threading.Barrier(tills)
+    results, failures = [], []
+
+    def till(seed):
+        rnd = random.Random(seed)
+        till_con = db_connect(db_path)
+        try:
+            gate.wait()
+            for _ in range(sales):
+                try:
+                    res = sell(till_con, *[(pid, rnd.randint(1, 3)) for pid in rnd.sample(pids, 2)])
+                except CheckoutError:
+                    continue
+                results.append(res.receipt_no)
+        except Exception as e:      # surfaced below: pytest does not see thread errors
+            failures.append(e)
+        finally:
+            DB_POOL.release(db_path)
+
+    threads = [threading.Thread(target=till, args=(n,)) for n in range(tills)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert failures == []
+
+    con = db_connect(db_path)
+    stored = [row[0] for row in con.execute("SELECT receipt_no FROM receipts ORDER BY receipt_no")]
+    assert sorted(results) == stored
+    assert stored == list(range(stored[0], stored[0] + len(stored)))
+    for pid in pids:
+        sold = con.execute("SELECT COALESCE(SUM(qty), 0) FROM receipt_items WHERE pastry_id=?", (pid,)).fetchone()[0]
+        assert 0 <= stock(con, pid) == start_stock - sold
+    con.close()
+
+def test_shortfall_does_not_burn_a_receipt_number(db_path):
+    con = db_connect(db_path)
+    pid = add_pastry(con, "Croissant", 2)
+    first = sell(con, (pid, 1)).receipt_no
+    with pytest.raises(CheckoutError):
+        sell(con, (pid, 5))
+    assert sell(con, (pid, 1)).receipt_no == first + 1
+    con.close()
+
+def test_low_stock_reported_only_on_the_crossing_sale(db_path):
+    con = db_connect(db_path)
+    pid = add_pastry(con, "Croissant", LOW_STOCK_THRESHOLD + 2)
+    assert sell(con, (pid, 2)).low_stock == []
+    assert sell(con, (pid, 1)).low_stock == [(pid, f"item {pid}", LOW_STOCK_THRESHOLD - 1)]
+    # already below the threshold: no repeat alert
+    assert sell(con, (pid, 1)).low_stock == []
+    con.close()
+
+def test_checkout_rollups_match_a_backfill(db_path, monkeypatch):
+    con = db_connect(db_path)
+    pids = [add_pastry(con, f"Pastry {i}", 500) for i in range(4)]
+    rnd = random.Random(5)
+    for day in ("2026-03-01", "2026-03-02"):
+        monkeypatch.setattr(checkout_module, "now_iso", lambda day=day: f"{day} {rnd.randrange(8, 20):02d}:00:00")
+        for _ in range(30):
+            lines = []
+            for pid in rnd.sample(pids, rnd.randint(1, 3)):
+                # a mid-day rename gives one pastry two rollup rows
+                name = f"Pastry {pid}" if rnd.random() < 0.8 else f"Renamed {pid}"
+                price, qty = rnd.choice((12.25, 45.0, 80.5)), rnd.randint(1, 4)
+                lines.append((pid, name, price, qty, price * qty))
+            total = sum(line[-1] for line in lines)
+            checkout(con, "tester", None, lines, total, 0.0, 0.0, total, total, 0.0)
+
+    def snapshot():
+        return (con.execute("SELECT * FROM daily_item_sales ORDER BY day, pastry_id, name").fetchall(),
+                con.execute("SELECT * FROM daily_sales ORDER BY day").fetchall())
+
+    incremental = snapshot()
+    assert [row[0] for row in incremental[1]] == ["2026-03-01", "2026-03-02"]
+    assert backfill_rollups(con) == 2
+    assert snapshot() == incremental
+    con.close()
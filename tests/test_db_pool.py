@@ -0,0 +1,93 @@
+import sqlite3
+import threading
+
+import pytest
+
+import utils
+from utils import ConnectionPool
+
+
+@pytest.fixture
+def pool():
+    pool = ConnectionPool()
+    yield pool
+    pool.close_all()
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "pool.db")
+    con = sqlite3.connect(path)
+    con.execute("CREATE TABLE t (x INTEGER)")
+    con.commit()
+    con.close()
+    return path
+
+def in_thread(fn):
+    out = []
+    t = threading.Thread(target=lambda: out.append(fn()))
+    t.start()
+    t.join()
+    return out[0]
+
+
+def test_one_connection_per_thread(pool, path):
+    a, b = pool.acquire(path), pool.acquire(path)
+    assert a._con is b._con
+    assert a.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    other = in_thread(lambda: pool.acquire(path)._con)
+    assert other is not a._con
+    assert (pool.opened, pool.borrowed) == (2, 3)
+
+def test_close_rolls_back_but_keeps_the_connection(pool, path):
+    con = pool.acquire(path)
+    con.execute("INSERT INTO t VALUES (1)")
+    assert con.in_transaction
+    con.close()
+    assert not con.in_transaction
+    again = pool.acquire(path)
+    assert again._con is con._con
+    assert again.execute("SELECT COUNT(*) FROM t").fetchone() == (0,)
+    # committed work survives close()
+    again.execute("INSERT INTO t VALUES (2)")
+    again.commit()
+    again.close()
+    assert pool.acquire(path).execute("SELECT x FROM t").fetchall() == [(2,)]
+
+def test_connections_are_not_reused_after_a_fork(pool, path, monkeypatch):
+    parent = pool.acquire(path)._con
+    monkeypatch.setattr(utils.os, "getpid", lambda pid=utils.os.getpid() + 1: pid)
+    child = pool.acquire(path)._con
+    assert child is not parent and pool.opened == 2
+    assert pool.acquire(path)._con is child
+
+def test_release_closes_this_threads_connection(pool, path):
+    con = pool.acquire(path)._con
+    pool.release(path)
+    with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+        con.execute("SELECT 1")
+    assert pool.acquire(path)._con is not con
+    pool.release(path + "-unknown")     # nothing pooled: no error
+
+def test_close_all_resets_every_thread(pool, path):
+    mine = pool.acquire(path)._con
+    closed, resume, seen = threading.Event(), threading.Event(), []
+
+    def till():
+        seen.append(pool.acquire(path)._con)
+        closed.set()
+        resume.wait()
+        # close_all dropped this thread's pooled connection too
+        con = pool.acquire(path)
+        seen.append(con._con)
+        seen.append(con.execute("SELECT COUNT(*) FROM t").fetchone())
+
+    t = threading.Thread(target=till)
+    t.start()
+    closed.wait()
+    pool.close_all()    # the other thread's connection cannot be closed from here: no error
+    resume.set()
+    t.join()
+    with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+        mine.execute("SELECT 1")
+    assert seen[1] is not seen[0] and seen[2] == (0,)
+    assert pool.acquire(path)._con is not mine
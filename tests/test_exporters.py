@@ -0,0 +1,63 @@
+import csv
+import json
+
+import pytest
+
+from utils import db_connect
+from queries import LINE_ITEM_COLUMNS
+from exporters import export_line_items, iter_line_items
+
+
+@pytest.fixture
+def sales_db(db_path):
+    con = db_connect(db_path)
+    receipts = [
+        (1001, "2026-03-01 09:00:00", [("Ciabatta", 45.0, 2), ("Crème Puff", 30.0, 1)]),
+        (1002, "2026-03-01 18:30:00", [("Garlic Bread", 40.0, 1)]),
+        (1003, "2026-03-02 08:00:00", [("Ciabatta", 45.0, 1)]),
+    ]
+    for receipt_no, stamp, lines in receipts:
+        total = sum(price * qty for name, price, qty in lines)
+        rid = con.execute(
+            "INSERT INTO receipts (receipt_no, created_at, staff_username, subtotal, discount, tax, total, tendered, change) "
+            "VALUES (?,?,'tester',?,0,0,?,?,0)", (receipt_no, stamp, total, total, total)).lastrowid
+        con.executemany(
+            "INSERT INTO receipt_items (receipt_id, pastry_id, name, unit_price, qty, line_total) VALUES (?,?,?,?,?,?)",
+            [(rid, i, name, price, qty, price * qty) for i, (name, price, qty) in enumerate(lines, 1)])
+    con.commit()
+    con.close()
+    return db_path
+
+
+def test_batches_do_not_change_the_rows(sales_db):
+    rows = list(iter_line_items("2026-03-01", "2026-03-01", db_path=sales_db))
+    assert [(r[0], r[11]) for r in rows] == [(1001, "Ciabatta"), (1001, "Crème Puff"), (1002, "Garlic Bread")]
+    assert list(iter_line_items("2026-03-01", "2026-03-01", batch=1, db_path=sales_db)) == rows
+
+def test_csv_export(sales_db, tmp_path):
+    path = str(tmp_path / "items.csv")
+    n, seconds = export_line_items(path, "2026-03-01", "2026-03-02", db_path=sales_db)
+    with open(path, newline="", encoding="utf-8") as fh:
+        data = list(csv.reader(fh))
+    assert n == 4 and seconds >= 0
+    assert data[0] == list(LINE_ITEM_COLUMNS)
+    assert [row[0] for row in data[1:]] == ["1001", "1001", "1002", "1003"]
+    assert data[2][11] == "Crème Puff"
+
+def test_jsonl_export(sales_db, tmp_path):
+    path = str(tmp_path / "items.jsonl")
+    n, _ = export_line_items(path, "2026-03-02", "2026-03-02", db_path=sales_db)
+    with open(path, encoding="utf-8") as fh:
+        records = [json.loads(line) for line in fh]
+    assert n == len(records) == 1
+    assert records[0] == dict(zip(LINE_ITEM_COLUMNS, next(iter_line_items("2026-03-02", "2026-03-02", db_path=sales_db))))
+
+def test_empty_range_writes_only_the_header(sales_db, tmp_path):
+    path = str(tmp_path / "items.csv")
+    assert export_line_items(path, "2026-04-01", "2026-04-30", db_path=sales_db)[0] == 0
+    with open(path, newline="", encoding="utf-8") as fh:
+        assert list(csv.reader(fh)) == [list(LINE_ITEM_COLUMNS)]
+
+def test_unknown_format_is_rejected(sales_db, tmp_path):
+    with pytest.raises(ValueError, match="Unknown export format"):
+        export_line_items(str(tmp_path / "items.xlsx"), "2026-03-01", "2026-03-01", db_path=sales_db)
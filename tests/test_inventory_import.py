@@ -0,0 +1,161 @@
+import io
+
+import pytest
+
+from utils import db_connect
+from inventory_import import apply_inventory, main, validate_inventory_csv
+
+
+def validate(text):
+    return validate_inventory_csv(io.StringIO(text))
+
+def messages(result):
+    return {line: message for line, name, message in result.errors}
+
+def apply(db_path, text, strict=False, restock=False):
+    return apply_inventory(validate(text), restock, db_path, strict)
+
+def skus(db_path):
+    con = db_connect(db_path)
+    try:
+        return dict(con.execute("SELECT name, sku FROM pastries"))
+    finally:
+        con.close()
+
+def stock(db_path):
+    con = db_connect(db_path)
+    try:
+        return dict(con.execute("SELECT name, quantity FROM pastries"))
+    finally:
+        con.close()
+
+
+def test_valid_rows_are_normalised_to_catalog_spelling():
+    res = validate("name,category,price,quantity\n chocolate cake ,cake,120,10\nCiabatta,Bread,45.5,3\n")
+    assert res.errors == []
+    assert [(r.line, r.name, r.category, r.price, r.quantity) for r in res.rows] == [
+        (2, "Chocolate Cake", "Cake", 120.0, 10),
+        (3, "Ciabatta", "Bread", 45.5, 3),
+    ]
+
+def test_header_aliases_and_any_column_order():
+    res = validate("Qty,Price,Category,Name\n4,60,Cookie,Sugar Cookie\n")
+    assert res.errors == []
+    assert (res.rows[0].name, res.rows[0].quantity) == ("Sugar Cookie", 4)
+
+def test_missing_column_rejects_the_file():
+    with pytest.raises(ValueError, match="missing column.*quantity"):
+        validate("name,category,price\nCiabatta,Bread,45\n")
+
+@pytest.mark.parametrize("row, expected", [
+    ("Ciabatta,Sandwich,45,3", "unknown category"),
+    ("Ciabatta,Cake,45,3", "is not a Cake product"),
+    ("Ciabatta,Bread,abc,3", "must be numbers"),
+    ("Ciabatta,Bread,45,2.5", "must be numbers"),
+    ("Ciabatta,Bread,4.99,3", "Price must be between"),
+    ("Ciabatta,Bread,500.01,3", "Price must be between"),
+    ("Ciabatta,Bread,45,0", "Quantity must be between"),
+    ("Ciabatta,Bread,45,101", "Quantity must be between"),
+    (",Bread,45,3", "select a pastry name"),
+    ("Ciabatta,,45,3", "select a category"),
+])
+def test_invalid_rows_are_rejected_with_a_reason(row, expected):
+    res = validate(f"name,category,price,quantity\nGarlic Bread,Bread,40,5\n{row}\n")
+    assert [r.name for r in res.rows] == ["Garlic Bread"]
+    assert expected in messages(res)[3]
+
+def test_bounds_are_inclusive():
+    res = validate("name,category,price,quantity\nCiabatta,Bread,5,1\nGarlic Bread,Bread,500,100\n")
+    assert res.errors == [] and len(res.rows) == 2
+
+def test_duplicate_names_keep_the_first_row():
+    res = validate("name,category,price,quantity\nCiabatta,Bread,45,3\nCIABATTA,bread,50,4\n")
+    assert [(r.line, r.price) for r in res.rows] == [(2, 45.0)]
+    assert messages(res) == {3: "duplicate of line 2"}
+
+
+# ---- barcodes ----
+def test_duplicate_sku_within_a_file():
+    res = validate("name,category,price,quantity,sku\nCiabatta,Bread,45,3,111\nGarlic Bread,Bread,40,5,111\n")
+    assert [r.name for r in res.rows] == ["Ciabatta"]
+    assert messages(res) == {3: "barcode 111 also on line 2"}
+
+def test_blank_sku_keeps_the_current_barcode(db_path):
+    apply(db_path, "name,category,price,quantity,barcode\nCiabatta,Bread,45,3,111\n")
+    res = apply(db_path, "name,category,price,quantity,barcode\nCiabatta,Bread,50,3,\n")
+    assert (res.updated, res.errors) == (1, [])
+    assert skus(db_path) == {"Ciabatta": "111"}
+
+def test_sku_held_by_another_pastry_is_rejected(db_path):
+    apply(db_path, "name,category,price,quantity,sku\nCiabatta,Bread,45,3,111\n")
+    res = apply(db_path, "name,category,price,quantity,sku\nGarlic Bread,Bread,40,5,111\nPan de Sal,Bread,10,9,222\n")
+    assert (res.inserted, res.updated) == (1, 0)
+    assert messages(res) == {2: "barcode 111 is already used by another pastry"}
+    assert skus(db_path) == {"Ciabatta": "111", "Pan de Sal": "222"}
+
+def test_barcodes_may_swap_within_a_file(db_path):
+    apply(db_path, "name,category,price,quantity,sku\nCiabatta,Bread,45,3,111\nGarlic Bread,Bread,40,5,222\n")
+    res = apply(db_path, "name,category,price,quantity,sku\nCiabatta,Bread,45,3,222\nGarlic Bread,Bread,40,5,111\n")
+    assert (res.updated, res.errors) == (2, [])
+    assert skus(db_path) == {"Ciabatta": "222", "Garlic Bread": "111"}
+
+def test_rejected_move_pins_the_old_barcode(db_path):
+    # Garlic Bread cannot take 333 (Pan de Sal keeps it), so it keeps 222 and Ciabatta cannot take 222
+    apply(db_path, "name,category,price,quantity,sku\nCiabatta,Bread,45,3,111\n"
+                   "Garlic Bread,Bread,40,5,222\nPan de Sal,Bread,10,9,333\n")
+    res = apply(db_path, "name,category,price,quantity,sku\nCiabatta,Bread,45,3,222\nGarlic Bread,Bread,40,5,333\n")
+    assert set(messages(res)) == {2, 3}
+    assert skus(db_path) == {"Ciabatta": "111", "Garlic Bread": "222", "Pan de Sal": "333"}
+
+def test_strict_writes_nothing_on_a_taken_sku(db_path):
+    apply(db_path, "name,category,price,quantity,sku\nCiabatta,Bread,45,3,111\n")
+    res = apply(db_path, "name,category,price,quantity,sku\nPan de Sal,Bread,10,9,222\nGarlic Bread,Bread,40,5,111\n",
+                strict=True)
+    assert (res.inserted, res.updated) == (0, 0)
+    assert set(messages(res)) == {3}
+    assert skus(db_path) == {"Ciabatta": "111"}
+
+def test_cli_reports_rejections_without_a_traceback(db_path, tmp_path, capsys):
+    apply(db_path, "name,category,price,quantity,sku\nCiabatta,Bread,45,3,111\n")
+    csv_path = tmp_path / "stock.csv"
+    csv_path.write_text("name,category,price,quantity,sku\nGarlic Bread,Bread,40,5,111\n", encoding="utf-8")
+    assert main([str(csv_path), "--db", db_path]) == 1
+    assert "barcode 111 is already used" in capsys.readouterr().err
+
+
+# ---- restock ----
+def test_restock_adds_to_existing_stock(db_path):
+    apply(db_path, "name,category,price,quantity\nCiabatta,Bread,45,30\nGarlic Bread,Bread,40,5\n")
+    res = apply(db_path, "name,category,price,quantity\nciabatta,Bread,50,20\n", restock=True)
+    assert (res.inserted, res.updated) == (0, 1)
+    assert stock(db_path) == {"Ciabatta": 50, "Garlic Bread": 5}
+    # a plain import replaces instead
+    apply(db_path, "name,category,price,quantity\nCiabatta,Bread,50,20\n")
+    assert stock(db_path)["Ciabatta"] == 20
+
+def test_restock_inserts_new_pastries_with_the_file_quantity(db_path):
+    apply(db_path, "name,category,price,quantity\nCiabatta,Bread,45,30\n")
+    res = apply(db_path, "name,category,price,quantity\nPan de Sal,Bread,10,12\n", restock=True)
+    assert (res.inserted, res.updated) == (1, 0)
+    assert stock(db_path) == {"Ciabatta": 30, "Pan de Sal": 12}
+
+def test_restock_skips_rows_with_a_taken_barcode(db_path):
+    apply(db_path, "name,category,price,quantity,sku\nCiabatta,Bread,45,30,111\nGarlic Bread,Bread,40,5,222\n")
+    text = "name,category,price,quantity,sku\nCiabatta,Bread,45,10,\nGarlic Bread,Bread,40,7,111\n"
+    res = apply(db_path, text, restock=True)
+    assert (res.inserted, res.updated) == (0, 1)
+    assert set(messages(res)) == {3}
+    assert stock(db_path) == {"Ciabatta": 40, "Garlic Bread": 5}
+    assert skus(db_path) == {"Ciabatta": "111", "Garlic Bread": "222"}
+    # strict restock adds nothing at all
+    res = apply(db_path, text, strict=True, restock=True)
+    assert (res.inserted, res.updated) == (0, 0)
+    assert stock(db_path) == {"Ciabatta": 40, "Garlic Bread": 5}
+
+def test_restock_with_a_barcode_swap(db_path):
+    apply(db_path, "name,category,price,quantity,sku\nCiabatta,Bread,45,30,111\nGarlic Bread,Bread,40,5,222\n")
+    res = apply(db_path, "name,category,price,quantity,sku\nCiabatta,Bread,45,1,222\nGarlic Bread,Bread,40,2,111\n",
+                restock=True)
+    assert (res.updated, res.errors) == (2, [])
+    assert stock(db_path) == {"Ciabatta": 31, "Garlic Bread": 7}
+    assert skus(db_path) == {"Ciabatta": "222", "Garlic Bread": "111"}
@@ -0,0 +1,119 @@
+import sqlite3
+
+import pytest
+
+from utils import DB_POOL, db_connect
+from database_setup import init_db
+
+
+@pytest.fixture
+def old_db(tmp_path):
+    """A pre-migration database: the original tables, a legacy ``sales``
+    table next to receipts, user_version 0."""
+    path = str(tmp_path / "old.db")
+    con = sqlite3.connect(path)
+    con.execute("""
+        CREATE TABLE pastries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            category TEXT NOT NULL,
+            price REAL NOT NULL,
+            quantity INTEGER NOT NULL,
+            date_added TEXT DEFAULT CURRENT_TIMESTAMP,
+            last_updated TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    con.executemany("INSERT INTO pastries (name, category, price, quantity) VALUES (?,?,?,?)",
+                    [("Ciabatta", "Bread", 45, 3), ("Garlic Bread", "Bread", 40, 5)])
+    con.execute("""
+        CREATE TABLE sales (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pastry_id INTEGER NOT NULL,
+            qty INTEGER NOT NULL,
+            unit_price REAL NOT NULL,
+            total REAL NOT NULL,
+            sale_time TEXT DEFAULT CURRENT_TIMESTAMP,
+            staff_username TEXT NOT NULL
+        )
+    """)
+    con.execute("""
+        CREATE TABLE receipts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            receipt_no INTEGER UNIQUE,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            staff_username TEXT NOT NULL,
+            customer_name TEXT,
+            subtotal REAL NOT NULL,
+            discount REAL NOT NULL,
+            tax REAL NOT NULL,
+            total REAL NOT NULL,
+            tendered REAL NOT NULL,
+            change REAL NOT NULL
+        )
+    """)
+    con.execute("""
+        CREATE TABLE receipt_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            receipt_id INTEGER NOT NULL,
+            pastry_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            unit_price REAL NOT NULL,
+            qty INTEGER NOT NULL,
+            line_total REAL NOT NULL
+        )
+    """)
+    # one checkout written to both tables, a couple of seconds apart
+    con.execute("INSERT INTO receipts VALUES (1, 1005, '2026-03-01 10:00:00', 'ana', NULL, 90, 0, 0, 90, 100, 10)")
+    con.execute("INSERT INTO receipt_items VALUES (1, 1, 1, 'Ciabatta', 45, 2, 90)")
+    con.execute("INSERT INTO sales VALUES (1, 1, 2, 45, 90, '2026-03-01 10:00:02', 'ana')")
+    # sales with no receipt: one two-line sale, and one for a deleted pastry
+    con.executemany("INSERT INTO sales (pastry_id, qty, unit_price, total, sale_time, staff_username) VALUES (?,?,?,?,?,?)", [
+        (1, 1, 45, 45, "2026-03-01 11:00:00", "ben"),
+        (2, 3, 40, 120, "2026-03-01 11:00:00", "ben"),
+        (9, 1, 30, 30, "2026-03-02 08:00:00", "ana"),
+    ])
+    con.commit()
+    con.close()
+    yield path
+    DB_POOL.release(path)
+
+
+def test_v3_adds_an_optional_unique_sku(old_db):
+    init_db(old_db)
+    con = db_connect(old_db)
+    assert con.execute("PRAGMA user_version").fetchone()[0] >= 3
+    # existing pastries keep no barcode, and several may have none
+    assert con.execute("SELECT name, sku FROM pastries ORDER BY id").fetchall() == [
+        ("Ciabatta", None), ("Garlic Bread", None)]
+    con.execute("UPDATE pastries SET sku = '4800001' WHERE name = 'Ciabatta'")
+    with pytest.raises(sqlite3.IntegrityError):
+        con.execute("UPDATE pastries SET sku = '4800001' WHERE name = 'Garlic Bread'")
+    con.rollback()
+    con.close()
+
+def test_migrations_are_idempotent(db_path):
+    init_db(db_path)
+    con = db_connect(db_path)
+    assert con.execute("PRAGMA user_version").fetchone()[0] >= 3
+    assert con.execute("SELECT COUNT(*) FROM pragma_table_info('pastries') WHERE name = 'sku'").fetchone()[0] == 1
+    con.close()
+
+def test_v2_moves_orphan_sales_to_receipts_and_keeps_a_view(old_db):
+    init_db(old_db)
+    con = db_connect(old_db)
+    assert con.execute("SELECT type FROM sqlite_master WHERE name = 'sales'").fetchone() == ("view",)
+    # the matched sale is not copied; each (cashier, time) becomes one receipt, numbered after 1005
+    assert con.execute("SELECT receipt_no, created_at, staff_username, total FROM receipts ORDER BY id").fetchall() == [
+        (1005, "2026-03-01 10:00:00", "ana", 90.0),
+        (1006, "2026-03-01 11:00:00", "ben", 165.0),
+        (1007, "2026-03-02 08:00:00", "ana", 30.0),
+    ]
+    assert con.execute("SELECT name FROM receipt_items WHERE pastry_id = 9").fetchone() == ("Pastry #9",)
+    assert con.execute("SELECT COUNT(*), SUM(qty), SUM(total) FROM sales").fetchone() == (4, 7, 285.0)
+    # v1 rollups include the copied sales
+    assert con.execute("SELECT day, receipt_count, total FROM daily_sales ORDER BY day").fetchall() == [
+        ("2026-03-01", 2, 255.0), ("2026-03-02", 1, 30.0)]
+    assert con.execute("SELECT qty FROM daily_item_sales WHERE day = '2026-03-01' AND name = 'Ciabatta'"
+                       ).fetchone() == (3,)
+    assert con.execute("SELECT value FROM counters WHERE name = 'receipt_no'").fetchone() == (1007,)
+    con.close()
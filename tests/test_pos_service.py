@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from utils import db_connect
+from pos_service import PosError, PosService
+
+
+@pytest.fixture
+def pos(db_path):
+    return PosService("tester", "Admin", db_path)
+
+
+def test_scan_adds_the_barcoded_pastry(pos):
+    pid = pos.save_pastry(None, "Ciabatta", "Bread", 45, 10, sku="4800001")
+    line = pos.scan(" 4800001 ", 2)
+    assert (line.pastry_id, line.qty) == (pid, 2)
+    with pytest.raises(PosError, match="Unknown barcode: 999"):
+        pos.scan("999")
+    with pytest.raises(PosError, match=r"Unknown barcode: \(empty\)"):
+        pos.scan("  ")
+
+def test_scan_respects_stock(pos):
+    pos.save_pastry(None, "Ciabatta", "Bread", 45, 1, sku="4800001")
+    pos.scan("4800001")
+    with pytest.raises(PosError, match="Available: 1"):
+        pos.scan("4800001")
+
+def test_save_keeps_or_clears_the_barcode(pos):
+    pid = pos.save_pastry(None, "Ciabatta", "Bread", 45, 10, sku="4800001")
+    pos.save_pastry(pid, "Ciabatta", "Bread", 50, 10)
+    assert pos.catalog.find_sku("4800001").id == pid
+    pos.save_pastry(pid, "Ciabatta", "Bread", 50, 10, sku="")
+    assert pos.catalog.find_sku("4800001") is None
+    pos.reload_catalog()
+    assert pos.catalog.get(pid).sku is None
+
+def test_duplicates_rejected_by_the_catalog(pos):
+    pid = pos.save_pastry(None, "Ciabatta", "Bread", 45, 10, sku="4800001")
+    with pytest.raises(PosError, match="already exists"):
+        pos.save_pastry(None, "ciabatta", "Bread", 45, 10)
+    with pytest.raises(PosError, match="already used by 'Ciabatta'"):
+        pos.save_pastry(None, "Garlic Bread", "Bread", 40, 5, sku="4800001")
+    # saving a pastry over itself is not a duplicate
+    assert pos.save_pastry(pid, "CIABATTA", "Bread", 45, 10, sku="4800001") == pid
+
+def test_duplicates_saved_by_another_till_are_caught(db_path):
+    till_a, till_b, till_c = (PosService(name, "Admin", db_path) for name in "abc")
+    till_b.products()   # load stale catalogs before a writes
+    till_c.products()
+    till_a.save_pastry(None, "Ciabatta", "Bread", 45, 10, sku="4800001")
+    with pytest.raises(PosError, match="already exists"):
+        till_b.save_pastry(None, "Ciabatta", "Bread", 45, 10)
+    with pytest.raises(PosError, match="already used by 'Ciabatta'"):
+        till_c.save_pastry(None, "Garlic Bread", "Bread", 40, 5, sku="4800001")
+    # a failed save refreshes the till's catalog
+    assert till_c.catalog.find_sku("4800001") is not None
+
+
+def test_receipt_pages_walk_the_range_without_gaps(db_path):
+    con = db_connect(db_path)
+    stamps = (["2026-02-28 23:59:59"] + ["2026-03-01 09:00:00"] * 5 + ["2026-03-01 12:30:00"]
+              + ["2026-03-02 00:00:00"] * 3 + [f"2026-03-02 1{i}:00:00" for i in range(6)]
+              + ["2026-03-02 23:59:59"] * 4 + ["2026-03-03 00:00:00"])
+    # receipt numbers out of time order, as several tills would leave them
+    numbers = random.Random(3).sample(range(1001, 1100), len(stamps))
+    con.executemany(
+        "INSERT INTO receipts (receipt_no, created_at, staff_username, customer_name, subtotal, discount, tax, total, tendered, change) "
+        "VALUES (?,?,'tester',NULL,10,0,0,10,10,0)", zip(numbers, stamps))
+    con.commit()
+    expected = con.execute(
+        "SELECT created_at, receipt_no, staff_username, '', total FROM receipts "
+        "WHERE created_at >= '2026-03-01' AND created_at < '2026-03-03' "
+        "ORDER BY created_at DESC, receipt_no DESC").fetchall()
+    con.close()
+
+    pos = PosService("tester", "Admin", db_path)
+    pages = [pos.receipts_page("2026-03-01", "2026-03-02", limit=4)]
+    while len(pages[-1]) == 4:
+        pages.append(pos.receipts_page("2026-03-01", "2026-03-02", after=pages[-1][-1][:2], limit=4))
+    walked = [row for page in pages for row in page]
+    assert len(expected) == len(stamps) - 2
+    assert walked == expected
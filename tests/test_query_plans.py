@@ -0,0 +1,17 @@
+from datetime import date, timedelta
+
+from utils import db_connect
+from database_setup import _seed_year_of_receipts, full_scans, report_query_plans
+from queries import REPORT_QUERIES, STOCK_QUERIES
+
+
+def test_report_and_stock_queries_use_indexes(db_path):
+    # same check as ``database_setup.py --check-plans``
+    con = db_connect(db_path)
+    _seed_year_of_receipts(con, receipts_per_day=10)
+    today = date.today()
+    plans = report_query_plans(con, (today - timedelta(days=30)).isoformat(), today.isoformat())
+    con.close()
+    assert set(plans) == set(REPORT_QUERIES) | set(STOCK_QUERIES)
+    assert full_scans(plans) == []
+    assert any("idx_pastries_low_stock" in detail for detail in plans["low_stock_items"])
@@ -0,0 +1,116 @@
+import os
+import threading
+
+import pytest
+
+import receipts
+from utils import db_connect
+from checkout import checkout
+from receipts import ReceiptRenderQueue, export_receipts_batch
+
+
+@pytest.fixture
+def receipt_nos(db_path):
+    """Three stored receipts; returns their numbers."""
+    con = db_connect(db_path)
+    pid = con.execute("INSERT INTO pastries (name, category, price, quantity) VALUES ('Ciabatta','Bread',45,50)").lastrowid
+    con.commit()
+    nos = [checkout(con, "tester", "Walk-in", [(pid, "Ciabatta", 45.0, n, 45.0 * n)], 45.0 * n, 0.0, 0.0,
+                    45.0 * n, 45.0 * n, 0.0).receipt_no for n in (1, 2, 3)]
+    con.close()
+    return nos
+
+def run_queue(q, jobs):
+    for no in jobs:
+        q.submit(no, open_after=False)
+    q.shutdown()
+    return {r.receipt_no: r for r in q.poll()}
+
+
+def test_queue_renders_receipts(db_path, receipt_nos, tmp_path):
+    q = ReceiptRenderQueue(str(tmp_path / "out"), str(tmp_path), workers=2, backoff=0, db_path=db_path)
+    done = run_queue(q, receipt_nos)
+    assert sorted(done) == receipt_nos and q.backlog == 0
+    for no, r in done.items():
+        assert (r.error, r.attempts, r.open_after) == (None, 1, False)
+        assert r.filename == os.path.join(str(tmp_path / "out"), f"Receipt_{no}.pdf")
+        with open(r.filename, "rb") as fh:
+            assert fh.read(5) == b"%PDF-"
+    assert list(q.poll()) == []
+
+def test_failed_renders_are_retried_then_reported(db_path, receipt_nos, tmp_path, monkeypatch):
+    render = receipts.render_receipt
+    calls = {}
+
+    def flaky(receipt_no, *args):
+        calls[receipt_no] = calls.get(receipt_no, 0) + 1
+        if receipt_no == receipt_nos[0] and calls[receipt_no] == 1:
+            raise PermissionError("file is open in a viewer")
+        if receipt_no == receipt_nos[1]:
+            raise OSError("disk full")
+        return render(receipt_no, *args)
+    monkeypatch.setattr(receipts, "render_receipt", flaky)
+
+    q = ReceiptRenderQueue(str(tmp_path / "out"), str(tmp_path), retries=2, backoff=0, db_path=db_path)
+    done = run_queue(q, receipt_nos[:2] + [999999])
+    ok, failed, missing = done[receipt_nos[0]], done[receipt_nos[1]], done[999999]
+    assert (ok.attempts, ok.error) == (2, None) and os.path.exists(ok.filename)
+    assert (failed.attempts, failed.filename, str(failed.error)) == (3, None, "disk full")
+    # an unknown receipt is not retried
+    assert (missing.attempts, missing.filename) == (1, None)
+    assert isinstance(missing.error, LookupError)
+
+def test_backlog_counts_queued_and_rendering_receipts(tmp_path, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow(receipt_no, out_dir, *args):
+        started.set()
+        release.wait()
+        return os.path.join(out_dir, f"Receipt_{receipt_no}.pdf")
+    monkeypatch.setattr(receipts, "render_receipt", slow)
+
+    q = ReceiptRenderQueue(str(tmp_path), str(tmp_path), workers=1)
+    q.submit(1)
+    q.submit(2, open_after=False)
+    assert started.wait(5)
+    assert q.backlog == 2 and list(q.poll()) == []
+    release.set()
+    q.shutdown()
+    assert q.backlog == 0
+    assert [(r.receipt_no, r.open_after) for r in q.poll()] == [(1, True), (2, False)]
+
+
+# ---- batch export ----
+def test_batch_export_merges_pages_in_order(db_path, receipt_nos, tmp_path, monkeypatch):
+    draw = receipts.draw_receipt
+    drawn, ticks = [], []
+
+    def recording(c, receipt_no, *args):
+        drawn.append(receipt_no)
+        return draw(c, receipt_no, *args)
+    # pages are laid out in this process, so the patch sees every page
+    monkeypatch.setattr(receipts, "draw_receipt", recording)
+
+    nos = [receipt_nos[2], 999999, receipt_nos[0], receipt_nos[1]]
+    out = str(tmp_path / "exports" / "batch.pdf")
+    res = export_receipts_batch(nos, out, str(tmp_path), workers=2, db_path=db_path,
+                                progress=lambda done, total, pps: ticks.append((done, total)))
+    assert drawn == [receipt_nos[2], receipt_nos[0], receipt_nos[1]]
+    assert (res.files, res.pages, res.skipped) == ([out], 3, [999999])
+    assert ticks == [(n, 4) for n in range(1, 5)]
+    with open(out, "rb") as fh:
+        assert fh.read(5) == b"%PDF-"
+
+def test_batch_export_split_writes_one_file_per_receipt(db_path, receipt_nos, tmp_path):
+    out = str(tmp_path / "split")
+    res = export_receipts_batch(receipt_nos[::-1] + [999999], out, str(tmp_path), merged=False, workers=1,
+                                db_path=db_path)
+    assert res.files == [os.path.join(out, f"Receipt_{no}.pdf") for no in receipt_nos[::-1]]
+    assert all(os.path.getsize(f) > 0 for f in res.files)
+    assert (res.pages, res.skipped) == (3, [999999])
+
+def test_batch_export_with_no_receipts_writes_nothing(db_path, tmp_path):
+    out = str(tmp_path / "empty.pdf")
+    res = export_receipts_batch([999999], out, str(tmp_path), workers=1, db_path=db_path)
+    assert (res.files, res.pages, res.skipped) == ([], 0, [999999])
+    assert not os.path.exists(out)
@@ -0,0 +1,56 @@
+import pytest
+
+from utils import db_connect
+from database_setup import backfill_rollups
+from reports import ALL_TIME, iter_sales, sales_bounds, sales_summary, summarize_sales
+
+SALES = [
+    # (created_at, item, unit_price, qty)
+    ("2026-03-01 09:15:00", "Ciabatta", 45.0, 2),
+    ("2026-03-01 23:59:59", "Garlic Bread", 40.0, 1),
+    ("2026-03-02 00:00:00", "Ciabatta", 45.0, 5),
+    ("2026-03-03 12:00:00", "Pan de Sal", 10.0, 12),
+]
+
+
+@pytest.fixture
+def sales_db(db_path):
+    con = db_connect(db_path)
+    for n, (stamp, name, price, qty) in enumerate(SALES, 1001):
+        total = price * qty
+        rid = con.execute(
+            "INSERT INTO receipts (receipt_no, created_at, staff_username, subtotal, discount, tax, total, tendered, change) "
+            "VALUES (?,?,'tester',?,0,0,?,?,0)", (n, stamp, total, total, total)).lastrowid
+        con.execute("INSERT INTO receipt_items (receipt_id, pastry_id, name, unit_price, qty, line_total) VALUES (?,?,?,?,?,?)",
+                    (rid, n, name, price, qty, total))
+    con.commit()
+    backfill_rollups(con)
+    con.close()
+    return db_path
+
+
+@pytest.mark.parametrize("date_from, date_to, bounds", [
+    (None, None, ALL_TIME),
+    ("", "", ALL_TIME),
+    ("2026-03-01", "2026-03-02", ("2026-03-01", "2026-03-03")),
+    ("2026-03-01", "", ("2026-03-01", "2026-03-02")),
+    ("", "2026-03-02", ("2026-03-02", "2026-03-03")),
+    ("2026-12-31", None, ("2026-12-31", "2027-01-01")),
+])
+def test_sales_bounds(date_from, date_to, bounds):
+    assert sales_bounds(date_from, date_to) == bounds
+
+def test_sales_bounds_rejects_bad_dates():
+    with pytest.raises(ValueError):
+        sales_bounds("03/01/2026")
+
+@pytest.mark.parametrize("date_from, date_to, expected", [
+    ("2026-03-01", None, {"total_sales": 130.0, "total_items": 3, "most_popular": "Ciabatta"}),
+    (None, "2026-03-02", {"total_sales": 225.0, "total_items": 5, "most_popular": "Ciabatta"}),
+    ("2026-03-02", "2026-03-03", {"total_sales": 345.0, "total_items": 17, "most_popular": "Pan de Sal"}),
+    (None, None, {"total_sales": 475.0, "total_items": 20, "most_popular": "Pan de Sal"}),
+    ("2026-04-01", None, {"total_sales": 0.0, "total_items": 0, "most_popular": "N/A"}),
+])
+def test_summary_from_rollups_matches_streamed_rows(sales_db, date_from, date_to, expected):
+    assert sales_summary(date_from, date_to, db_path=sales_db) == expected
+    assert summarize_sales(iter_sales(date_from, date_to, batch=2, db_path=sales_db)) == expected
@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+from categories import CATEGORY_ITEMS
+from catalog import SEARCH_MIN_NGRAM, PastryCatalog, SearchIndex
+
+QUERIES = [
+    "", "   ", "c", "ch", "cho", "choc", "chocolate", "CHOCOLATE cake", "cake chocolate", "late",
+    "ca ch", "b", "br", "bread", "garlic br", "an", "ake", "xyz", "chocolate xyz", "ie", "pie",
+    "de sal", "pan de", "muffin 2", "red velvet 1", "é", "crème",
+]
+
+
+def matches(text, query):
+    """The documented rule, as a linear scan: every term matches, long
+    terms anywhere in the text, short ones at the start of a word."""
+    text = text.casefold()
+    words = text.split()
+    for term in query.casefold().split():
+        if len(term) < SEARCH_MIN_NGRAM:
+            if not any(w.startswith(term) for w in words):
+                return False
+        elif term not in text:
+            return False
+    return True
+
+def sample_entries(n, seed=7):
+    rng = random.Random(seed)
+    entries, names = [], set()
+    cats = list(CATEGORY_ITEMS)
+    while len(entries) < n:
+        cat = rng.choice(cats)
+        name = f"{rng.choice(CATEGORY_ITEMS[cat])} {rng.randint(1, 99)}"
+        if rng.random() < 0.05:
+            name = "Crème " + name
+        if name.casefold() not in names:
+            names.add(name.casefold())
+            entries.append((len(entries) + 1, name, cat))
+    return entries
+
+def linear(entries, query):
+    return {pid for pid, name, cat in entries if matches(f"{name} {cat}", query)}
+
+def found(index, entries, query):
+    ids = index.search(query)
+    return {pid for pid, name, cat in entries} if ids is None else set(ids)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_index_matches_a_linear_scan(query):
+    entries = sample_entries(500)
+    assert found(SearchIndex.build(entries), entries, query) == linear(entries, query)
+
+def test_incremental_updates_match_a_fresh_build():
+    entries = sample_entries(300)
+    index = SearchIndex()
+    for pid, name, cat in entries:
+        index.add(pid, name, cat)
+    rng = random.Random(11)
+    live = {pid: (pid, name, cat) for pid, name, cat in entries}
+    for pid in rng.sample(sorted(live), 100):
+        index.discard(pid)
+        del live[pid]
+    for pid in rng.sample(sorted(live), 50):
+        # rename: re-adding an id replaces its old text
+        _, name, cat = live[pid]
+        live[pid] = (pid, "Renamed " + name, "Other")
+        index.add(pid, *live[pid][1:])
+    current = list(live.values())
+    fresh = SearchIndex.build(current)
+    for query in QUERIES + ["renamed", "re other", "other"]:
+        expected = linear(current, query)
+        assert found(index, current, query) == expected
+        assert found(fresh, current, query) == expected
+
+
+@pytest.fixture
+def catalog(db_path):
+    cat = PastryCatalog(db_path)
+    for pid, name, category in sample_entries(200):
+        cat.upsert(pid, name, category, 50.0, 10)
+    return cat
+
+def catalog_scan(cat, query, category="All"):
+    return [p for p in cat.rows()
+            if (category == "All" or p.category == category) and matches(f"{p.name} {p.category}", query)]
+
+@pytest.mark.parametrize("category", ["All", "Cake", "Bread", "Other"])
+def test_catalog_search_is_ordered_and_filtered(catalog, category):
+    for query in QUERIES:
+        assert catalog.search(query, category) == catalog_scan(catalog, query, category)
+
+def test_catalog_search_follows_upsert_and_remove(catalog):
+    catalog.search("cake")      # build the index before patching
+    first = catalog.search("chocolate")[0]
+    catalog.remove(first.id)
+    catalog.upsert(1000, "Aardvark Chocolate Cake", "Cake", 75.0, 3)
+    catalog.upsert(first.id + 1, "Zebra Loaf", "Bread", 40.0, 5)
+    assert first not in catalog.search("chocolate")
+    assert catalog.search("chocolate")[0].name == "Aardvark Chocolate Cake"
+    assert [p.name for p in catalog.search("zebra", "Bread")] == ["Zebra Loaf"]
+    for query in QUERIES + ["zebra", "aardvark"]:
+        assert catalog.search(query) == catalog_scan(catalog, query)
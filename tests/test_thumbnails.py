@@ -0,0 +1,92 @@
+import os
+
+import pytest
+from PIL import Image
+
+import thumbnails
+from thumbnails import ThumbnailCache
+
+
+class FakePhoto:
+    """Stands in for ImageTk.PhotoImage, which needs a Tk display."""
+
+    def __init__(self, image):
+        self.size = image.size
+        self.pixel = image.convert("RGBA").getpixel((0, 0))
+
+
+@pytest.fixture(autouse=True)
+def no_tk(monkeypatch):
+    monkeypatch.setattr(thumbnails.ImageTk, "PhotoImage", FakePhoto)
+
+@pytest.fixture
+def cache(tmp_path):
+    return ThumbnailCache(str(tmp_path / "thumbs"))
+
+def make_image(path, color, size=(64, 48), mtime_ns=None):
+    Image.new("RGB", size, color).save(path)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def test_resized_is_stored_on_disk(cache, tmp_path):
+    src = make_image(tmp_path / "a.png", "red")
+    img = cache.resized(src, (16, 12))
+    assert img.size == (16, 12)
+    assert len(os.listdir(cache.cache_dir)) == 1
+    # a second cache (a restart) reads the stored thumbnail
+    again = ThumbnailCache(cache.cache_dir)
+    img = again.resized(src, (16, 12))
+    assert (img.size, img.getpixel((0, 0))) == ((16, 12), (255, 0, 0, 255))
+    assert again.stats()["disk_hits"] == 1 and again.stats()["misses"] == 0
+    # another size is a separate entry
+    cache.resized(src, (8, 6))
+    assert len(os.listdir(cache.cache_dir)) == 2
+
+def test_changed_image_is_not_served_stale(cache, tmp_path):
+    src = make_image(tmp_path / "a.png", "red", mtime_ns=1_000_000_000_000_000_000)
+    assert cache.photo(src, (16, 12)).pixel == (255, 0, 0, 255)
+    make_image(src, "blue", mtime_ns=1_000_000_001_000_000_000)
+    assert cache.photo(src, (16, 12)).pixel == (0, 0, 255, 255)
+    assert ThumbnailCache(cache.cache_dir).resized(src, (16, 12)).getpixel((0, 0)) == (0, 0, 255, 255)
+    assert cache.stats()["misses"] == 2
+
+def test_memory_hits_skip_decoding(cache, tmp_path):
+    src = make_image(tmp_path / "a.png", "red")
+    first = cache.photo(src, (16, 12))
+    assert cache.photo(src, (16, 12)) is first
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_lru_evicts_least_recently_used_within_budget(tmp_path):
+    cache = ThumbnailCache(str(tmp_path / "thumbs"), max_bytes=2 * 10 * 10 * 4)
+    a, b, c = (make_image(tmp_path / f"{n}.png", "red") for n in "abc")
+    pa = cache.photo(a, (10, 10))
+    cache.photo(b, (10, 10))
+    assert cache.photo(a, (10, 10)) is pa       # a is now the most recent
+    cache.photo(c, (10, 10))                    # evicts b
+    assert cache.stats()["entries"] == 2 and cache.stats()["bytes"] == 800
+    assert cache.photo(a, (10, 10)) is pa
+    misses = cache.stats()["misses"]
+    cache.photo(b, (10, 10))
+    # b comes back from disk, not from memory
+    assert cache.stats()["misses"] == misses and cache.stats()["disk_hits"] == 1
+
+def test_an_entry_larger_than_the_budget_is_still_kept(tmp_path):
+    cache = ThumbnailCache(str(tmp_path / "thumbs"), max_bytes=100)
+    src = make_image(tmp_path / "a.png", "red")
+    ph = cache.photo(src, (10, 10))
+    assert cache.photo(src, (10, 10)) is ph and cache.stats()["entries"] == 1
+
+def test_generated_images_are_built_once(cache):
+    calls = []
+
+    def make():
+        calls.append(1)
+        return Image.new("RGBA", (8, 8), "green")
+    assert cache.generated("placeholder", (8, 8), make) is cache.generated("placeholder", (8, 8), make)
+    assert len(calls) == 1
+
+def test_unreadable_source_raises_oserror(cache, tmp_path):
+    with pytest.raises(OSError):
+        cache.photo(str(tmp_path / "missing.png"), (10, 10))
@@ -0,0 +1,95 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageTk
+
+# -------------------- Thumbnail cache --------------------
+THUMB_MEMORY_BYTES = 8 * 1024 * 1024   # budget for decoded PhotoImages
+
+
+class ThumbnailCache:
+    """Two-level cache of resized images.
+
+    Level 1 is an in-process LRU of ready ``PhotoImage`` objects bounded by
+    their decoded size; level 2 is a directory of pre-resized PNGs keyed by
+    source path, mtime and target size, so a restart skips the full-size
+    decode and LANCZOS resize. A level-1 hit does no decoding at all.
+    """
+
+    def __init__(self, cache_dir, max_bytes=THUMB_MEMORY_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lru = OrderedDict()   # key -> (PhotoImage, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.disk_hits = self.misses = 0
+
+    # ---- level 1 ----
+    def _get(self, key):
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                return None
+            self._lru.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _put(self, key, photo, size):
+        nbytes = size[0] * size[1] * 4
+        with self._lock:
+            self._lru[key] = (photo, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and len(self._lru) > 1:
+                _, (_, old) = self._lru.popitem(last=False)
+                self._bytes -= old
+
+    # ---- level 2 ----
+    def _disk_path(self, src, mtime_ns, size):
+        digest = hashlib.sha1(f"{os.path.abspath(src)}|{mtime_ns}|{size[0]}x{size[1]}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".png")
+
+    def resized(self, src, size):
+        """PIL image of ``src`` resized to ``size``, via the on-disk store."""
+        st = os.stat(src)
+        fp = self._disk_path(src, st.st_mtime_ns, size)
+        try:
+            with Image.open(fp) as cached:
+                cached.load()
+                self.disk_hits += 1
+                return cached
+        except (OSError, ValueError):
+            pass
+        self.misses += 1
+        img = Image.open(src).convert("RGBA").resize(size, Image.LANCZOS)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{fp}.{os.getpid()}.tmp"
+            img.save(tmp, format="PNG")
+            os.replace(tmp, fp)
+        except OSError as e:
+            print("Thumbnail cache write error:", e)
+        return img
+
+    # ---- public ----
+    def photo(self, src, size):
+        """``PhotoImage`` of ``src`` at ``size``; raises OSError if unreadable."""
+        key = (src, os.stat(src).st_mtime_ns, size)
+        ph = self._get(key)
+        if ph is None:
+            ph = ImageTk.PhotoImage(self.resized(src, size))
+            self._put(key, ph, size)
+        return ph
+
+    def generated(self, key, size, make):
+        """Cache a PhotoImage built by ``make()`` (a PIL image) under ``key``."""
+        key = ("generated", key, size)
+        ph = self._get(key)
+        if ph is None:
+            ph = ImageTk.PhotoImage(make())
+            self._put(key, ph, size)
+        return ph
+
+    def stats(self) -> dict:
+        return {"entries": len(self._lru), "bytes": self._bytes, "hits": self.hits,
+                "disk_hits": self.disk_hits, "misses": self.misses}
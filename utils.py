@@ -1,8 +1,10 @@
 ﻿import sqlite3
 import hashlib
 import os
-from datetime import datetime
-from PIL import Image, ImageDraw, ImageTk
+import time
+import random
+import threading
+from datetime import datetime, timedelta
 
 
 COL_ACCENT = "#ffb347"
@@ -11,10 +13,148 @@ COL_TEXT = "#000000"
 COL_OK = "#66bb6a"
 
 # -------------------- Helper utils --------------------
-DB_PATH = os.path.join(os.path.dirname(__file__), "pastry_inventory.db")
+# Several tills may share one database file (local disk: WAL does not work
+# over network filesystems); point them at it with MAMBA_DB_PATH.
+DB_PATH = os.environ.get("MAMBA_DB_PATH") or os.path.join(os.path.dirname(__file__), "pastry_inventory.db")
 
-def db_connect():
-    return sqlite3.connect(DB_PATH)
+DB_CACHE_KIB = 8192         # page cache per connection (PRAGMA cache_size)
+DB_STATEMENT_CACHE = 256    # prepared statements kept per connection
+DB_BUSY_TIMEOUT_MS = 5000   # how long a statement waits on another till's lock
+DB_WRITE_RETRIES = 4        # extra attempts for a write that still hit a lock
+DB_RETRY_BACKOFF = 0.05     # seconds; doubles per attempt, with jitter
+
+
+class PooledConnection:
+    """Borrowed handle on a pooled sqlite3 connection.
+
+    Behaves like ``sqlite3.Connection`` but ``close()`` only returns the
+    connection to the pool (rolling back anything left uncommitted), so the
+    existing ``con = db_connect() ... con.close()`` call sites keep working.
+    """
+
+    __slots__ = ("_con",)
+
+    def __init__(self, con):
+        self._con = con
+
+    def __getattr__(self, name):
+        return getattr(self._con, name)
+
+    def __enter__(self):
+        return self._con.__enter__()
+
+    def __exit__(self, *exc):
+        return self._con.__exit__(*exc)
+
+    def close(self):
+        if self._con.in_transaction:
+            self._con.rollback()
+
+
+class ConnectionPool:
+    """Hands out one long-lived connection per (thread, database file).
+
+    sqlite3 connections may not be shared between threads, so each thread
+    gets its own; connections inherited across a fork are never reused.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all = []
+        self.opened = 0
+        self.borrowed = 0
+        self.lock_wait = 0.0    # seconds spent waiting for the write lock
+        self.lock_retries = 0
+
+    def _open(self, path):
+        con = sqlite3.connect(path, cached_statements=DB_STATEMENT_CACHE)
+        con.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.execute(f"PRAGMA cache_size=-{DB_CACHE_KIB}")
+        with self._lock:
+            self.opened += 1
+            self._all.append(con)
+        return con
+
+    def acquire(self, path):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            local.pid = os.getpid()
+            local.cons = {}
+        con = local.cons.get(path)
+        if con is None:
+            con = local.cons[path] = self._open(path)
+        with self._lock:
+            self.borrowed += 1
+        return PooledConnection(con)
+
+    def release(self, path):
+        """Close this thread's connection to ``path``, if it has one."""
+        con = getattr(self._local, "cons", {}).pop(path, None)
+        if con is not None:
+            with self._lock:
+                self._all.remove(con)
+            con.close()
+
+    def close_all(self):
+        """Close every connection this process opened (call on shutdown)."""
+        with self._lock:
+            cons, self._all = self._all, []
+        for con in cons:
+            try:
+                con.close()
+            except sqlite3.ProgrammingError:
+                pass  # owned by another, already finished thread
+        self._local = threading.local()
+
+    def record_lock_wait(self, seconds, retried=False):
+        with self._lock:
+            self.lock_wait += seconds
+            self.lock_retries += retried
+
+    def stats(self) -> dict:
+        return {"opened": self.opened, "borrowed": self.borrowed,
+                "lock_wait": self.lock_wait, "lock_retries": self.lock_retries}
+
+
+DB_POOL = ConnectionPool()
+
+def db_connect(path=None):
+    return DB_POOL.acquire(path or DB_PATH)
+
+def db_stats() -> dict:
+    """Connections opened / handed out by this session's pool, plus time
+    spent waiting for other tills' write locks."""
+    return DB_POOL.stats()
+
+def begin_immediate(cur):
+    """Start a write transaction, counting the time spent blocked on the
+    lock (busy_timeout) towards ``db_stats()["lock_wait"]``."""
+    start = time.perf_counter()
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+    finally:
+        DB_POOL.record_lock_wait(time.perf_counter() - start)
+
+def is_lock_error(e) -> bool:
+    msg = str(e).lower()
+    return isinstance(e, sqlite3.OperationalError) and ("locked" in msg or "busy" in msg)
+
+def retry_on_lock(fn, *args, retries=DB_WRITE_RETRIES, backoff=DB_RETRY_BACKOFF, **kwargs):
+    """Call ``fn`` and retry with jittered exponential backoff while it fails
+    with "database is locked"/"busy" (after busy_timeout already expired).
+    ``fn`` must roll back its own transaction before raising."""
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            if attempt == retries or not is_lock_error(e):
+                raise
+            delay = backoff * (2 ** attempt) * (0.5 + random.random())
+            DB_POOL.record_lock_wait(delay, retried=True)
+            time.sleep(delay)
 
 def hash_pw(pw: str) -> str:
     return hashlib.sha256(pw.encode("utf-8")).hexdigest()
@@ -28,9 +168,23 @@ def money(v: float) -> str:
 def now_iso():
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+def day_range(date_from: str, date_to: str):
+    """Half-open ``[start, end)`` created_at bounds covering both days inclusive.
+
+    Comparing the raw column against these strings lets SQLite use the
+    created_at index, unlike ``date(created_at) BETWEEN ? AND ?``.
+    Raises ValueError for dates not in YYYY-MM-DD form.
+    """
+    start = datetime.strptime(date_from.strip(), "%Y-%m-%d")
+    end = datetime.strptime(date_to.strip(), "%Y-%m-%d") + timedelta(days=1)
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
 ICON_CACHE = {}
 
-def draw_icon(shape: str, size=(28, 28), fill=COL_ACCENT, stroke=COL_TEXT) -> ImageTk.PhotoImage:
+def draw_icon(shape: str, size=(28, 28), fill=COL_ACCENT, stroke=COL_TEXT):
+    # ImageTk pulls in tkinter and ImageDraw pulls in ImageFont; keep both
+    # out of plain imports of this module
+    from PIL import Image, ImageDraw, ImageTk
     key = (shape, size)
     if key in ICON_CACHE:
         return ICON_CACHE[key]